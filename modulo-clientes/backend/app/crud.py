@@ -3,14 +3,67 @@ Operações CRUD (Create, Read, Update, Delete) para o módulo de clientes.
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, func, cast, extract, Integer
 from typing import List, Optional
 from uuid import UUID
+import copy
+import os
+import threading
+import time
 import uuid
 
 from app.models import Cliente, TipoCliente, StatusCliente
 from app.schemas import ClienteCreate, ClienteUpdate, ClienteFilter
 
+# Tempo de vida (segundos) do cache das estatísticas de clientes; 0 desativa o cache
+CLIENTES_STATS_CACHE_TTL = float(os.getenv("CLIENTES_STATS_CACHE_TTL", "30"))
+
+class CacheEstatisticas:
+    """
+    Cache por processo das estatísticas de clientes, com validade (TTL).
+
+    É descartado a cada cliente criado, atualizado ou removido por este
+    processo; as alterações feitas por outros processos aparecem ao fim
+    da validade. Um resultado só é guardado se nenhuma alteração ocorreu
+    enquanto o banco era consultado.
+    """
+
+    def __init__(self, ttl: float = CLIENTES_STATS_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._estatisticas: Optional[dict] = None
+        self._expira_em = 0.0
+        self._versao = 0
+
+    def versao(self) -> int:
+        """Versão atual, registrada antes de consultar o banco"""
+        with self._lock:
+            return self._versao
+
+    def obter(self) -> Optional[dict]:
+        """Estatísticas em cache, se dentro da validade"""
+        with self._lock:
+            if self._estatisticas is None or time.monotonic() >= self._expira_em:
+                return None
+            return copy.deepcopy(self._estatisticas)
+
+    def guardar(self, estatisticas: dict, versao: int) -> None:
+        """Guarda as estatísticas lidas do banco, se não houve alteração desde `versao`"""
+        with self._lock:
+            if self.ttl <= 0 or self._versao != versao:
+                return
+            self._estatisticas = copy.deepcopy(estatisticas)
+            self._expira_em = time.monotonic() + self.ttl
+
+    def invalidar(self) -> None:
+        """Descarta as estatísticas em cache"""
+        with self._lock:
+            self._versao += 1
+            self._estatisticas = None
+
+# Instância global do cache de estatísticas
+cache_estatisticas = CacheEstatisticas()
+
 class ClienteCRUD:
     """Classe para operações CRUD de clientes"""
 
@@ -53,6 +106,7 @@ class ClienteCRUD:
         db_cliente = Cliente(**cliente_dict)
         self.db.add(db_cliente)
         self.db.commit()
+        cache_estatisticas.invalidar()
         self.db.refresh(db_cliente)
         
         return db_cliente
@@ -187,6 +241,7 @@ class ClienteCRUD:
             setattr(db_cliente, field, value)
 
         self.db.commit()
+        cache_estatisticas.invalidar()
         self.db.refresh(db_cliente)
         
         return db_cliente
@@ -207,6 +262,7 @@ class ClienteCRUD:
 
         self.db.delete(db_cliente)
         self.db.commit()
+        cache_estatisticas.invalidar()
         
         return True
 
@@ -250,27 +306,50 @@ class ClienteCRUD:
         """
         Retorna estatísticas dos clientes.
         
+        Todas as distribuições (status, tipo, década de nascimento e UF)
+        saem de uma única consulta agrupada, que lê a tabela uma vez; o
+        resultado fica em cache por CLIENTES_STATS_CACHE_TTL segundos.
+        
         Returns:
             Dicionário com estatísticas
         """
-        total = self.db.query(Cliente).count()
-        ativos = self.db.query(Cliente).filter(Cliente.status == StatusCliente.ATIVO).count()
-        inativos = self.db.query(Cliente).filter(Cliente.status == StatusCliente.INATIVO).count()
-        bloqueados = self.db.query(Cliente).filter(Cliente.status == StatusCliente.BLOQUEADO).count()
-        
-        pessoa_fisica = self.db.query(Cliente).filter(Cliente.tipo_cliente == TipoCliente.PESSOA_FISICA).count()
-        pessoa_juridica = self.db.query(Cliente).filter(Cliente.tipo_cliente == TipoCliente.PESSOA_JURIDICA).count()
+        estatisticas = cache_estatisticas.obter()
+        if estatisticas is not None:
+            return estatisticas
+        versao = cache_estatisticas.versao()
 
-        return {
-            "total": total,
+        # Uma linha por combinação (poucas centenas), somadas abaixo em cada distribuição
+        decada = (cast(extract("year", Cliente.data_nascimento), Integer) // 10 * 10).label("decada")
+        linhas = self.db.query(
+            Cliente.status, Cliente.tipo_cliente, decada, Cliente.estado, func.count().label("quantidade")
+        ).group_by(Cliente.status, Cliente.tipo_cliente, decada, Cliente.estado).all()
+
+        por_status = {status: 0 for status in StatusCliente}
+        por_tipo = {tipo: 0 for tipo in TipoCliente}
+        por_decada: dict = {}
+        por_uf: dict = {}
+        for linha in linhas:
+            por_status[linha.status] += linha.quantidade
+            por_tipo[linha.tipo_cliente] += linha.quantidade
+            chave_decada = str(linha.decada) if linha.decada is not None else "nao_informado"
+            por_decada[chave_decada] = por_decada.get(chave_decada, 0) + linha.quantidade
+            chave_uf = linha.estado.upper() if linha.estado else "nao_informado"
+            por_uf[chave_uf] = por_uf.get(chave_uf, 0) + linha.quantidade
+
+        estatisticas = {
+            "total": sum(por_status.values()),
             "por_status": {
-                "ativos": ativos,
-                "inativos": inativos,
-                "bloqueados": bloqueados
+                "ativos": por_status[StatusCliente.ATIVO],
+                "inativos": por_status[StatusCliente.INATIVO],
+                "bloqueados": por_status[StatusCliente.BLOQUEADO]
             },
             "por_tipo": {
-                "pessoa_fisica": pessoa_fisica,
-                "pessoa_juridica": pessoa_juridica
-            }
+                "pessoa_fisica": por_tipo[TipoCliente.PESSOA_FISICA],
+                "pessoa_juridica": por_tipo[TipoCliente.PESSOA_JURIDICA]
+            },
+            "por_decada_nascimento": dict(sorted(por_decada.items())),
+            "por_uf": dict(sorted(por_uf.items()))
         }
+        cache_estatisticas.guardar(estatisticas, versao)
+        return estatisticas
 
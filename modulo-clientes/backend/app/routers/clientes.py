@@ -293,6 +293,11 @@ async def estatisticas_clientes(
     - Total de clientes
     - Distribuição por status (ativo, inativo, bloqueado)
     - Distribuição por tipo (pessoa física, pessoa jurídica)
+    - Distribuição por década de nascimento
+    - Distribuição por UF
+    
+    Calculadas em uma única consulta e mantidas em cache por
+    CLIENTES_STATS_CACHE_TTL segundos (descartado a cada alteração).
     """
     crud = ClienteCRUD(db)
     stats = crud.get_stats()
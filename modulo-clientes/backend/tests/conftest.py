@@ -9,6 +9,7 @@ from sqlalchemy.orm import sessionmaker
 from fastapi.testclient import TestClient
 
 from app.main import app
+from app.crud import cache_estatisticas
 from app.database import get_db, Base
 from app.models import Cliente
 
@@ -47,6 +48,8 @@ def db_session():
     """Cria uma sessão de banco de dados para cada teste."""
     # Cria as tabelas
     Base.metadata.create_all(bind=engine)
+    # Estatísticas em cache se referem às tabelas do teste anterior
+    cache_estatisticas.invalidar()
     
     # Cria a sessão
     session = TestingSessionLocal()
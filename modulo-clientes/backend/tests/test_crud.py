@@ -3,10 +3,11 @@ Testes para as operações CRUD do módulo de clientes.
 """
 
 import pytest
+from datetime import date
 from uuid import uuid4
 from app.crud import ClienteCRUD
 from app.schemas import ClienteCreate, ClienteUpdate, ClienteFilter
-from app.models import TipoCliente, StatusCliente
+from app.models import Cliente, TipoCliente, StatusCliente
 
 def test_criar_cliente(db_session):
     """Testa a criação de um cliente via CRUD."""
@@ -255,9 +256,9 @@ def test_estatisticas_clientes(db_session):
     
     # Criar clientes com diferentes tipos e status
     clientes_data = [
-        ClienteCreate(nome="PF Ativo 1", tipo_cliente="pessoa_fisica", status="ativo"),
-        ClienteCreate(nome="PF Ativo 2", tipo_cliente="pessoa_fisica", status="ativo"),
-        ClienteCreate(nome="PF Inativo", tipo_cliente="pessoa_fisica", status="inativo"),
+        ClienteCreate(nome="PF Ativo 1", tipo_cliente="pessoa_fisica", status="ativo", estado="SP", data_nascimento=date(1985, 3, 1)),
+        ClienteCreate(nome="PF Ativo 2", tipo_cliente="pessoa_fisica", status="ativo", estado="SP", data_nascimento=date(1989, 12, 31)),
+        ClienteCreate(nome="PF Inativo", tipo_cliente="pessoa_fisica", status="inativo", estado="RJ", data_nascimento=date(1990, 1, 1)),
         ClienteCreate(nome="PJ Ativo", tipo_cliente="pessoa_juridica", status="ativo"),
         ClienteCreate(nome="PJ Bloqueado", tipo_cliente="pessoa_juridica", status="bloqueado"),
     ]
@@ -273,4 +274,17 @@ def test_estatisticas_clientes(db_session):
     assert stats["por_status"]["bloqueados"] == 1
     assert stats["por_tipo"]["pessoa_fisica"] == 3
     assert stats["por_tipo"]["pessoa_juridica"] == 2
+    assert stats["por_decada_nascimento"] == {"1980": 2, "1990": 1, "nao_informado": 2}
+    assert stats["por_uf"] == {"RJ": 1, "SP": 2, "nao_informado": 2}
+    
+    # Alterações fora do CRUD só aparecem ao fim da validade do cache
+    db_session.add(Cliente(nome="Fora do CRUD"))
+    db_session.commit()
+    assert crud.get_stats()["total"] == 5
+    
+    # Criar pelo CRUD descarta o cache
+    crud.create(ClienteCreate(nome="PF Novo", estado="MG"))
+    stats = crud.get_stats()
+    assert stats["total"] == 7
+    assert stats["por_uf"]["MG"] == 1
 
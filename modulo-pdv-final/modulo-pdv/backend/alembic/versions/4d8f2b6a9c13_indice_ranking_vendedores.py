@@ -0,0 +1,38 @@
+"""Índice cobrindo o ranking de vendedores
+
+Revision ID: 4d8f2b6a9c13
+Revises: 7b3e9a41d2c5
+Create Date: 2026-10-17 15:40:12.093114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '4d8f2b6a9c13'
+down_revision: Union[str, Sequence[str], None] = '7b3e9a41d2c5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existentes = {indice['name'] for indice in sa.inspect(op.get_bind()).get_indexes('vendas')}
+
+    # O novo índice começa pelas mesmas colunas e substitui o anterior
+    if 'idx_vendas_status_data_vendedor_total' not in existentes:
+        op.create_index(
+            'idx_vendas_status_data_vendedor_total',
+            'vendas',
+            ['status', 'data_venda', 'vendedor_id', 'total_venda']
+        )
+    if 'idx_vendas_status_data_venda' in existentes:
+        op.drop_index('idx_vendas_status_data_venda', table_name='vendas')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('idx_vendas_status_data_venda', 'vendas', ['status', 'data_venda'])
+    op.drop_index('idx_vendas_status_data_vendedor_total', table_name='vendas')
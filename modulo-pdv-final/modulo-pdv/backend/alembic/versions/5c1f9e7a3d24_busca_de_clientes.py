@@ -0,0 +1,34 @@
+"""Índice de busca de clientes sem acentos (pg_trgm / FTS5)
+
+No PostgreSQL cria as extensões pg_trgm e unaccent (requer permissão),
+a função normalizar_busca e os índices GIN de trigramas; no SQLite cria
+a tabela FTS5 clientes_busca com os triggers e indexa os clientes
+existentes.
+
+Revision ID: 5c1f9e7a3d24
+Revises: d2e7b4a9c6f1
+Create Date: 2026-10-17 20:12:37.509114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.busca_clientes import criar_indice_busca, remover_indice_busca
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1f9e7a3d24'
+down_revision: Union[str, Sequence[str], None] = 'd2e7b4a9c6f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Idempotente: o índice também é criado junto com a tabela pela aplicação
+    criar_indice_busca(op.get_bind())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    remover_indice_busca(op.get_bind())
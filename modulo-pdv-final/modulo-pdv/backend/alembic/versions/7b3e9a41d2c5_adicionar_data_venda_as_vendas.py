@@ -0,0 +1,75 @@
+"""Adicionar data_venda às vendas
+
+Revision ID: 7b3e9a41d2c5
+Revises: c19e371d017c
+Create Date: 2026-10-17 09:12:37.518204
+
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '7b3e9a41d2c5'
+down_revision: Union[str, Sequence[str], None] = 'c19e371d017c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Índices criados por esta migração: (nome, tabela, colunas)
+INDICES = [
+    ('ix_vendas_data_venda', 'vendas', ['data_venda']),
+    ('idx_vendas_status_data_venda', 'vendas', ['status', 'data_venda']),
+    ('idx_vendas_vendedor_data_venda', 'vendas', ['vendedor_id', 'data_venda']),
+    ('idx_vendas_cliente_data_venda', 'vendas', ['cliente_id', 'data_venda']),
+    ('idx_vendas_data_criacao_id', 'vendas', ['data_criacao', 'id']),
+    ('idx_pagamentos_venda_forma', 'pagamentos_venda', ['venda_id', 'forma_pagamento']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # As tabelas do PDV podem ter sido criadas pela aplicação (create_all),
+    # então só adiciona o que ainda não existe
+    colunas = {coluna['name'] for coluna in inspector.get_columns('vendas')}
+    if 'data_venda' not in colunas:
+        op.add_column('vendas', sa.Column('data_venda', sa.Date(), nullable=True))
+
+    # Preenche a data de negócio das vendas existentes no fuso horário da loja
+    if bind.dialect.name == 'postgresql':
+        op.execute(
+            sa.text(
+                "UPDATE vendas SET data_venda = (data_criacao AT TIME ZONE :fuso)::date "
+                "WHERE data_venda IS NULL"
+            ).bindparams(fuso=os.getenv('LOJA_TIMEZONE', 'America/Sao_Paulo'))
+        )
+    else:
+        # SQLite não tem fusos horários: usa a data gravada em data_criacao
+        op.execute("UPDATE vendas SET data_venda = date(data_criacao) WHERE data_venda IS NULL")
+
+    with op.batch_alter_table('vendas') as batch_op:
+        batch_op.alter_column('data_venda', existing_type=sa.Date(), nullable=False)
+
+    existentes = {
+        indice['name']
+        for tabela in ('vendas', 'pagamentos_venda')
+        for indice in inspector.get_indexes(tabela)
+    }
+    for nome, tabela, colunas_indice in INDICES:
+        if nome not in existentes:
+            op.create_index(nome, tabela, colunas_indice)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Remover índices
+    for nome, tabela, _ in reversed(INDICES):
+        op.drop_index(nome, table_name=tabela)
+
+    # Remover coluna
+    with op.batch_alter_table('vendas') as batch_op:
+        batch_op.drop_column('data_venda')
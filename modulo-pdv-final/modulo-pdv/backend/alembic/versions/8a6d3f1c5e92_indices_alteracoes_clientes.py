@@ -0,0 +1,38 @@
+"""Índices de data de criação e atualização dos clientes (autocomplete)
+
+Revision ID: 8a6d3f1c5e92
+Revises: 5c1f9e7a3d24
+Create Date: 2026-10-17 20:47:03.118452
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '8a6d3f1c5e92'
+down_revision: Union[str, Sequence[str], None] = '5c1f9e7a3d24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Índices da consulta periódica de alterações do autocomplete
+INDICES = {
+    'idx_clientes_data_criacao': 'data_criacao',
+    'idx_clientes_data_atualizacao': 'data_atualizacao',
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existentes = {indice['name'] for indice in sa.inspect(op.get_bind()).get_indexes('clientes')}
+
+    for nome, coluna in INDICES.items():
+        if nome not in existentes:
+            op.create_index(nome, 'clientes', [coluna])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for nome in INDICES:
+        op.drop_index(nome, table_name='clientes')
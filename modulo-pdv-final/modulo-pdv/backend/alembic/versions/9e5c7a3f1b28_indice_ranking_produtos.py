@@ -0,0 +1,30 @@
+"""Índice do ranking de produtos em itens_venda
+
+Revision ID: 9e5c7a3f1b28
+Revises: 4d8f2b6a9c13
+Create Date: 2026-10-17 16:52:37.418206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '9e5c7a3f1b28'
+down_revision: Union[str, Sequence[str], None] = '4d8f2b6a9c13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existentes = {indice['name'] for indice in sa.inspect(op.get_bind()).get_indexes('itens_venda')}
+
+    if 'idx_itens_venda_produto_venda' not in existentes:
+        op.create_index('idx_itens_venda_produto_venda', 'itens_venda', ['produto_id', 'venda_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_itens_venda_produto_venda', table_name='itens_venda')
@@ -0,0 +1,74 @@
+"""Sessões de caixa e sessao_caixa_id nas vendas
+
+Revision ID: a4c8e1f5b9d3
+Revises: f8b2c6d4e0a3
+Create Date: 2026-10-17 19:04:12.385016
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c8e1f5b9d3'
+down_revision: Union[str, Sequence[str], None] = 'f8b2c6d4e0a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Totais mantidos a cada venda (em centavos)
+COLUNAS_TOTAIS = (
+    'quantidade_vendas', 'total_vendas', 'total_troco',
+    'total_dinheiro', 'total_cartao_credito', 'total_cartao_debito',
+    'total_pix', 'total_vale_presente', 'total_crediario',
+    'quantidade_cancelamentos', 'total_cancelado',
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    # As tabelas do PDV podem ter sido criadas pela aplicação (create_all),
+    # então só adiciona o que ainda não existe
+    if not inspector.has_table('sessoes_caixa'):
+        op.create_table(
+            'sessoes_caixa',
+            sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+            sa.Column('terminal', sa.String(length=50), nullable=False),
+            sa.Column('operador', sa.String(length=100), nullable=False),
+            sa.Column('status', sa.Enum('ABERTA', 'FECHADA', name='statussessaocaixa'), nullable=False),
+            sa.Column('data_abertura', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+            sa.Column('data_fechamento', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('valor_abertura', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('valor_fechamento', sa.Integer(), nullable=True),
+            sa.Column('observacoes', sa.Text(), nullable=True),
+            *[sa.Column(coluna, sa.Integer(), nullable=False, server_default='0') for coluna in COLUNAS_TOTAIS],
+        )
+        op.create_index('ix_sessoes_caixa_id', 'sessoes_caixa', ['id'])
+        op.create_index('ix_sessoes_caixa_terminal', 'sessoes_caixa', ['terminal'])
+        # No máximo uma sessão aberta por terminal
+        op.create_index(
+            'idx_sessoes_caixa_terminal_aberta', 'sessoes_caixa', ['terminal'], unique=True,
+            sqlite_where=sa.text("status = 'ABERTA'"), postgresql_where=sa.text("status = 'ABERTA'")
+        )
+
+    colunas = {coluna['name'] for coluna in inspector.get_columns('vendas')}
+    if 'sessao_caixa_id' not in colunas:
+        with op.batch_alter_table('vendas') as batch_op:
+            batch_op.add_column(sa.Column('sessao_caixa_id', postgresql.UUID(as_uuid=True), nullable=True))
+            batch_op.create_foreign_key(
+                'vendas_sessao_caixa_id_fkey', 'sessoes_caixa', ['sessao_caixa_id'], ['id']
+            )
+        op.create_index('ix_vendas_sessao_caixa_id', 'vendas', ['sessao_caixa_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_vendas_sessao_caixa_id', table_name='vendas')
+    with op.batch_alter_table('vendas') as batch_op:
+        batch_op.drop_constraint('vendas_sessao_caixa_id_fkey', type_='foreignkey')
+        batch_op.drop_column('sessao_caixa_id')
+    op.drop_table('sessoes_caixa')
+    sa.Enum(name='statussessaocaixa').drop(op.get_bind(), checkfirst=True)
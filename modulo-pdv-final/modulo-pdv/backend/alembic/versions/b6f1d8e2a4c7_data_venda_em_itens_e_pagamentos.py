@@ -0,0 +1,47 @@
+"""Data de negócio em itens_venda e pagamentos_venda
+
+Revision ID: b6f1d8e2a4c7
+Revises: 9e5c7a3f1b28
+Create Date: 2026-10-17 17:31:05.662810
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6f1d8e2a4c7'
+down_revision: Union[str, Sequence[str], None] = '9e5c7a3f1b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tabelas que recebem a data_venda da venda (chave de partição)
+TABELAS = ('itens_venda', 'pagamentos_venda')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    for tabela in TABELAS:
+        colunas = {coluna['name'] for coluna in inspector.get_columns(tabela)}
+        if 'data_venda' not in colunas:
+            op.add_column(tabela, sa.Column('data_venda', sa.Date(), nullable=True))
+
+        # Copia a data de negócio da venda para as linhas existentes
+        op.execute(
+            f"UPDATE {tabela} SET data_venda = "
+            f"(SELECT vendas.data_venda FROM vendas WHERE vendas.id = {tabela}.venda_id) "
+            f"WHERE data_venda IS NULL"
+        )
+
+        with op.batch_alter_table(tabela) as batch_op:
+            batch_op.alter_column('data_venda', existing_type=sa.Date(), nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for tabela in reversed(TABELAS):
+        with op.batch_alter_table(tabela) as batch_op:
+            batch_op.drop_column('data_venda')
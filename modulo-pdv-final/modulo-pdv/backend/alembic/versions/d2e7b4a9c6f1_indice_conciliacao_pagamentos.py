@@ -0,0 +1,30 @@
+"""Índice de conciliação em pagamentos_venda.numero_transacao
+
+Revision ID: d2e7b4a9c6f1
+Revises: a4c8e1f5b9d3
+Create Date: 2026-10-17 19:41:55.207318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2e7b4a9c6f1'
+down_revision: Union[str, Sequence[str], None] = 'a4c8e1f5b9d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existentes = {indice['name'] for indice in sa.inspect(op.get_bind()).get_indexes('pagamentos_venda')}
+
+    if 'idx_pagamentos_venda_numero_transacao' not in existentes:
+        op.create_index('idx_pagamentos_venda_numero_transacao', 'pagamentos_venda', ['numero_transacao'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_pagamentos_venda_numero_transacao', table_name='pagamentos_venda')
@@ -0,0 +1,212 @@
+"""Particionar vendas, itens e pagamentos por mês (PostgreSQL, opcional)
+
+Só é aplicada em PostgreSQL com PARTICIONAR_VENDAS=true; nos demais casos
+não altera o banco. As tabelas são recriadas como particionadas por
+intervalo de data_venda, com uma partição por mês desde a venda mais
+antiga até PARTICOES_MESES_FUTUROS meses à frente, e os dados copiados.
+A chave primária passa a ser (id, data_venda) e as chaves estrangeiras de
+itens e pagamentos usam (venda_id, data_venda); as chaves estrangeiras de
+movimentacoes_estoque e chaves_idempotencia para vendas são removidas.
+Execute com os terminais parados.
+
+Índices únicos de tabela particionada precisam conter a chave de partição,
+então o único índice único das tabelas (ix_vendas_numero_venda) passa a
+ser (numero_venda, data_venda) e deixa de garantir, sozinho, um número por
+venda na tabela inteira. A unicidade global fica na tabela não
+particionada vendas_numeros (numero_venda como chave primária), mantida
+por um trigger em vendas (inclusão e troca de número). O custo é uma
+linha e uma entrada de índice a mais por venda, que não saem com o
+arquivamento: os números de vendas arquivadas continuam reservados. Outro
+índice único sem data_venda interrompe a migração, em vez de ser
+enfraquecido sem aviso.
+
+As definições de app.particionamento são repetidas aqui (nomes das
+partições inclusive) para que a migração não dependa do código atual.
+
+Revision ID: e3a9c5f7d1b2
+Revises: b6f1d8e2a4c7
+Create Date: 2026-10-17 17:48:22.104937
+
+"""
+import os
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a9c5f7d1b2'
+down_revision: Union[str, Sequence[str], None] = 'b6f1d8e2a4c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTICIONAR_VENDAS = os.getenv('PARTICIONAR_VENDAS', 'false').lower() in ('1', 'true', 'sim')
+PARTICOES_MESES_FUTUROS = int(os.getenv('PARTICOES_MESES_FUTUROS', '3'))
+
+# Tabelas particionadas por data_venda, na ordem de dependência (vendas primeiro)
+TABELAS_PARTICIONADAS = ('vendas', 'itens_venda', 'pagamentos_venda')
+
+# Tabelas com chave estrangeira simples para vendas.id
+REFERENCIAS_VENDAS = ('movimentacoes_estoque', 'chaves_idempotencia')
+
+# Índices únicos que recebem data_venda no particionamento
+INDICES_UNICOS = {'ix_vendas_numero_venda': ['numero_venda']}
+
+SINCRONIZAR_NUMEROS = '''
+CREATE FUNCTION vendas_numeros_sincronizar() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO vendas_numeros (numero_venda, venda_id, data_venda)
+        VALUES (NEW.numero_venda, NEW.id, NEW.data_venda);
+    ELSE
+        UPDATE vendas_numeros SET numero_venda = NEW.numero_venda, data_venda = NEW.data_venda
+        WHERE numero_venda = OLD.numero_venda;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+'''
+
+
+def _inicio_mes(dia):
+    """Primeiro dia do mês de `dia`"""
+    return dia.replace(day=1)
+
+
+def _somar_meses(mes, meses):
+    """Primeiro dia do mês `meses` meses depois do mês de `mes`"""
+    indice = mes.year * 12 + mes.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def _particionado(bind):
+    """Indica se a tabela de vendas está particionada"""
+    if bind.dialect.name != 'postgresql':
+        return False
+    tipo = bind.execute(sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass('vendas')")).scalar()
+    return tipo == 'p'
+
+
+def _criar_particoes(desde, ate):
+    """Cria uma partição por mês (vendas_p2026_10, ...), de `desde` até `ate`, nas três tabelas"""
+    for tabela in TABELAS_PARTICIONADAS:
+        mes = _inicio_mes(desde)
+        while mes <= ate:
+            proximo = _somar_meses(mes, 1)
+            op.execute(
+                f"CREATE TABLE {tabela}_p{mes:%Y_%m} PARTITION OF {tabela} "
+                f"FOR VALUES FROM ('{mes.isoformat()}') TO ('{proximo.isoformat()}')"
+            )
+            mes = proximo
+
+
+def _indices(inspector):
+    """
+    Índices atuais (nome, colunas, único) das tabelas de vendas.
+
+    Recusa índices únicos fora de INDICES_UNICOS: no particionamento eles
+    perderiam a unicidade na tabela inteira.
+    """
+    indices = {}
+    for tabela in TABELAS_PARTICIONADAS:
+        indices[tabela] = []
+        for indice in inspector.get_indexes(tabela):
+            nome, colunas = indice['name'], list(indice['column_names'])
+            if indice['unique'] and 'data_venda' not in colunas and nome not in INDICES_UNICOS:
+                raise RuntimeError(
+                    f'Índice único {nome} ({", ".join(colunas)}) de {tabela} não previsto no particionamento'
+                )
+            indices[tabela].append((nome, colunas, indice['unique']))
+    return indices
+
+
+def _recriar_tabelas(sufixo, particionar):
+    """Renomeia as tabelas com o sufixo e cria as novas com as mesmas colunas"""
+    for tabela in TABELAS_PARTICIONADAS:
+        op.execute(f'ALTER TABLE {tabela} RENAME TO {tabela}{sufixo}')
+        particionamento = ' PARTITION BY RANGE (data_venda)' if particionar else ''
+        op.execute(f'CREATE TABLE {tabela} (LIKE {tabela}{sufixo} INCLUDING DEFAULTS){particionamento}')
+
+
+def _copiar_e_descartar(sufixo):
+    """Copia os dados das tabelas antigas e as remove (dependentes primeiro)"""
+    for tabela in TABELAS_PARTICIONADAS:
+        op.execute(f'INSERT INTO {tabela} SELECT * FROM {tabela}{sufixo}')
+    for tabela in reversed(TABELAS_PARTICIONADAS):
+        op.execute(f'DROP TABLE {tabela}{sufixo}')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql' or not PARTICIONAR_VENDAS or _particionado(bind):
+        return
+
+    inspector = sa.inspect(bind)
+    indices = _indices(inspector)
+    for tabela in REFERENCIAS_VENDAS:
+        for chave in inspector.get_foreign_keys(tabela):
+            if chave['referred_table'] == 'vendas':
+                op.drop_constraint(chave['name'], tabela, type_='foreignkey')
+
+    hoje = date.today()
+    primeira, ultima = bind.execute(sa.text('SELECT min(data_venda), max(data_venda) FROM vendas')).one()
+    ultimo_mes = max(_somar_meses(_inicio_mes(hoje), PARTICOES_MESES_FUTUROS), ultima or hoje)
+
+    _recriar_tabelas('_legado', particionar=True)
+    _criar_particoes(primeira or hoje, ultimo_mes)
+    _copiar_e_descartar('_legado')
+
+    # Chaves e índices únicos precisam conter a chave de partição
+    for tabela in TABELAS_PARTICIONADAS:
+        op.execute(f'ALTER TABLE {tabela} ADD CONSTRAINT {tabela}_pkey PRIMARY KEY (id, data_venda)')
+    for tabela in ('itens_venda', 'pagamentos_venda'):
+        op.execute(
+            f'ALTER TABLE {tabela} ADD CONSTRAINT {tabela}_venda_id_fkey '
+            f'FOREIGN KEY (venda_id, data_venda) REFERENCES vendas (id, data_venda)'
+        )
+    for tabela, lista in indices.items():
+        for nome, colunas, unico in lista:
+            if nome in INDICES_UNICOS:
+                colunas = INDICES_UNICOS[nome] + ['data_venda']
+            op.create_index(nome, tabela, colunas, unique=unico)
+
+    # Unicidade global do número da venda, fora das partições
+    op.execute(
+        'CREATE TABLE vendas_numeros ('
+        'numero_venda VARCHAR(20) PRIMARY KEY, venda_id UUID NOT NULL, data_venda DATE NOT NULL)'
+    )
+    op.execute('INSERT INTO vendas_numeros SELECT numero_venda, id, data_venda FROM vendas')
+    op.execute(SINCRONIZAR_NUMEROS)
+    op.execute(
+        'CREATE TRIGGER vendas_numeros_sincronizar '
+        'AFTER INSERT OR UPDATE OF numero_venda, data_venda ON vendas '
+        'FOR EACH ROW EXECUTE FUNCTION vendas_numeros_sincronizar()'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Partições já arquivadas (schema de arquivo) não voltam para as tabelas
+    bind = op.get_bind()
+    if not _particionado(bind):
+        return
+
+    op.execute('DROP TRIGGER vendas_numeros_sincronizar ON vendas')
+    op.execute('DROP FUNCTION vendas_numeros_sincronizar()')
+    op.execute('DROP TABLE vendas_numeros')
+
+    indices = _indices(sa.inspect(bind))
+    _recriar_tabelas('_particionada', particionar=False)
+    _copiar_e_descartar('_particionada')
+
+    for tabela in TABELAS_PARTICIONADAS:
+        op.execute(f'ALTER TABLE {tabela} ADD CONSTRAINT {tabela}_pkey PRIMARY KEY (id)')
+    for tabela in ('itens_venda', 'pagamentos_venda') + REFERENCIAS_VENDAS:
+        op.create_foreign_key(f'{tabela}_venda_id_fkey', tabela, 'vendas', ['venda_id'], ['id'])
+    for tabela, lista in indices.items():
+        for nome, colunas, unico in lista:
+            if nome in INDICES_UNICOS:
+                colunas = INDICES_UNICOS[nome]
+            op.create_index(nome, tabela, colunas, unique=unico)
@@ -0,0 +1,37 @@
+"""Movimentações de estoque sem chave estrangeira para vendas
+
+O razão de estoque é mantido quando a venda vai para o arquivo frio,
+então movimentacoes_estoque.venda_id deixa de referenciar vendas.id.
+
+Revision ID: f8b2c6d4e0a3
+Revises: e3a9c5f7d1b2
+Create Date: 2026-10-17 18:26:51.730418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f8b2c6d4e0a3'
+down_revision: Union[str, Sequence[str], None] = 'e3a9c5f7d1b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Chaves sem nome (SQLite) não são verificadas pela aplicação
+    for chave in sa.inspect(op.get_bind()).get_foreign_keys('movimentacoes_estoque'):
+        if chave['referred_table'] == 'vendas' and chave['name']:
+            op.drop_constraint(chave['name'], 'movimentacoes_estoque', type_='foreignkey')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Só é possível se nenhuma venda referenciada tiver sido arquivada
+    if op.get_bind().dialect.name == 'postgresql':
+        op.create_foreign_key(
+            'movimentacoes_estoque_venda_id_fkey', 'movimentacoes_estoque', 'vendas', ['venda_id'], ['id']
+        )
@@ -0,0 +1,289 @@
+"""
+Arquivo frio das vendas antigas em arquivos Parquet (colunares, comprimidos com zstd).
+
+As vendas fechadas (concluídas ou canceladas) anteriores a um mês são
+movidas, com itens e pagamentos, para arquivos Parquet particionados por
+mês no disco local:
+
+    ARQUIVO_VENDAS_DIR/vendas/mes=2024-01/parte-....parquet
+    ARQUIVO_VENDAS_DIR/itens_venda/mes=2024-01/parte-....parquet
+    ARQUIVO_VENDAS_DIR/pagamentos_venda/mes=2024-01/parte-....parquet
+
+As leituras usam pyarrow.dataset: o filtro por mês descarta diretórios
+inteiros e os filtros por numero_venda/venda_id usam as estatísticas dos
+row groups (as linhas são gravadas ordenadas por essas colunas).
+"""
+
+from sqlalchemy import Date, DateTime, Integer, and_, delete, func, select
+from sqlalchemy.orm import Session
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+import enum
+import os
+import uuid
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from app.models import ChaveIdempotencia, ItemVenda, PagamentoVenda, StatusVenda, Venda, VendaResumoDiario
+from app.particionamento import inicio_mes, somar_meses
+
+# Diretório dos arquivos e idade (em meses) a partir da qual as vendas são arquivadas
+ARQUIVO_VENDAS_DIR = os.getenv("ARQUIVO_VENDAS_DIR", "./arquivo_vendas")
+ARQUIVO_VENDAS_MESES = int(os.getenv("ARQUIVO_VENDAS_MESES", "24"))
+
+# Tabelas arquivadas: (modelo, coluna com o ID da venda, coluna de ordenação)
+TABELAS_ARQUIVADAS = {
+    "vendas": (Venda, "id", Venda.numero_venda),
+    "itens_venda": (ItemVenda, "venda_id", ItemVenda.venda_id),
+    "pagamentos_venda": (PagamentoVenda, "venda_id", PagamentoVenda.venda_id),
+}
+
+_PARTICIONAMENTO = ds.partitioning(pa.schema([("mes", pa.string())]), flavor="hive")
+
+def _rotulo_mes(mes: date) -> str:
+    """Valor da partição de um mês: 2024-01"""
+    return f"{mes:%Y-%m}"
+
+def _esquema(modelo) -> pa.Schema:
+    """Esquema Arrow das colunas da tabela (UUIDs, textos e enums como string)"""
+    campos = []
+    for coluna in modelo.__table__.columns:
+        if isinstance(coluna.type, DateTime):
+            tipo = pa.timestamp("us", tz="UTC")
+        elif isinstance(coluna.type, Date):
+            tipo = pa.date32()
+        elif isinstance(coluna.type, Integer):
+            tipo = pa.int64()
+        else:
+            tipo = pa.string()
+        campos.append(pa.field(coluna.name, tipo))
+    return pa.schema(campos)
+
+def _valor(valor: Any) -> Any:
+    """Converte o valor lido do banco para o tipo gravado no arquivo"""
+    if isinstance(valor, uuid.UUID):
+        return str(valor)
+    if isinstance(valor, enum.Enum):
+        return valor.value
+    if isinstance(valor, datetime) and valor.tzinfo is None:
+        return valor.replace(tzinfo=timezone.utc)
+    return valor
+
+class ArquivoVendas:
+    """Arquivamento e consulta de vendas antigas em Parquet"""
+
+    def __init__(self, diretorio: str = ARQUIVO_VENDAS_DIR, tamanho_lote: int = 10000):
+        self.diretorio = Path(diretorio)
+        self.tamanho_lote = tamanho_lote
+
+    def _dataset(self, tabela: str) -> Optional[ds.Dataset]:
+        """
+        Dataset particionado por mês da tabela (None se ainda não há arquivo).
+
+        O esquema vem do modelo atual: colunas criadas depois do
+        arquivamento de um mês são lidas como nulas nos arquivos antigos.
+        """
+        caminho = self.diretorio / tabela
+        if not caminho.is_dir():
+            return None
+        esquema = _esquema(TABELAS_ARQUIVADAS[tabela][0]).append(pa.field("mes", pa.string()))
+        return ds.dataset(caminho, format="parquet", schema=esquema, partitioning=_PARTICIONAMENTO)
+
+    def meses_arquivados(self) -> List[date]:
+        """Meses com vendas arquivadas, em ordem"""
+        caminho = self.diretorio / "vendas"
+        if not caminho.is_dir():
+            return []
+        return sorted(
+            datetime.strptime(pasta.name.split("=", 1)[1], "%Y-%m").date()
+            for pasta in caminho.glob("mes=*")
+        )
+
+    def _ids_arquivados(self, tabela: str, chave: str, mes: date) -> Set[str]:
+        """IDs de venda da tabela já gravados no arquivo do mês"""
+        dataset = self._dataset(tabela)
+        if dataset is None:
+            return set()
+        ids = dataset.to_table(columns=[chave], filter=pc.field("mes") == _rotulo_mes(mes))
+        return set(ids.column(chave).to_pylist())
+
+    def _gravar(self, db: Session, tabela: str, mes: date, consulta) -> int:
+        """
+        Grava o resultado da consulta no arquivo do mês, em lotes.
+
+        Linhas de vendas já presentes no arquivo do mês são ignoradas, de
+        modo que um arquivamento interrompido pode ser repetido sem
+        duplicar dados. O arquivo é gravado com nome temporário (ignorado
+        nas leituras) e renomeado ao final.
+        """
+        modelo, chave, _ = TABELAS_ARQUIVADAS[tabela]
+        esquema = _esquema(modelo)
+        existentes = self._ids_arquivados(tabela, chave, mes)
+
+        pasta = self.diretorio / tabela / f"mes={_rotulo_mes(mes)}"
+        pasta.mkdir(parents=True, exist_ok=True)
+        nome = f"parte-{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}.parquet"
+        temporario = pasta / f".{nome}.tmp"
+
+        escritor = None
+        total = 0
+        try:
+            resultado = db.execute(consulta, execution_options={"yield_per": self.tamanho_lote})
+            for lote in resultado.mappings().partitions():
+                linhas = [linha for linha in lote if str(linha[chave]) not in existentes]
+                if not linhas:
+                    continue
+                colunas = {nome_coluna: [_valor(linha[nome_coluna]) for linha in linhas] for nome_coluna in esquema.names}
+                if escritor is None:
+                    escritor = pq.ParquetWriter(temporario, esquema, compression="zstd")
+                escritor.write_table(pa.Table.from_pydict(colunas, schema=esquema))
+                total += len(linhas)
+        finally:
+            if escritor is not None:
+                escritor.close()
+
+        if escritor is not None:
+            os.replace(temporario, pasta / nome)
+        return total
+
+    def arquivar(self, db: Session, antes_de: date) -> Dict[str, int]:
+        """
+        Move para o arquivo as vendas fechadas dos meses anteriores ao de `antes_de`.
+
+        Cada mês é gravado nos arquivos (vendas, itens e pagamentos) e só
+        então removido do banco, em uma transação por mês. As linhas do
+        resumo diário são mantidas, então o resumo de vendas continua
+        cobrindo os meses arquivados; as chaves de idempotência dessas
+        vendas são removidas. Vendas pendentes não são arquivadas.
+
+        Returns:
+            Quantidade de linhas arquivadas por tabela
+        """
+        limite = inicio_mes(antes_de)
+        fechadas = Venda.status != StatusVenda.PENDENTE
+        totais = {tabela: 0 for tabela in TABELAS_ARQUIVADAS}
+
+        primeira = db.query(func.min(Venda.data_venda)).filter(fechadas, Venda.data_venda < limite).scalar()
+        if primeira is None:
+            return totais
+
+        mes = inicio_mes(primeira)
+        while mes < limite:
+            fim = somar_meses(mes, 1)
+            periodo = and_(fechadas, Venda.data_venda >= mes, Venda.data_venda < fim)
+            ids_vendas = select(Venda.id).where(periodo)
+
+            try:
+                for tabela, (modelo, chave, ordem) in TABELAS_ARQUIVADAS.items():
+                    consulta = select(modelo.__table__).where(
+                        periodo if modelo is Venda else and_(
+                            modelo.venda_id.in_(ids_vendas),
+                            modelo.data_venda >= mes,
+                            modelo.data_venda < fim
+                        )
+                    ).order_by(ordem)
+                    totais[tabela] += self._gravar(db, tabela, mes, consulta)
+
+                for modelo in (ChaveIdempotencia, PagamentoVenda, ItemVenda):
+                    db.execute(
+                        delete(modelo).where(modelo.venda_id.in_(ids_vendas))
+                        .execution_options(synchronize_session=False)
+                    )
+                db.execute(delete(Venda).where(periodo).execution_options(synchronize_session=False))
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                raise e
+
+            mes = fim
+
+        return totais
+
+    def _ler(self, tabela: str, filtro) -> List[Dict[str, Any]]:
+        """Linhas da tabela que atendem ao filtro, sem a coluna de partição"""
+        dataset = self._dataset(tabela)
+        if dataset is None:
+            return []
+        linhas = dataset.to_table(filter=filtro).to_pylist()
+        for linha in linhas:
+            linha.pop("mes", None)
+        return linhas
+
+    def buscar_venda(self, numero_venda: str, dia: Optional[date] = None) -> Optional[Dict[str, Any]]:
+        """
+        Busca uma venda arquivada pelo número, com itens e pagamentos.
+
+        Com `dia` (a data codificada no número), só são lidos os meses do
+        dia anterior ao seguinte; sem ele, todos os meses, ainda assim
+        pulando os row groups cujo intervalo de numero_venda não o contém.
+        """
+        filtro = pc.field("numero_venda") == numero_venda
+        if dia:
+            meses = {_rotulo_mes(inicio_mes(dia + timedelta(days=deslocamento))) for deslocamento in (-1, 0, 1)}
+            filtro = filtro & pc.field("mes").isin(sorted(meses))
+
+        dataset = self._dataset("vendas")
+        if dataset is None:
+            return None
+        encontradas = dataset.to_table(filter=filtro)
+        if encontradas.num_rows == 0:
+            return None
+
+        venda = encontradas.slice(0, 1).to_pylist()[0]
+        filtro_venda = (pc.field("mes") == venda.pop("mes")) & (pc.field("venda_id") == venda["id"])
+        venda["itens"] = self._ler("itens_venda", filtro_venda)
+        venda["pagamentos"] = self._ler("pagamentos_venda", filtro_venda)
+        return venda
+
+    def resumo_diario(self) -> Dict[tuple, List[int]]:
+        """
+        Contribuição das vendas arquivadas para o resumo diário.
+
+        Usa o mesmo formato de deltas de CRUDVenda._gravar_resumo e é
+        calculado mês a mês, lendo só as colunas necessárias.
+        """
+        deltas: Dict[tuple, List[int]] = {}
+        vendas_ds = self._dataset("vendas")
+        pagamentos_ds = self._dataset("pagamentos_venda")
+
+        def acumular(linhas, campo, forma_fixa=None):
+            for linha in linhas:
+                vendedor = linha["vendedor_id"]
+                chave = (
+                    linha["data_venda"],
+                    StatusVenda(linha["status"]),
+                    forma_fixa or linha["forma_pagamento"],
+                    uuid.UUID(vendedor) if vendedor else VendaResumoDiario.SEM_VENDEDOR
+                )
+                acumulado = deltas.setdefault(chave, [0, 0])
+                acumulado[0] += linha[f"{campo}_count"]
+                acumulado[1] += linha[f"{campo}_sum"]
+
+        for mes in self.meses_arquivados():
+            filtro = pc.field("mes") == _rotulo_mes(mes)
+            vendas = vendas_ds.to_table(
+                columns=["id", "data_venda", "status", "vendedor_id", "total_venda"], filter=filtro
+            )
+            por_venda = vendas.group_by(["data_venda", "status", "vendedor_id"]).aggregate(
+                [("total_venda", "count"), ("total_venda", "sum")]
+            )
+            acumular(por_venda.to_pylist(), "total_venda", VendaResumoDiario.FORMA_TOTAL)
+
+            if pagamentos_ds is None:
+                continue
+            pagamentos = pagamentos_ds.to_table(
+                columns=["venda_id", "forma_pagamento", "valor_pago"], filter=filtro
+            ).join(vendas, keys="venda_id", right_keys="id")
+            por_forma = pagamentos.group_by(["data_venda", "status", "forma_pagamento", "vendedor_id"]).aggregate(
+                [("valor_pago", "count"), ("valor_pago", "sum")]
+            )
+            acumular(por_forma.to_pylist(), "valor_pago")
+
+        return deltas
+
+# Instância global do arquivo
+arquivo_vendas = ArquivoVendas()
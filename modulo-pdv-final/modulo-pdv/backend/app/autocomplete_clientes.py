@@ -0,0 +1,315 @@
+"""
+Índice em memória para o autocomplete de clientes no PDV.
+
+Os nomes (sem acentos, em minúsculas) e os dígitos do CPF/CNPJ ficam em
+listas ordenadas de chaves "texto\\0id"; cada sugestão é uma busca binária
+pelo prefixo digitado, sem acessar o banco. O índice é carregado na
+inicialização da aplicação. As alterações feitas por este processo entram
+no índice no commit (eventos do ORM); as dos demais processos, pela
+consulta periódica dos clientes criados ou atualizados desde a última
+leitura. Uma recarga completa, menos frequente, retira os clientes
+excluídos por outros processos.
+"""
+
+from bisect import bisect_left, insort
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event, or_
+from sqlalchemy.orm import Session, object_session
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import os
+import re
+import threading
+import time
+import uuid
+
+from app.busca_clientes import palavras
+from app.models import Cliente, StatusCliente
+
+# Intervalo (segundos) da consulta de alterações e da recarga completa
+AUTOCOMPLETE_CLIENTES_INTERVALO = float(os.getenv("AUTOCOMPLETE_CLIENTES_INTERVALO", "5"))
+AUTOCOMPLETE_CLIENTES_RECARGA = float(os.getenv("AUTOCOMPLETE_CLIENTES_RECARGA", "3600"))
+
+# Relida a cada consulta de alterações, para não perder transações gravadas com atraso
+MARGEM_ALTERACOES = timedelta(seconds=60)
+
+# Acima desta quantidade de alterações, as listas são remontadas em vez de atualizadas uma a uma
+LIMITE_INCREMENTAL = 500
+
+# Listas de chaves: nome completo (prioridade), cada palavra do nome e documento
+LISTAS = ("nomes", "palavras", "documentos")
+
+_SEPARADOR = "\0"
+
+# Chave de Session.info com as alterações de clientes ainda não confirmadas
+_ALTERACOES = "autocomplete_clientes"
+
+# Cliente no índice: (nome, cpf_cnpj); None para clientes fora do índice (inativos ou excluídos)
+Entrada = Optional[Tuple[str, Optional[str]]]
+
+def _digitos(texto: Optional[str]) -> str:
+    """Apenas os dígitos do texto (CPF/CNPJ sem pontuação)"""
+    return re.sub(r"\D", "", texto or "")
+
+def _entrada(nome: Optional[str], cpf_cnpj: Optional[str], status: Optional[StatusCliente]) -> Entrada:
+    """Entrada do cliente no índice; clientes inativos não são sugeridos"""
+    if nome is None or status == StatusCliente.INATIVO:
+        return None
+    return nome, cpf_cnpj
+
+class IndiceAutocompleteClientes:
+    """Índice de prefixos (listas ordenadas) dos nomes e documentos dos clientes"""
+
+    def __init__(self, recarga: float = AUTOCOMPLETE_CLIENTES_RECARGA):
+        self.recarga = recarga
+        self._lock = threading.Lock()
+        self._clientes: Dict[uuid.UUID, Tuple[str, Optional[str]]] = {}
+        self._listas: Dict[str, List[str]] = {lista: [] for lista in LISTAS}
+        self._marca: Optional[datetime] = None
+        self._carregado_em: Optional[float] = None
+        self._carregando = False
+        self._durante_carga: List[Tuple[uuid.UUID, Entrada]] = []
+
+    @property
+    def carregado(self) -> bool:
+        """Indica se o índice já foi carregado do banco"""
+        return self._carregado_em is not None
+
+    def _chaves(self, cliente_id: uuid.UUID, nome: str, cpf_cnpj: Optional[str]) -> Iterator[Tuple[str, str]]:
+        """Chaves (lista, chave) de um cliente"""
+        sufixo = _SEPARADOR + cliente_id.hex
+        palavras_nome = palavras(nome)
+        if palavras_nome:
+            yield "nomes", " ".join(palavras_nome) + sufixo
+        for palavra in set(palavras_nome):
+            yield "palavras", palavra + sufixo
+        documento = _digitos(cpf_cnpj)
+        if documento:
+            yield "documentos", documento + sufixo
+
+    def _montar(self, clientes: Dict[uuid.UUID, Tuple[str, Optional[str]]]) -> Dict[str, List[str]]:
+        """Listas ordenadas de chaves de todos os clientes"""
+        listas = {lista: [] for lista in LISTAS}
+        for cliente_id, (nome, cpf_cnpj) in clientes.items():
+            for lista, chave in self._chaves(cliente_id, nome, cpf_cnpj):
+                listas[lista].append(chave)
+        for chaves in listas.values():
+            chaves.sort()
+        return listas
+
+    def _consulta(self, db: Session):
+        """Colunas lidas do banco para o índice"""
+        return db.query(
+            Cliente.id, Cliente.nome, Cliente.cpf_cnpj, Cliente.status,
+            Cliente.data_criacao, Cliente.data_atualizacao
+        )
+
+    def carregar(self, db: Session) -> int:
+        """
+        Carrega (ou recarrega) o índice com todos os clientes do banco.
+
+        As alterações confirmadas durante a leitura são reaplicadas sobre a
+        carga, para não serem perdidas na troca das listas.
+
+        Returns:
+            Quantidade de clientes no índice
+        """
+        with self._lock:
+            self._carregando = True
+            self._durante_carga = []
+
+        try:
+            clientes = {}
+            marca = None
+            linhas = self._consulta(db).execution_options(stream_results=True).yield_per(10000)
+            for linha in linhas:
+                alteracao = linha.data_atualizacao or linha.data_criacao
+                if marca is None or (alteracao and alteracao > marca):
+                    marca = alteracao
+                entrada = _entrada(linha.nome, linha.cpf_cnpj, linha.status)
+                if entrada:
+                    clientes[linha.id] = entrada
+            listas = self._montar(clientes)
+        except Exception:
+            with self._lock:
+                self._carregando = False
+            raise
+
+        with self._lock:
+            self._clientes = clientes
+            self._listas = listas
+            self._marca = marca
+            self._carregado_em = time.monotonic()
+            self._carregando = False
+            pendentes, self._durante_carga = self._durante_carga, []
+        self.aplicar(pendentes)
+        return len(clientes)
+
+    def atualizar(self, db: Session) -> int:
+        """
+        Aplica os clientes criados ou atualizados desde a última leitura.
+
+        Faz a recarga completa se o índice ainda não foi carregado ou se a
+        última carga tem mais de `recarga` segundos.
+
+        Returns:
+            Quantidade de clientes lidos do banco
+        """
+        with self._lock:
+            recarregar = not self.carregado or time.monotonic() - self._carregado_em >= self.recarga
+            marca = self._marca
+        if recarregar:
+            return self.carregar(db)
+
+        consulta = self._consulta(db)
+        if marca is not None:
+            desde = marca - MARGEM_ALTERACOES
+            consulta = consulta.filter(or_(Cliente.data_criacao >= desde, Cliente.data_atualizacao >= desde))
+
+        alteracoes = []
+        for linha in consulta:
+            alteracao = linha.data_atualizacao or linha.data_criacao
+            if marca is None or (alteracao and alteracao > marca):
+                marca = alteracao
+            alteracoes.append((linha.id, _entrada(linha.nome, linha.cpf_cnpj, linha.status)))
+
+        self.aplicar(alteracoes)
+        with self._lock:
+            if marca is not None and (self._marca is None or marca > self._marca):
+                self._marca = marca
+        return len(alteracoes)
+
+    def aplicar(self, alteracoes: List[Tuple[uuid.UUID, Entrada]]) -> None:
+        """
+        Atualiza o índice com o estado atual de cada cliente alterado.
+
+        Cada alteração é (id, (nome, cpf_cnpj)), ou (id, None) para retirar
+        o cliente. Poucas alterações são inseridas nas listas por busca
+        binária; muitas de uma vez remontam as listas.
+        """
+        with self._lock:
+            if self._carregando:
+                self._durante_carga.extend(alteracoes)
+            if not self.carregado:
+                return
+
+            mudancas = [
+                (cliente_id, entrada) for cliente_id, entrada in alteracoes
+                if self._clientes.get(cliente_id) != entrada
+            ]
+            if len(mudancas) > LIMITE_INCREMENTAL:
+                for cliente_id, entrada in mudancas:
+                    self._clientes.pop(cliente_id, None)
+                    if entrada:
+                        self._clientes[cliente_id] = entrada
+                self._listas = self._montar(self._clientes)
+                return
+
+            for cliente_id, entrada in mudancas:
+                anterior = self._clientes.pop(cliente_id, None)
+                if anterior:
+                    for lista, chave in self._chaves(cliente_id, *anterior):
+                        chaves = self._listas[lista]
+                        posicao = bisect_left(chaves, chave)
+                        if posicao < len(chaves) and chaves[posicao] == chave:
+                            del chaves[posicao]
+                if entrada:
+                    self._clientes[cliente_id] = entrada
+                    for lista, chave in self._chaves(cliente_id, *entrada):
+                        insort(self._listas[lista], chave)
+
+    def _prefixo(self, lista: str, prefixo: str) -> Iterator[uuid.UUID]:
+        """IDs dos clientes com chave iniciada pelo prefixo, em ordem alfabética da chave"""
+        chaves = self._listas[lista]
+        posicao = bisect_left(chaves, prefixo)
+        while posicao < len(chaves) and chaves[posicao].startswith(prefixo):
+            yield uuid.UUID(hex=chaves[posicao].rsplit(_SEPARADOR, 1)[1])
+            posicao += 1
+
+    def sugerir(self, termo: str, limite: int = 10) -> List[dict]:
+        """
+        Sugestões de clientes para o termo digitado.
+
+        Primeiro os nomes iniciados pelo termo; depois os nomes com uma
+        palavra iniciada por cada palavra do termo ("sil jo" sugere
+        "João Silva"); se o termo só tiver dígitos e pontuação, os
+        clientes cujo CPF/CNPJ começa por eles.
+        """
+        termos = palavras(termo)
+        documento = _digitos(termo)
+        encontrados: Dict[uuid.UUID, None] = {}
+
+        with self._lock:
+            if termos:
+                for cliente_id in self._prefixo("nomes", " ".join(termos)):
+                    if len(encontrados) >= limite:
+                        break
+                    encontrados[cliente_id] = None
+
+                for cliente_id in self._prefixo("palavras", termos[0]):
+                    if len(encontrados) >= limite:
+                        break
+                    if cliente_id in encontrados:
+                        continue
+                    palavras_nome = palavras(self._clientes[cliente_id][0])
+                    if all(any(palavra.startswith(t) for palavra in palavras_nome) for t in termos[1:]):
+                        encontrados[cliente_id] = None
+
+            if documento and documento == "".join(termos):
+                for cliente_id in self._prefixo("documentos", documento):
+                    if len(encontrados) >= limite:
+                        break
+                    encontrados[cliente_id] = None
+
+            return [
+                {"id": cliente_id, "nome": self._clientes[cliente_id][0], "cpf_cnpj": self._clientes[cliente_id][1]}
+                for cliente_id in encontrados
+            ]
+
+    async def manter_atualizado(
+        self,
+        fabrica_sessao: Callable[[], Session],
+        intervalo: float = AUTOCOMPLETE_CLIENTES_INTERVALO
+    ) -> None:
+        """Consulta as alterações de clientes a cada `intervalo` segundos (tarefa da aplicação)"""
+        def atualizar():
+            with fabrica_sessao() as db:
+                return self.atualizar(db)
+
+        while True:
+            await asyncio.sleep(intervalo)
+            try:
+                await run_in_threadpool(atualizar)
+            except Exception as e:
+                print(f"⚠️  Erro ao atualizar o autocomplete de clientes: {e}")
+
+# Instância global do índice
+indice_autocomplete_clientes = IndiceAutocompleteClientes()
+
+def _alteracoes_da_sessao(target: Cliente) -> list:
+    """Alterações de clientes da sessão do objeto, aplicadas no commit"""
+    return object_session(target).info.setdefault(_ALTERACOES, [])
+
+@event.listens_for(Cliente, "after_insert")
+@event.listens_for(Cliente, "after_update")
+def _registrar_cliente_gravado(mapper, connection, target):
+    """Guarda o estado do cliente gravado para o índice"""
+    _alteracoes_da_sessao(target).append((target.id, _entrada(target.nome, target.cpf_cnpj, target.status)))
+
+@event.listens_for(Cliente, "after_delete")
+def _registrar_cliente_removido(mapper, connection, target):
+    """Guarda a remoção do cliente para o índice"""
+    _alteracoes_da_sessao(target).append((target.id, None))
+
+@event.listens_for(Session, "after_commit")
+def _aplicar_alteracoes_confirmadas(sessao):
+    """Leva ao índice as alterações de clientes confirmadas"""
+    alteracoes = sessao.info.pop(_ALTERACOES, None)
+    if alteracoes:
+        indice_autocomplete_clientes.aplicar(alteracoes)
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_alteracoes(sessao):
+    """Descarta as alterações de clientes desfeitas"""
+    sessao.info.pop(_ALTERACOES, None)
@@ -0,0 +1,234 @@
+"""
+Busca de clientes sem distinção de acentos e de maiúsculas/minúsculas.
+
+No PostgreSQL, índices GIN de trigramas (pg_trgm) sobre
+normalizar_busca(coluna) = unaccent(lower(coluna)) atendem os filtros
+"contém" (LIKE '%termo%') sem varrer a tabela, e a busca é ordenada pela
+similaridade do nome. No SQLite, a tabela FTS5 clientes_busca (conteúdo
+externo, mantida por triggers) indexa os mesmos campos com o tokenizador
+unicode61 sem acentos: o índice casa prefixos das palavras, e a busca e
+os filtros "contém" somam essas palavras ao LIKE '%termo%' de sempre.
+
+O índice é criado junto com a tabela de clientes (create_all), pela
+migração da busca e, em bancos sem ele, na inicialização da aplicação.
+"""
+
+from sqlalchemy import event, func, literal_column, or_, select, table, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql.elements import ColumnElement
+from typing import List
+import re
+import unicodedata
+
+from app.models import Cliente
+
+# Tabela FTS5 de busca (SQLite)
+TABELA_BUSCA = "clientes_busca"
+
+# Campos de texto indexados para a busca
+CAMPOS_BUSCA = ("nome", "email", "cpf_cnpj", "cidade")
+
+DDL_POSTGRESQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() é STABLE; o invólucro IMMUTABLE permite usá-la em índices
+    """
+    CREATE OR REPLACE FUNCTION normalizar_busca(texto text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, lower(texto)) $$
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_clientes_busca_nome ON clientes USING gin (normalizar_busca(nome) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_clientes_busca_email ON clientes USING gin (normalizar_busca(email) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_clientes_busca_cidade ON clientes USING gin (normalizar_busca(cidade) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_clientes_busca_cpf_cnpj ON clientes USING gin (cpf_cnpj gin_trgm_ops)",
+]
+
+REMOVER_SQLITE = [
+    "DROP TRIGGER IF EXISTS clientes_busca_ai",
+    "DROP TRIGGER IF EXISTS clientes_busca_ad",
+    "DROP TRIGGER IF EXISTS clientes_busca_au",
+    f"DROP TABLE IF EXISTS {TABELA_BUSCA}",
+]
+
+# Recria o índice do zero: entradas antigas apontariam para rowids reutilizados
+DDL_SQLITE = REMOVER_SQLITE + [
+    f"""
+    CREATE VIRTUAL TABLE {TABELA_BUSCA} USING fts5(
+        nome, email, cpf_cnpj, cidade,
+        content='clientes', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER clientes_busca_ai AFTER INSERT ON clientes BEGIN
+        INSERT INTO {TABELA_BUSCA}(rowid, nome, email, cpf_cnpj, cidade)
+        VALUES (new.rowid, new.nome, new.email, new.cpf_cnpj, new.cidade);
+    END
+    """,
+    f"""
+    CREATE TRIGGER clientes_busca_ad AFTER DELETE ON clientes BEGIN
+        INSERT INTO {TABELA_BUSCA}({TABELA_BUSCA}, rowid, nome, email, cpf_cnpj, cidade)
+        VALUES ('delete', old.rowid, old.nome, old.email, old.cpf_cnpj, old.cidade);
+    END
+    """,
+    f"""
+    CREATE TRIGGER clientes_busca_au AFTER UPDATE OF nome, email, cpf_cnpj, cidade ON clientes BEGIN
+        INSERT INTO {TABELA_BUSCA}({TABELA_BUSCA}, rowid, nome, email, cpf_cnpj, cidade)
+        VALUES ('delete', old.rowid, old.nome, old.email, old.cpf_cnpj, old.cidade);
+        INSERT INTO {TABELA_BUSCA}(rowid, nome, email, cpf_cnpj, cidade)
+        VALUES (new.rowid, new.nome, new.email, new.cpf_cnpj, new.cidade);
+    END
+    """,
+    # Indexa os clientes já cadastrados
+    f"INSERT INTO {TABELA_BUSCA}({TABELA_BUSCA}) VALUES ('rebuild')",
+]
+
+def normalizar(texto: str) -> str:
+    """Texto em minúsculas e sem acentos: "João" -> "joao" """
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(caractere for caractere in decomposto if not unicodedata.combining(caractere)).lower().strip()
+
+def palavras(termo: str) -> List[str]:
+    """Palavras do termo normalizado, separadas como no tokenizador unicode61"""
+    return re.findall(r"[^\W_]+", normalizar(termo))
+
+def _consulta_fts(termo: str, campo: str = None) -> str:
+    """Consulta FTS5 com todas as palavras do termo como prefixo, opcionalmente restrita a um campo"""
+    consulta = " AND ".join(f'"{palavra}"*' for palavra in palavras(termo))
+    return f"{{{campo}}} : ({consulta})" if campo else consulta
+
+def _escapar_like(termo: str) -> str:
+    """Escapa os curingas do LIKE"""
+    return termo.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _correspondencias_fts(consulta: str):
+    """Subconsulta (rowid, rank) das linhas da tabela FTS5 que casam com a consulta"""
+    return select(
+        literal_column("rowid").label("rowid"), literal_column("rank").label("rank")
+    ).select_from(table(TABELA_BUSCA)).where(literal_column(TABELA_BUSCA).op("MATCH")(consulta))
+
+def criar_indice_busca(conexao: Connection) -> None:
+    """Cria o índice de busca de clientes do dialeto (idempotente)"""
+    comandos = {"postgresql": DDL_POSTGRESQL, "sqlite": DDL_SQLITE}.get(conexao.dialect.name, [])
+    for comando in comandos:
+        conexao.execute(text(comando))
+
+def remover_indice_busca(conexao: Connection) -> None:
+    """Remove o índice de busca de clientes do dialeto"""
+    if conexao.dialect.name == "postgresql":
+        for campo in CAMPOS_BUSCA:
+            conexao.execute(text(f"DROP INDEX IF EXISTS idx_clientes_busca_{campo}"))
+        conexao.execute(text("DROP FUNCTION IF EXISTS normalizar_busca(text)"))
+    elif conexao.dialect.name == "sqlite":
+        for comando in REMOVER_SQLITE:
+            conexao.execute(text(comando))
+
+def indice_busca_existe(conexao: Connection) -> bool:
+    """Indica se o índice de busca de clientes já foi criado neste banco"""
+    if conexao.dialect.name == "postgresql":
+        return conexao.execute(text("SELECT to_regprocedure('normalizar_busca(text)') IS NOT NULL")).scalar()
+    if conexao.dialect.name == "sqlite":
+        return conexao.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = :nome"), {"nome": TABELA_BUSCA}
+        ).scalar() is not None
+    return True
+
+def garantir_indice_busca(conexao: Connection) -> bool:
+    """
+    Cria o índice de busca em bancos com a tabela de clientes anterior a ele.
+
+    Returns:
+        True se o índice foi criado agora
+    """
+    if indice_busca_existe(conexao):
+        return False
+    criar_indice_busca(conexao)
+    return True
+
+def filtro_contem(db: Session, campo: str, termo: str) -> ColumnElement:
+    """
+    Condição "campo contém termo", sem acentos nem caixa, atendida pelo índice.
+
+    No SQLite, o índice FTS5 só casa prefixos de palavras ("silva" não
+    encontra "Dasilva"): a condição é o ILIKE '%termo%' (que varre a
+    tabela) ou as palavras do termo como prefixo, sem acentos.
+    """
+    dialeto = db.get_bind().dialect.name
+    coluna = getattr(Cliente, campo)
+    if dialeto == "postgresql":
+        padrao = f"%{_escapar_like(normalizar(termo))}%"
+        if campo == "cpf_cnpj":
+            return coluna.like(padrao, escape="\\")
+        return func.normalizar_busca(coluna).like(padrao, escape="\\")
+    if dialeto == "sqlite":
+        contem = coluna.ilike(f"%{_escapar_like(termo)}%", escape="\\")
+        if not palavras(termo):
+            return contem
+        return or_(
+            contem,
+            literal_column("clientes.rowid").in_(
+                _correspondencias_fts(_consulta_fts(termo, campo)).with_only_columns(literal_column("rowid"))
+            )
+        )
+    return coluna.ilike(f"%{termo}%")
+
+def buscar(db: Session, termo: str, limite: int = 10) -> List[Cliente]:
+    """
+    Busca clientes por nome, email ou CPF/CNPJ, dos mais relevantes aos menos.
+
+    No PostgreSQL, além dos que contêm o termo, encontra nomes parecidos
+    (operador % do pg_trgm) e ordena pela similaridade do nome; no SQLite,
+    ordena pela relevância do FTS5, seguida dos que só contêm o termo no
+    meio de uma palavra.
+    """
+    dialeto = db.get_bind().dialect.name
+    consulta: Query = db.query(Cliente)
+
+    if dialeto == "postgresql":
+        termo_normalizado = normalizar(termo)
+        padrao = f"%{_escapar_like(termo_normalizado)}%"
+        nome = func.normalizar_busca(Cliente.nome)
+        consulta = consulta.filter(
+            or_(
+                nome.like(padrao, escape="\\"),
+                nome.op("%")(termo_normalizado),
+                func.normalizar_busca(Cliente.email).like(padrao, escape="\\"),
+                Cliente.cpf_cnpj.like(padrao, escape="\\")
+            )
+        ).order_by(func.similarity(nome, termo_normalizado).desc(), Cliente.nome)
+    elif dialeto == "sqlite" and palavras(termo):
+        # O FTS5 só casa prefixos de palavras: os trechos no meio de um
+        # nome, email ou CPF/CNPJ vêm do ILIKE, depois dos casados pelo índice
+        padrao = f"%{_escapar_like(termo)}%"
+        correspondencias = _correspondencias_fts(_consulta_fts(termo)).subquery()
+        consulta = consulta.outerjoin(
+            correspondencias, correspondencias.c.rowid == literal_column("clientes.rowid")
+        ).filter(
+            or_(
+                correspondencias.c.rowid.isnot(None),
+                Cliente.nome.ilike(padrao, escape="\\"),
+                Cliente.email.ilike(padrao, escape="\\"),
+                Cliente.cpf_cnpj.ilike(padrao, escape="\\")
+            )
+        ).order_by(correspondencias.c.rank.is_(None), correspondencias.c.rank, Cliente.nome)
+    else:
+        consulta = consulta.filter(
+            or_(
+                Cliente.nome.ilike(f"%{termo}%"),
+                Cliente.email.ilike(f"%{termo}%"),
+                Cliente.cpf_cnpj.ilike(f"%{termo}%")
+            )
+        ).order_by(Cliente.nome)
+
+    return consulta.limit(limite).all()
+
+@event.listens_for(Cliente.__table__, "after_create")
+def _criar_indice_com_tabela(tabela, conexao, **kwargs):
+    """Cria o índice de busca junto com a tabela de clientes"""
+    criar_indice_busca(conexao)
+
+@event.listens_for(Cliente.__table__, "after_drop")
+def _remover_indice_com_tabela(tabela, conexao, **kwargs):
+    """Remove o índice de busca junto com a tabela de clientes"""
+    remover_indice_busca(conexao)
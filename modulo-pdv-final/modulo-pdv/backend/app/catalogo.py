@@ -0,0 +1,164 @@
+"""
+Consulta ao catálogo de produtos com cache local para o snapshot dos itens vendidos.
+
+O catálogo é mantido pelo módulo de produtos, fora deste processo. O cache
+acompanha as alterações consultando, a cada CATALOGO_VERIFICACAO_INTERVALO
+segundos, os produtos com data_atualizacao recente; CATALOGO_CACHE_TTL
+limita a defasagem de qualquer outra alteração (por exemplo, uma remoção).
+"""
+
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from sqlalchemy import func, inspect
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, Optional
+import logging
+import os
+import threading
+import time
+import uuid
+
+from app.database import PRODUTOS_SCHEMA
+from app.models import Produto
+
+# Tempo de vida (segundos) e capacidade do cache de produtos
+CATALOGO_CACHE_TTL = float(os.getenv("CATALOGO_CACHE_TTL", "300"))
+CATALOGO_CACHE_TAMANHO = int(os.getenv("CATALOGO_CACHE_TAMANHO", "10000"))
+
+# Intervalo (segundos) entre as consultas de produtos alterados no catálogo
+CATALOGO_VERIFICACAO_INTERVALO = float(os.getenv("CATALOGO_VERIFICACAO_INTERVALO", "30"))
+
+logger = logging.getLogger(__name__)
+
+class CatalogoProdutos:
+    """Snapshot de produtos (nome, código de barras, SKU) com cache TTL por processo"""
+
+    def __init__(
+        self,
+        ttl: float = CATALOGO_CACHE_TTL,
+        tamanho_maximo: int = CATALOGO_CACHE_TAMANHO,
+        intervalo_verificacao: float = CATALOGO_VERIFICACAO_INTERVALO
+    ):
+        self.ttl = ttl
+        self.tamanho_maximo = tamanho_maximo
+        self.intervalo_verificacao = intervalo_verificacao
+        self._cache: "OrderedDict[uuid.UUID, tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disponivel = False
+        self._proxima_consulta_tabela = 0.0
+        self._proxima_verificacao = 0.0
+        self._ultima_alteracao: Optional[datetime] = None
+        self._alteracoes_iniciadas = False
+
+    def _tabela_disponivel(self, db: Session) -> bool:
+        """
+        Indica se a tabela do catálogo está acessível neste banco.
+
+        Sem ela (catálogo em outro banco, arquivo do SQLite ausente), a venda
+        segue com o snapshot genérico dos itens e um aviso é registrado; a
+        tabela é procurada de novo a cada `ttl` segundos.
+        """
+        if self._disponivel:
+            return True
+        agora = time.monotonic()
+        if agora < self._proxima_consulta_tabela:
+            return False
+        try:
+            self._disponivel = inspect(db.connection()).has_table(Produto.__tablename__, schema=PRODUTOS_SCHEMA)
+        except DBAPIError:
+            # SQLite sem o banco do catálogo anexado
+            self._disponivel = False
+        if not self._disponivel:
+            self._proxima_consulta_tabela = agora + self.ttl
+            logger.warning(
+                "Catálogo de produtos não encontrado (%s.%s): itens vendidos sem nome, código de barras e SKU",
+                PRODUTOS_SCHEMA, Produto.__tablename__
+            )
+        return self._disponivel
+
+    def verificar_alteracoes(self, db: Session) -> int:
+        """
+        Descarta do cache os produtos alterados no catálogo desde a última verificação.
+
+        Uma consulta lê os produtos com data_atualizacao a partir da última
+        vista (com um segundo de folga, pela precisão do relógio do banco).
+        A primeira verificação só registra o ponto de partida.
+
+        Returns:
+            Quantidade de produtos descartados do cache
+        """
+        if not self._alteracoes_iniciadas:
+            self._ultima_alteracao = db.query(func.max(Produto.data_atualizacao)).scalar()
+            self._alteracoes_iniciadas = True
+            return 0
+
+        consulta = db.query(Produto.id, Produto.data_atualizacao)
+        if self._ultima_alteracao is None:
+            consulta = consulta.filter(Produto.data_atualizacao.isnot(None))
+        else:
+            consulta = consulta.filter(Produto.data_atualizacao >= self._ultima_alteracao - timedelta(seconds=1))
+        alterados = consulta.all()
+        if alterados:
+            self._ultima_alteracao = max(data_atualizacao for _, data_atualizacao in alterados)
+            self.invalidar([produto_id for produto_id, _ in alterados])
+        return len(alterados)
+
+    def _snapshot(self, produto: Produto) -> dict:
+        """Campos do produto gravados no item da venda"""
+        return {
+            "nome_produto": produto.nome,
+            "codigo_barras": produto.codigo_barras,
+            "sku": produto.sku
+        }
+
+    def buscar(self, db: Session, produto_ids: Iterable[uuid.UUID]) -> Dict[uuid.UUID, dict]:
+        """
+        Retorna o snapshot de cada produto encontrado, por ID.
+
+        Os produtos válidos no cache não vão ao banco; os demais são lidos
+        em uma única consulta (WHERE id IN (...)). Produtos inexistentes
+        não entram no resultado nem no cache, assim como todos os produtos
+        quando a tabela do catálogo não está acessível.
+        """
+        agora = time.monotonic()
+        encontrados = {}
+        faltantes = set()
+
+        if agora >= self._proxima_verificacao and self._tabela_disponivel(db):
+            self._proxima_verificacao = agora + self.intervalo_verificacao
+            self.verificar_alteracoes(db)
+
+        with self._lock:
+            for produto_id in set(produto_ids):
+                entrada = self._cache.get(produto_id)
+                if entrada and entrada[0] > agora:
+                    self._cache.move_to_end(produto_id)
+                    encontrados[produto_id] = entrada[1]
+                else:
+                    faltantes.add(produto_id)
+
+        if faltantes and self._tabela_disponivel(db):
+            produtos = db.query(Produto).filter(Produto.id.in_(faltantes)).all()
+            with self._lock:
+                for produto in produtos:
+                    snapshot = self._snapshot(produto)
+                    encontrados[produto.id] = snapshot
+                    self._cache[produto.id] = (agora + self.ttl, snapshot)
+                    self._cache.move_to_end(produto.id)
+                while len(self._cache) > self.tamanho_maximo:
+                    self._cache.popitem(last=False)
+
+        return encontrados
+
+    def invalidar(self, produto_ids: Optional[Iterable[uuid.UUID]] = None) -> None:
+        """Remove do cache os produtos informados (ou todos)"""
+        with self._lock:
+            if produto_ids is None:
+                self._cache.clear()
+                return
+            for produto_id in produto_ids:
+                self._cache.pop(produto_id, None)
+
+# Instância global do catálogo
+catalogo_produtos = CatalogoProdutos()
@@ -0,0 +1,273 @@
+"""
+Conciliação dos pagamentos com cartão/PIX com o extrato da adquirente.
+
+O extrato (CSV) é lido em lotes. Cada lote vira uma tabela hash em
+memória indexada por numero_transacao; os pagamentos do lote são buscados
+com uma única consulta pelo índice de pagamentos_venda.numero_transacao
+(IN com as chaves do lote), e a junção é feita em memória. Assim o custo
+é proporcional ao tamanho do extrato, não ao da tabela de pagamentos.
+"""
+
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+import csv
+
+from app.models import FormaPagamento, PagamentoVenda, StatusVenda, Venda
+
+# Formas de pagamento que aparecem no extrato da adquirente
+FORMAS_ELETRONICAS = (FormaPagamento.CARTAO_CREDITO, FormaPagamento.CARTAO_DEBITO, FormaPagamento.PIX)
+
+# Situações de cada registro da conciliação
+CONCILIADO = "conciliado"
+DIVERGENTE = "divergente"
+NAO_ENCONTRADO = "nao_encontrado"
+SEM_EXTRATO = "sem_extrato"
+INVALIDO = "invalido"
+
+# Colunas do registro de conciliação (relatório CSV)
+COLUNAS_CONCILIACAO = [
+    "situacao", "numero_transacao", "linha_extrato", "valor_extrato", "valor_pdv", "diferenca",
+    "vendas", "forma_pagamento", "data_venda", "numero_autorizacao", "motivo"
+]
+
+def valor_em_centavos(texto: str) -> int:
+    """
+    Converte o valor do extrato (em reais) para centavos.
+
+    Aceita "1234.56", "1234,56" e "1.234,56".
+    """
+    texto = texto.strip().replace("R$", "").replace(" ", "")
+    if "," in texto:
+        texto = texto.replace(".", "").replace(",", ".")
+    try:
+        valor = Decimal(texto)
+    except InvalidOperation:
+        raise ValueError(f"Valor inválido: {texto!r}")
+    centavos = valor * 100
+    if centavos != centavos.to_integral_value():
+        raise ValueError(f"Valor com mais de duas casas decimais: {texto!r}")
+    return int(centavos)
+
+def ler_extrato(arquivo: TextIO) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """
+    Lê o CSV do extrato, linha a linha, com o número da linha no arquivo.
+
+    O separador (vírgula ou ponto e vírgula) é detectado pelo cabeçalho,
+    e os nomes das colunas são normalizados para minúsculas. Colunas
+    obrigatórias: numero_transacao e valor (em reais); opcionais:
+    numero_autorizacao e data.
+    """
+    cabecalho = arquivo.readline()
+    separador = ";" if cabecalho.count(";") > cabecalho.count(",") else ","
+    colunas = [coluna.strip().lower() for coluna in next(csv.reader([cabecalho], delimiter=separador))]
+    faltando = {"numero_transacao", "valor"} - set(colunas)
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes no extrato: {', '.join(sorted(faltando))}")
+
+    for numero_linha, valores in enumerate(csv.reader(arquivo, delimiter=separador), start=2):
+        if not any(valor.strip() for valor in valores):
+            continue
+        yield numero_linha, dict(zip(colunas, (valor.strip() for valor in valores)))
+
+class ConciliadorPagamentos:
+    """Conciliação do extrato da adquirente com pagamentos_venda"""
+
+    def __init__(self, tamanho_lote: int = 2000):
+        self.tamanho_lote = tamanho_lote
+
+    def _lotes(self, linhas: Iterable[Tuple[int, Dict[str, str]]]) -> Iterator[List[Tuple[int, Dict[str, str]]]]:
+        """Agrupa as linhas do extrato em lotes de `tamanho_lote`"""
+        lote = []
+        for linha in linhas:
+            lote.append(linha)
+            if len(lote) == self.tamanho_lote:
+                yield lote
+                lote = []
+        if lote:
+            yield lote
+
+    def _pagamentos(self, db: Session, numeros: List[str]) -> Dict[str, List[Any]]:
+        """Pagamentos com os números de transação do lote, agrupados por número (uma consulta)"""
+        linhas = db.query(
+            PagamentoVenda.numero_transacao, PagamentoVenda.valor_pago, PagamentoVenda.forma_pagamento,
+            PagamentoVenda.numero_autorizacao, PagamentoVenda.data_venda, Venda.numero_venda, Venda.status
+        ).join(
+            Venda, and_(Venda.id == PagamentoVenda.venda_id, Venda.data_venda == PagamentoVenda.data_venda)
+        ).filter(PagamentoVenda.numero_transacao.in_(numeros))
+
+        por_numero: Dict[str, List[Any]] = {}
+        for linha in linhas:
+            por_numero.setdefault(linha.numero_transacao, []).append(linha)
+        return por_numero
+
+    def _registro(self, situacao: str, numero_transacao: Optional[str], **campos) -> Dict[str, Any]:
+        """Registro da conciliação com todas as colunas do relatório"""
+        registro = {coluna: None for coluna in COLUNAS_CONCILIACAO}
+        registro.update(situacao=situacao, numero_transacao=numero_transacao, **campos)
+        return registro
+
+    def _comparar(self, numero: str, linha_extrato: int, extrato: Dict[str, Any], pagamentos: List[Any]) -> Dict[str, Any]:
+        """Classifica uma transação do extrato contra os pagamentos do PDV com o mesmo número"""
+        if not pagamentos:
+            return self._registro(
+                NAO_ENCONTRADO, numero, linha_extrato=linha_extrato, valor_extrato=extrato["valor"],
+                numero_autorizacao=extrato["numero_autorizacao"], motivo="Transação não encontrada no PDV"
+            )
+
+        validos = [pagamento for pagamento in pagamentos if pagamento.status == StatusVenda.CONCLUIDA]
+        valor_pdv = sum(pagamento.valor_pago for pagamento in validos)
+        referencia = (validos or pagamentos)[0]
+        campos = dict(
+            linha_extrato=linha_extrato,
+            valor_extrato=extrato["valor"],
+            valor_pdv=valor_pdv,
+            diferenca=extrato["valor"] - valor_pdv,
+            vendas=",".join(sorted({pagamento.numero_venda for pagamento in pagamentos})),
+            forma_pagamento=referencia.forma_pagamento.value,
+            data_venda=referencia.data_venda,
+            numero_autorizacao=extrato["numero_autorizacao"] or referencia.numero_autorizacao
+        )
+
+        if not validos:
+            return self._registro(DIVERGENTE, numero, motivo="Venda não concluída no PDV", **campos)
+        if valor_pdv != extrato["valor"]:
+            return self._registro(DIVERGENTE, numero, motivo="Valor divergente", **campos)
+        return self._registro(CONCILIADO, numero, **campos)
+
+    def _sem_extrato(
+        self, db: Session, vistos: Set[str], data_inicio: date, data_fim: date
+    ) -> Iterator[Dict[str, Any]]:
+        """Pagamentos eletrônicos concluídos do período que não constam do extrato"""
+        consulta = db.query(
+            PagamentoVenda.numero_transacao, PagamentoVenda.valor_pago, PagamentoVenda.forma_pagamento,
+            PagamentoVenda.numero_autorizacao, PagamentoVenda.data_venda, Venda.numero_venda
+        ).join(
+            Venda, and_(Venda.id == PagamentoVenda.venda_id, Venda.data_venda == PagamentoVenda.data_venda)
+        ).filter(
+            PagamentoVenda.data_venda >= data_inicio,
+            PagamentoVenda.data_venda < data_fim + timedelta(days=1),
+            PagamentoVenda.forma_pagamento.in_(FORMAS_ELETRONICAS),
+            Venda.status == StatusVenda.CONCLUIDA
+        ).execution_options(stream_results=True).yield_per(self.tamanho_lote)
+
+        for pagamento in consulta:
+            if pagamento.numero_transacao in vistos:
+                continue
+            yield self._registro(
+                SEM_EXTRATO, pagamento.numero_transacao,
+                valor_pdv=pagamento.valor_pago,
+                vendas=pagamento.numero_venda,
+                forma_pagamento=pagamento.forma_pagamento.value,
+                data_venda=pagamento.data_venda,
+                numero_autorizacao=pagamento.numero_autorizacao,
+                motivo="Pagamento sem número de transação" if not pagamento.numero_transacao
+                else "Pagamento ausente do extrato"
+            )
+
+    def conciliar(
+        self,
+        db: Session,
+        linhas: Iterable[Tuple[int, Dict[str, str]]],
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None,
+        incluir_conciliados: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Concilia as linhas do extrato (ver ler_extrato) com os pagamentos do PDV.
+
+        Cada transação do extrato é conciliada (mesmo valor que a soma dos
+        pagamentos de vendas concluídas com o número), divergente (valor
+        diferente ou venda não concluída) ou não encontrada. Linhas com
+        valor inválido ou número repetido no extrato são informadas como
+        inválidas. Com o período (`data_inicio` e `data_fim`), também lista
+        os pagamentos com cartão/PIX do período que não constam do extrato.
+
+        Returns:
+            Resumo com as quantidades e valores, e os registros por situação
+        """
+        resultado: Dict[str, Any] = {
+            "resumo": {
+                "total_extrato": 0,
+                "valor_extrato": 0,
+                "valor_conciliado": 0,
+                CONCILIADO: 0,
+                DIVERGENTE: 0,
+                NAO_ENCONTRADO: 0,
+                SEM_EXTRATO: 0,
+                INVALIDO: 0
+            },
+            "conciliados": [],
+            "divergentes": [],
+            "nao_encontrados": [],
+            "sem_extrato": [],
+            "invalidos": []
+        }
+        listas = {
+            CONCILIADO: "conciliados", DIVERGENTE: "divergentes", NAO_ENCONTRADO: "nao_encontrados",
+            SEM_EXTRATO: "sem_extrato", INVALIDO: "invalidos"
+        }
+        resumo = resultado["resumo"]
+
+        def registrar(registro: Dict[str, Any]) -> None:
+            situacao = registro["situacao"]
+            resumo[situacao] += 1
+            if situacao == CONCILIADO:
+                resumo["valor_conciliado"] += registro["valor_pdv"]
+                if not incluir_conciliados:
+                    return
+            resultado[listas[situacao]].append(registro)
+
+        vistos: Set[str] = set()
+        for lote in self._lotes(linhas):
+            # Tabela hash do lote: numero_transacao -> (linha, dados do extrato)
+            extrato: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+            for numero_linha, linha in lote:
+                resumo["total_extrato"] += 1
+                numero = (linha.get("numero_transacao") or "").strip()
+                try:
+                    if not numero:
+                        raise ValueError("Linha sem numero_transacao")
+                    if numero in vistos or numero in extrato:
+                        raise ValueError("Transação repetida no extrato")
+                    valor = valor_em_centavos(linha.get("valor") or "")
+                except ValueError as e:
+                    registrar(self._registro(INVALIDO, numero or None, linha_extrato=numero_linha, motivo=str(e)))
+                    continue
+                resumo["valor_extrato"] += valor
+                extrato[numero] = (numero_linha, {
+                    "valor": valor,
+                    "numero_autorizacao": linha.get("numero_autorizacao") or None
+                })
+
+            if not extrato:
+                continue
+            pagamentos = self._pagamentos(db, list(extrato))
+            for numero, (numero_linha, dados) in extrato.items():
+                registrar(self._comparar(numero, numero_linha, dados, pagamentos.get(numero, [])))
+            vistos.update(extrato)
+
+        if data_inicio and data_fim:
+            for registro in self._sem_extrato(db, vistos, data_inicio, data_fim):
+                registrar(registro)
+
+        return resultado
+
+    async def conciliar_async(
+        self,
+        db: AsyncSession,
+        linhas: Iterable[Tuple[int, Dict[str, str]]],
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None,
+        incluir_conciliados: bool = True
+    ) -> Dict[str, Any]:
+        """Versão assíncrona de conciliar"""
+        return await db.run_sync(
+            lambda sessao: self.conciliar(sessao, linhas, data_inicio, data_fim, incluir_conciliados)
+        )
+
+# Instância global do conciliador
+conciliador_pagamentos = ConciliadorPagamentos()
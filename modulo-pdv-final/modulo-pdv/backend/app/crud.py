@@ -2,19 +2,75 @@
 Operações CRUD (Create, Read, Update, Delete) para o módulo de clientes.
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
-from typing import List, Optional
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, func, cast, extract, Integer
+from typing import Any, Callable, Iterator, List, Optional, Union
 from uuid import UUID
+import copy
+import os
+import threading
+import time
 import uuid
 
+from app import busca_clientes
 from app.models import Cliente, TipoCliente, StatusCliente
 from app.schemas import ClienteCreate, ClienteUpdate, ClienteFilter
 
+# Tempo de vida (segundos) do cache das estatísticas de clientes; 0 desativa o cache
+CLIENTES_STATS_CACHE_TTL = float(os.getenv("CLIENTES_STATS_CACHE_TTL", "30"))
+
+class CacheEstatisticas:
+    """
+    Cache por processo das estatísticas de clientes, com validade (TTL).
+
+    É descartado a cada cliente criado, atualizado ou removido por este
+    processo; as alterações feitas por outros processos aparecem ao fim
+    da validade. Um resultado só é guardado se nenhuma alteração ocorreu
+    enquanto o banco era consultado.
+    """
+
+    def __init__(self, ttl: float = CLIENTES_STATS_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._estatisticas: Optional[dict] = None
+        self._expira_em = 0.0
+        self._versao = 0
+
+    def versao(self) -> int:
+        """Versão atual, registrada antes de consultar o banco"""
+        with self._lock:
+            return self._versao
+
+    def obter(self) -> Optional[dict]:
+        """Estatísticas em cache, se dentro da validade"""
+        with self._lock:
+            if self._estatisticas is None or time.monotonic() >= self._expira_em:
+                return None
+            return copy.deepcopy(self._estatisticas)
+
+    def guardar(self, estatisticas: dict, versao: int) -> None:
+        """Guarda as estatísticas lidas do banco, se não houve alteração desde `versao`"""
+        with self._lock:
+            if self.ttl <= 0 or self._versao != versao:
+                return
+            self._estatisticas = copy.deepcopy(estatisticas)
+            self._expira_em = time.monotonic() + self.ttl
+
+    def invalidar(self) -> None:
+        """Descarta as estatísticas em cache"""
+        with self._lock:
+            self._versao += 1
+            self._estatisticas = None
+
+# Instância global do cache de estatísticas
+cache_estatisticas = CacheEstatisticas()
+
 class ClienteCRUD:
     """Classe para operações CRUD de clientes"""
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Union[Session, AsyncSession]):
         self.db = db
 
     def create(self, cliente_data: ClienteCreate) -> Cliente:
@@ -53,6 +109,7 @@ class ClienteCRUD:
         db_cliente = Cliente(**cliente_dict)
         self.db.add(db_cliente)
         self.db.commit()
+        cache_estatisticas.invalidar()
         self.db.refresh(db_cliente)
         
         return db_cliente
@@ -93,29 +150,11 @@ class ClienteCRUD:
         """
         return self.db.query(Cliente).filter(Cliente.email == email.lower()).first()
 
-    def get_all(
-        self, 
-        skip: int = 0, 
-        limit: int = 100,
-        filters: Optional[ClienteFilter] = None
-    ) -> tuple[List[Cliente], int]:
-        """
-        Lista clientes com paginação e filtros.
-        
-        Args:
-            skip: Número de registros a pular
-            limit: Número máximo de registros a retornar
-            filters: Filtros de busca
-            
-        Returns:
-            Tupla com (lista de clientes, total de registros)
-        """
-        query = self.db.query(Cliente)
-        
-        # Aplica filtros se fornecidos
+    def _filtrar(self, query: Query, filters: Optional[ClienteFilter]) -> Query:
+        """Aplica os filtros de busca à consulta de clientes"""
         if filters:
             if filters.nome:
-                query = query.filter(Cliente.nome.ilike(f"%{filters.nome}%"))
+                query = query.filter(busca_clientes.filtro_contem(self.db, "nome", filters.nome))
             
             if filters.tipo_cliente:
                 query = query.filter(Cliente.tipo_cliente == TipoCliente(filters.tipo_cliente))
@@ -124,7 +163,7 @@ class ClienteCRUD:
                 query = query.filter(Cliente.status == StatusCliente(filters.status))
             
             if filters.cidade:
-                query = query.filter(Cliente.cidade.ilike(f"%{filters.cidade}%"))
+                query = query.filter(busca_clientes.filtro_contem(self.db, "cidade", filters.cidade))
             
             if filters.estado:
                 query = query.filter(Cliente.estado == filters.estado.upper())
@@ -133,7 +172,28 @@ class ClienteCRUD:
                 query = query.filter(Cliente.cpf_cnpj == filters.cpf_cnpj)
             
             if filters.email:
-                query = query.filter(Cliente.email.ilike(f"%{filters.email.lower()}%"))
+                query = query.filter(busca_clientes.filtro_contem(self.db, "email", filters.email))
+
+        return query
+
+    def get_all(
+        self, 
+        skip: int = 0, 
+        limit: int = 100,
+        filters: Optional[ClienteFilter] = None
+    ) -> tuple[List[Cliente], int]:
+        """
+        Lista clientes com paginação e filtros.
+        
+        Args:
+            skip: Número de registros a pular
+            limit: Número máximo de registros a retornar
+            filters: Filtros de busca
+            
+        Returns:
+            Tupla com (lista de clientes, total de registros)
+        """
+        query = self._filtrar(self.db.query(Cliente), filters)
 
         # Conta total de registros
         total = query.count()
@@ -143,6 +203,34 @@ class ClienteCRUD:
         
         return clientes, total
 
+    def iterar(
+        self,
+        colunas: List[str],
+        filters: Optional[ClienteFilter] = None,
+        tamanho_lote: int = 1000
+    ) -> Iterator[Row]:
+        """
+        Percorre os clientes filtrados lendo apenas as colunas pedidas, em lotes.
+        
+        Usa um cursor no servidor (stream_results + yield_per): apenas um
+        lote de linhas fica em memória por vez, sem montar objetos Cliente.
+        
+        Args:
+            colunas: Nomes das colunas de clientes a ler
+            filters: Filtros de busca
+            tamanho_lote: Linhas lidas do cursor por vez
+            
+        Returns:
+            Iterador de linhas com as colunas pedidas, na ordem de cadastro
+        """
+        query = self._filtrar(self.db.query(*(getattr(Cliente, coluna) for coluna in colunas)), filters)
+        query = query.order_by(Cliente.data_criacao, Cliente.id).execution_options(
+            stream_results=True
+        ).yield_per(tamanho_lote)
+
+        for linha in query:
+            yield linha
+
     def update(self, cliente_id: UUID, cliente_data: ClienteUpdate) -> Optional[Cliente]:
         """
         Atualiza um cliente existente.
@@ -187,6 +275,7 @@ class ClienteCRUD:
             setattr(db_cliente, field, value)
 
         self.db.commit()
+        cache_estatisticas.invalidar()
         self.db.refresh(db_cliente)
         
         return db_cliente
@@ -207,6 +296,7 @@ class ClienteCRUD:
 
         self.db.delete(db_cliente)
         self.db.commit()
+        cache_estatisticas.invalidar()
         
         return True
 
@@ -231,6 +321,9 @@ class ClienteCRUD:
         """
         Busca clientes por termo (nome, email, CPF/CNPJ).
         
+        Ignora acentos e maiúsculas/minúsculas e usa o índice de busca do
+        banco (ver app.busca_clientes); os mais relevantes vêm primeiro.
+        
         Args:
             termo: Termo de busca
             limit: Número máximo de resultados
@@ -238,39 +331,115 @@ class ClienteCRUD:
         Returns:
             Lista de clientes encontrados
         """
-        return self.db.query(Cliente).filter(
-            or_(
-                Cliente.nome.ilike(f"%{termo}%"),
-                Cliente.email.ilike(f"%{termo}%"),
-                Cliente.cpf_cnpj.ilike(f"%{termo}%")
-            )
-        ).order_by(Cliente.nome).limit(limit).all()
+        return busca_clientes.buscar(self.db, termo, limit)
 
     def get_stats(self) -> dict:
         """
         Retorna estatísticas dos clientes.
         
+        Todas as distribuições (status, tipo, década de nascimento e UF)
+        saem de uma única consulta agrupada, que lê a tabela uma vez; o
+        resultado fica em cache por CLIENTES_STATS_CACHE_TTL segundos.
+        
         Returns:
             Dicionário com estatísticas
         """
-        total = self.db.query(Cliente).count()
-        ativos = self.db.query(Cliente).filter(Cliente.status == StatusCliente.ATIVO).count()
-        inativos = self.db.query(Cliente).filter(Cliente.status == StatusCliente.INATIVO).count()
-        bloqueados = self.db.query(Cliente).filter(Cliente.status == StatusCliente.BLOQUEADO).count()
-        
-        pessoa_fisica = self.db.query(Cliente).filter(Cliente.tipo_cliente == TipoCliente.PESSOA_FISICA).count()
-        pessoa_juridica = self.db.query(Cliente).filter(Cliente.tipo_cliente == TipoCliente.PESSOA_JURIDICA).count()
+        estatisticas = cache_estatisticas.obter()
+        if estatisticas is not None:
+            return estatisticas
+        versao = cache_estatisticas.versao()
+
+        # Uma linha por combinação (poucas centenas), somadas abaixo em cada distribuição
+        decada = (cast(extract("year", Cliente.data_nascimento), Integer) // 10 * 10).label("decada")
+        linhas = self.db.query(
+            Cliente.status, Cliente.tipo_cliente, decada, Cliente.estado, func.count().label("quantidade")
+        ).group_by(Cliente.status, Cliente.tipo_cliente, decada, Cliente.estado).all()
+
+        por_status = {status: 0 for status in StatusCliente}
+        por_tipo = {tipo: 0 for tipo in TipoCliente}
+        por_decada: dict = {}
+        por_uf: dict = {}
+        for linha in linhas:
+            por_status[linha.status] += linha.quantidade
+            por_tipo[linha.tipo_cliente] += linha.quantidade
+            chave_decada = str(linha.decada) if linha.decada is not None else "nao_informado"
+            por_decada[chave_decada] = por_decada.get(chave_decada, 0) + linha.quantidade
+            chave_uf = linha.estado.upper() if linha.estado else "nao_informado"
+            por_uf[chave_uf] = por_uf.get(chave_uf, 0) + linha.quantidade
 
-        return {
-            "total": total,
+        estatisticas = {
+            "total": sum(por_status.values()),
             "por_status": {
-                "ativos": ativos,
-                "inativos": inativos,
-                "bloqueados": bloqueados
+                "ativos": por_status[StatusCliente.ATIVO],
+                "inativos": por_status[StatusCliente.INATIVO],
+                "bloqueados": por_status[StatusCliente.BLOQUEADO]
             },
             "por_tipo": {
-                "pessoa_fisica": pessoa_fisica,
-                "pessoa_juridica": pessoa_juridica
-            }
+                "pessoa_fisica": por_tipo[TipoCliente.PESSOA_FISICA],
+                "pessoa_juridica": por_tipo[TipoCliente.PESSOA_JURIDICA]
+            },
+            "por_decada_nascimento": dict(sorted(por_decada.items())),
+            "por_uf": dict(sorted(por_uf.items()))
         }
+        cache_estatisticas.guardar(estatisticas, versao)
+        return estatisticas
+
+    async def _executar(self, operacao: Callable[["ClienteCRUD"], Any]) -> Any:
+        """
+        Executa uma operação síncrona do CRUD sobre a sessão assíncrona.
+        
+        Usado pelas variantes *_async: a operação roda via AsyncSession.run_sync,
+        com o driver assíncrono (aiosqlite/asyncpg), sem bloquear o event loop.
+        
+        Args:
+            operacao: Função que recebe um ClienteCRUD síncrono
+            
+        Returns:
+            Resultado da operação
+        """
+        return await self.db.run_sync(lambda sessao: operacao(ClienteCRUD(sessao)))
+
+    async def create_async(self, cliente_data: ClienteCreate) -> Cliente:
+        """Versão assíncrona de create."""
+        return await self._executar(lambda crud: crud.create(cliente_data))
+
+    async def get_by_id_async(self, cliente_id: UUID) -> Optional[Cliente]:
+        """Versão assíncrona de get_by_id."""
+        return await self._executar(lambda crud: crud.get_by_id(cliente_id))
+
+    async def get_by_cpf_cnpj_async(self, cpf_cnpj: str) -> Optional[Cliente]:
+        """Versão assíncrona de get_by_cpf_cnpj."""
+        return await self._executar(lambda crud: crud.get_by_cpf_cnpj(cpf_cnpj))
+
+    async def get_by_email_async(self, email: str) -> Optional[Cliente]:
+        """Versão assíncrona de get_by_email."""
+        return await self._executar(lambda crud: crud.get_by_email(email))
+
+    async def get_all_async(
+        self, 
+        skip: int = 0, 
+        limit: int = 100,
+        filters: Optional[ClienteFilter] = None
+    ) -> tuple[List[Cliente], int]:
+        """Versão assíncrona de get_all."""
+        return await self._executar(lambda crud: crud.get_all(skip, limit, filters))
+
+    async def update_async(self, cliente_id: UUID, cliente_data: ClienteUpdate) -> Optional[Cliente]:
+        """Versão assíncrona de update."""
+        return await self._executar(lambda crud: crud.update(cliente_id, cliente_data))
+
+    async def delete_async(self, cliente_id: UUID) -> bool:
+        """Versão assíncrona de delete."""
+        return await self._executar(lambda crud: crud.delete(cliente_id))
+
+    async def soft_delete_async(self, cliente_id: UUID, usuario: str = None) -> Optional[Cliente]:
+        """Versão assíncrona de soft_delete."""
+        return await self._executar(lambda crud: crud.soft_delete(cliente_id, usuario))
+
+    async def search_async(self, termo: str, limit: int = 10) -> List[Cliente]:
+        """Versão assíncrona de search."""
+        return await self._executar(lambda crud: crud.search(termo, limit))
 
+    async def get_stats_async(self) -> dict:
+        """Versão assíncrona de get_stats."""
+        return await self._executar(lambda crud: crud.get_stats())
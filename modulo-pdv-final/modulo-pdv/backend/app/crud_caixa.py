@@ -0,0 +1,343 @@
+"""
+Operações das sessões de caixa do PDV: abertura, fechamento e totais do turno.
+
+Os totais de cada sessão são mantidos incrementalmente: quem cria,
+conclui ou cancela uma venda acumula a contribuição dela com `acumular`
+(no mesmo formato "status anterior com sinal -1, novo status com sinal
++1" do resumo diário) e aplica os deltas com `gravar`, na mesma
+transação. O fechamento do caixa lê apenas a linha da sessão.
+
+Depois do fechamento, os totais da sessão não mudam: o que chega depois
+(vendas offline, cancelamentos) entra na sessão aberta do mesmo terminal
+(ver `sessao_vigente`), e a venda passa a pertencer a ela.
+"""
+
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import and_, func, select, update
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timezone
+import os
+import uuid
+
+from app.models import FormaPagamento, PagamentoVenda, SessaoCaixa, StatusSessaoCaixa, StatusVenda, Venda
+from app.schemas import SessaoCaixaCreate, SessaoCaixaFechamento
+
+# Exige a sessão de caixa em toda venda (desligado para terminais antigos)
+CAIXA_OBRIGATORIO = os.getenv("CAIXA_OBRIGATORIO", "false").lower() in ("1", "true", "sim")
+
+# Pagamento de uma venda para os totais do caixa: (forma, valor_pago, troco)
+PagamentoCaixa = Tuple[FormaPagamento, int, int]
+
+class CaixaJaAberto(Exception):
+    """O terminal já tem uma sessão de caixa aberta"""
+
+class CaixaNaoAberto(ValueError):
+    """A sessão de caixa não existe ou já foi fechada"""
+
+class CRUDCaixa:
+    """Classe para operações das sessões de caixa"""
+
+    def validar_sessao_venda(self, sessao_caixa_id: Optional[uuid.UUID]) -> None:
+        """Recusa vendas sem sessão de caixa quando CAIXA_OBRIGATORIO está ativo"""
+        if sessao_caixa_id is None and CAIXA_OBRIGATORIO:
+            raise ValueError("Informe a sessão de caixa (sessao_caixa_id) da venda")
+
+    def verificar_aberta(self, db: Session, sessao_caixa_id: Optional[uuid.UUID]) -> None:
+        """Lança CaixaNaoAberto se a sessão informada não estiver aberta"""
+        if sessao_caixa_id is None:
+            return
+        situacao = db.query(SessaoCaixa.status).filter(SessaoCaixa.id == sessao_caixa_id).scalar()
+        if situacao != StatusSessaoCaixa.ABERTA:
+            raise CaixaNaoAberto(f"Sessão de caixa {sessao_caixa_id} não está aberta")
+
+    def sessao_vigente(self, db: Session, sessao_caixa_id: Optional[uuid.UUID]) -> Optional[uuid.UUID]:
+        """
+        Sessão que recebe os totais de uma venda registrada na sessão informada.
+
+        Os totais de uma sessão fechada não mudam mais: vendas offline e
+        mudanças de status que chegam depois do fechamento vão para a sessão
+        aberta do mesmo terminal. Lança CaixaNaoAberto se a sessão não existe
+        ou se o terminal não tem caixa aberto.
+        """
+        if sessao_caixa_id is None:
+            return None
+        sessao = db.query(SessaoCaixa.terminal, SessaoCaixa.status).filter(SessaoCaixa.id == sessao_caixa_id).first()
+        if sessao is None:
+            raise CaixaNaoAberto(f"Sessão de caixa {sessao_caixa_id} não encontrada")
+        if sessao.status == StatusSessaoCaixa.ABERTA:
+            return sessao_caixa_id
+        aberta = self.get_aberta(db, sessao.terminal)
+        if aberta is None:
+            raise CaixaNaoAberto(
+                f"Sessão de caixa {sessao_caixa_id} fechada e o terminal {sessao.terminal} não tem caixa aberto"
+            )
+        return aberta.id
+
+    def acumular(
+        self,
+        deltas: Dict[uuid.UUID, Dict[str, int]],
+        sessao_caixa_id: Optional[uuid.UUID],
+        status: StatusVenda,
+        total_venda: int,
+        pagamentos: List[PagamentoCaixa],
+        sinal: int = 1
+    ) -> None:
+        """
+        Acumula em `deltas` a contribuição de uma venda, no status informado, para a sessão.
+
+        Vendas concluídas somam quantidade, total, valor por forma de
+        pagamento e troco; vendas canceladas somam quantidade e valor
+        cancelados; os demais status não entram nos totais do caixa.
+        """
+        if sessao_caixa_id is None:
+            return
+        totais = deltas.setdefault(sessao_caixa_id, {})
+
+        def somar(coluna: str, valor: int) -> None:
+            totais[coluna] = totais.get(coluna, 0) + sinal * valor
+
+        if status == StatusVenda.CONCLUIDA:
+            somar("quantidade_vendas", 1)
+            somar("total_vendas", total_venda)
+            for forma, valor_pago, troco in pagamentos:
+                somar(SessaoCaixa.COLUNAS_FORMAS[forma], valor_pago)
+                somar("total_troco", troco)
+        elif status == StatusVenda.CANCELADA:
+            somar("quantidade_cancelamentos", 1)
+            somar("total_cancelado", total_venda)
+
+    def gravar(self, db: Session, deltas: Dict[uuid.UUID, Dict[str, int]], exigir_aberta: bool = False) -> None:
+        """
+        Aplica os deltas às sessões, com um UPDATE incremental por sessão.
+
+        Com `exigir_aberta`, o UPDATE só afeta sessões abertas: a venda é
+        recusada (CaixaNaoAberto) se o caixa foi fechado, e o fechamento,
+        que bloqueia a mesma linha, não perde uma venda em andamento.
+        Não faz commit.
+        """
+        for sessao_caixa_id, totais in deltas.items():
+            valores = {
+                coluna: getattr(SessaoCaixa, coluna) + valor
+                for coluna, valor in totais.items() if valor
+            }
+            if not valores:
+                continue
+            stmt = update(SessaoCaixa).where(SessaoCaixa.id == sessao_caixa_id)
+            if exigir_aberta:
+                stmt = stmt.where(SessaoCaixa.status == StatusSessaoCaixa.ABERTA)
+            atualizada = db.execute(
+                stmt.values(**valores).returning(SessaoCaixa.id).execution_options(synchronize_session=False)
+            ).scalar()
+            if atualizada is None:
+                raise CaixaNaoAberto(f"Sessão de caixa {sessao_caixa_id} não encontrada ou fechada")
+
+    def abrir(self, db: Session, obj_in: SessaoCaixaCreate) -> SessaoCaixa:
+        """Abre uma sessão de caixa no terminal (no máximo uma aberta por terminal)"""
+        db_sessao = SessaoCaixa(
+            terminal=obj_in.terminal,
+            operador=obj_in.operador,
+            status=StatusSessaoCaixa.ABERTA,
+            data_abertura=datetime.now(timezone.utc),
+            valor_abertura=obj_in.valor_abertura,
+            observacoes=obj_in.observacoes
+        )
+        try:
+            db.add(db_sessao)
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise CaixaJaAberto(f"O terminal {obj_in.terminal} já tem um caixa aberto")
+        except Exception as e:
+            db.rollback()
+            raise e
+        db.refresh(db_sessao)
+        return db_sessao
+
+    def get(self, db: Session, id: uuid.UUID) -> Optional[SessaoCaixa]:
+        """Busca uma sessão de caixa por ID"""
+        return db.query(SessaoCaixa).filter(SessaoCaixa.id == id).first()
+
+    def get_aberta(self, db: Session, terminal: str) -> Optional[SessaoCaixa]:
+        """Sessão aberta do terminal, se houver"""
+        return db.query(SessaoCaixa).filter(
+            SessaoCaixa.terminal == terminal, SessaoCaixa.status == StatusSessaoCaixa.ABERTA
+        ).first()
+
+    def get_multi(
+        self,
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        terminal: Optional[str] = None,
+        status: Optional[StatusSessaoCaixa] = None
+    ) -> List[SessaoCaixa]:
+        """Lista as sessões de caixa, das mais recentes para as mais antigas"""
+        query = db.query(SessaoCaixa)
+        if terminal:
+            query = query.filter(SessaoCaixa.terminal == terminal)
+        if status:
+            query = query.filter(SessaoCaixa.status == status)
+        return query.order_by(SessaoCaixa.data_abertura.desc()).offset(skip).limit(limit).all()
+
+    def fechar(self, db: Session, id: uuid.UUID, obj_in: SessaoCaixaFechamento) -> Optional[SessaoCaixa]:
+        """
+        Fecha a sessão com o dinheiro contado na gaveta.
+
+        Os totais já estão na linha da sessão, então o fechamento é um
+        único UPDATE condicional. Retorna None se a sessão não existe e
+        lança CaixaNaoAberto se ela já foi fechada.
+        """
+        try:
+            valores = {
+                "status": StatusSessaoCaixa.FECHADA,
+                "data_fechamento": datetime.now(timezone.utc),
+                "valor_fechamento": obj_in.valor_fechamento
+            }
+            if obj_in.observacoes is not None:
+                valores["observacoes"] = obj_in.observacoes
+            fechada = db.execute(
+                update(SessaoCaixa)
+                .where(SessaoCaixa.id == id, SessaoCaixa.status == StatusSessaoCaixa.ABERTA)
+                .values(**valores)
+                .returning(SessaoCaixa.id)
+                .execution_options(synchronize_session=False)
+            ).scalar()
+            if fechada is None:
+                db.rollback()
+                if self.get(db, id) is None:
+                    return None
+                raise CaixaNaoAberto(f"Sessão de caixa {id} já está fechada")
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise e
+
+        db_sessao = self.get(db, id)
+        db.refresh(db_sessao)
+        return db_sessao
+
+    def resumo(self, db_sessao: SessaoCaixa) -> Dict[str, Any]:
+        """
+        Resumo de fechamento da sessão, a partir apenas da linha da sessão.
+
+        O dinheiro esperado na gaveta é o fundo de troco mais os pagamentos
+        em dinheiro (valor_pago já é líquido do troco devolvido).
+        """
+        dinheiro_esperado = db_sessao.valor_abertura + db_sessao.total_dinheiro
+        return {
+            "id": db_sessao.id,
+            "terminal": db_sessao.terminal,
+            "operador": db_sessao.operador,
+            "status": db_sessao.status.value,
+            "data_abertura": db_sessao.data_abertura,
+            "data_fechamento": db_sessao.data_fechamento,
+            "valor_abertura": db_sessao.valor_abertura,
+            "valor_fechamento": db_sessao.valor_fechamento,
+            "observacoes": db_sessao.observacoes,
+            "quantidade_vendas": db_sessao.quantidade_vendas,
+            "total_vendas": db_sessao.total_vendas,
+            "total_troco": db_sessao.total_troco,
+            "totais_por_forma_pagamento": {
+                forma.value: getattr(db_sessao, coluna) for forma, coluna in SessaoCaixa.COLUNAS_FORMAS.items()
+            },
+            "quantidade_cancelamentos": db_sessao.quantidade_cancelamentos,
+            "total_cancelado": db_sessao.total_cancelado,
+            "dinheiro_esperado": dinheiro_esperado,
+            "diferenca_caixa": (
+                db_sessao.valor_fechamento - dinheiro_esperado
+                if db_sessao.valor_fechamento is not None else None
+            )
+        }
+
+    def reconstruir_totais(self, db: Session) -> int:
+        """
+        Recalcula os totais das sessões abertas a partir das vendas e pagamentos.
+
+        Usado para conferir ou corrigir os totais incrementais. Só são
+        recalculadas as sessões que têm vendas no banco (as sessões cujas
+        vendas foram todas para o arquivo frio mantêm os totais); os totais
+        de uma sessão fechada são definitivos.
+
+        Returns:
+            Quantidade de sessões recalculadas
+        """
+        colunas_totais = [
+            "quantidade_vendas", "total_vendas", "total_troco",
+            "quantidade_cancelamentos", "total_cancelado", *SessaoCaixa.COLUNAS_FORMAS.values()
+        ]
+        totais: Dict[uuid.UUID, Dict[str, int]] = {}
+
+        def sessao(sessao_caixa_id: uuid.UUID) -> Dict[str, int]:
+            return totais.setdefault(sessao_caixa_id, {coluna: 0 for coluna in colunas_totais})
+
+        abertas = select(SessaoCaixa.id).where(SessaoCaixa.status == StatusSessaoCaixa.ABERTA)
+
+        por_status = db.query(
+            Venda.sessao_caixa_id, Venda.status, func.count(Venda.id), func.sum(Venda.total_venda)
+        ).filter(Venda.sessao_caixa_id.in_(abertas)).group_by(Venda.sessao_caixa_id, Venda.status)
+        for sessao_caixa_id, status, quantidade, valor in por_status:
+            linha = sessao(sessao_caixa_id)
+            if status == StatusVenda.CONCLUIDA:
+                linha["quantidade_vendas"], linha["total_vendas"] = quantidade, valor or 0
+            elif status == StatusVenda.CANCELADA:
+                linha["quantidade_cancelamentos"], linha["total_cancelado"] = quantidade, valor or 0
+
+        por_forma = db.query(
+            Venda.sessao_caixa_id, PagamentoVenda.forma_pagamento,
+            func.sum(PagamentoVenda.valor_pago), func.sum(PagamentoVenda.troco)
+        ).join(
+            PagamentoVenda,
+            and_(PagamentoVenda.venda_id == Venda.id, PagamentoVenda.data_venda == Venda.data_venda)
+        ).filter(
+            Venda.sessao_caixa_id.in_(abertas), Venda.status == StatusVenda.CONCLUIDA
+        ).group_by(Venda.sessao_caixa_id, PagamentoVenda.forma_pagamento)
+        for sessao_caixa_id, forma, valor, troco in por_forma:
+            linha = sessao(sessao_caixa_id)
+            linha[SessaoCaixa.COLUNAS_FORMAS[forma]] = valor or 0
+            linha["total_troco"] += troco or 0
+
+        try:
+            if totais:
+                db.execute(
+                    update(SessaoCaixa),
+                    [{"id": sessao_caixa_id, **linha} for sessao_caixa_id, linha in totais.items()]
+                )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise e
+        return len(totais)
+
+    async def abrir_async(self, db: AsyncSession, obj_in: SessaoCaixaCreate) -> SessaoCaixa:
+        """Versão assíncrona de abrir"""
+        return await db.run_sync(lambda sessao: self.abrir(sessao, obj_in))
+
+    async def get_async(self, db: AsyncSession, id: uuid.UUID) -> Optional[SessaoCaixa]:
+        """Versão assíncrona de get"""
+        return await db.run_sync(lambda sessao: self.get(sessao, id))
+
+    async def get_aberta_async(self, db: AsyncSession, terminal: str) -> Optional[SessaoCaixa]:
+        """Versão assíncrona de get_aberta"""
+        return await db.run_sync(lambda sessao: self.get_aberta(sessao, terminal))
+
+    async def get_multi_async(
+        self,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        terminal: Optional[str] = None,
+        status: Optional[StatusSessaoCaixa] = None
+    ) -> List[SessaoCaixa]:
+        """Versão assíncrona de get_multi"""
+        return await db.run_sync(lambda sessao: self.get_multi(sessao, skip, limit, terminal, status))
+
+    async def fechar_async(
+        self, db: AsyncSession, id: uuid.UUID, obj_in: SessaoCaixaFechamento
+    ) -> Optional[SessaoCaixa]:
+        """Versão assíncrona de fechar"""
+        return await db.run_sync(lambda sessao: self.fechar(sessao, id, obj_in))
+
+# Instância global do CRUD
+crud_caixa = CRUDCaixa()
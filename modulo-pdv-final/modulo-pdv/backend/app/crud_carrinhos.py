@@ -0,0 +1,370 @@
+"""
+Operações do carrinho do PDV: venda pendente montada item a item no servidor.
+
+O carrinho é uma venda com status PENDENTE. Cada alteração (incluir ou
+remover um item, aplicar desconto) é um único UPDATE ... RETURNING que
+soma a variação aos totais da venda, sem percorrer os itens já incluídos:
+o custo de uma alteração não depende do tamanho do carrinho. O UPDATE
+bloqueia a linha da venda até o commit, o que serializa as alterações
+simultâneas do mesmo carrinho e a finalização.
+
+O resumo diário acompanha os carrinhos como vendas pendentes (quantidade
+na abertura, valor a cada alteração), de modo que cancelar um carrinho ou
+reconstruir o resumo continua dando o mesmo resultado.
+"""
+
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, insert, update
+from typing import Any, Dict, Optional
+from datetime import datetime, timezone
+import uuid
+
+from app.catalogo import catalogo_produtos
+from app.crud_caixa import crud_caixa
+from app.crud_estoque import crud_estoque
+from app.crud_vendas import crud_venda
+from app.models import ItemVenda, PagamentoVenda, StatusVenda, Venda, VendaResumoDiario
+from app.ranking_produtos import ranking_produtos_hoje
+from app.schemas import CarrinhoCreate, CarrinhoFinalizar, ItemVendaCreate
+
+class CarrinhoNaoPendente(Exception):
+    """O carrinho já foi finalizado ou cancelado"""
+
+# Colunas devolvidas pelas alterações do carrinho
+COLUNAS_TOTAIS = (
+    Venda.id, Venda.numero_venda, Venda.status, Venda.data_venda, Venda.vendedor_id,
+    Venda.subtotal, Venda.desconto_total, Venda.total_venda
+)
+
+class CRUDCarrinho:
+    """Classe para operações do carrinho (venda com status PENDENTE)"""
+
+    def numero_provisorio(self, carrinho_id: uuid.UUID) -> str:
+        """Número do carrinho até a finalização, quando recebe o número definitivo"""
+        return f"CAR-{carrinho_id.hex[:16]}"
+
+    def _verificar_pendente(self, db: Session, carrinho_id: uuid.UUID) -> bool:
+        """
+        Indica se o carrinho existe; lança CarrinhoNaoPendente se já foi fechado.
+        """
+        situacao = db.query(Venda.status).filter(Venda.id == carrinho_id).scalar()
+        if situacao is None:
+            return False
+        if situacao != StatusVenda.PENDENTE:
+            raise CarrinhoNaoPendente(f"Carrinho {situacao.value}: não pode ser alterado")
+        return True
+
+    def _atualizar_totais(
+        self,
+        db: Session,
+        carrinho_id: uuid.UUID,
+        variacao_subtotal: int,
+        desconto_total: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Soma a variação ao subtotal (e opcionalmente troca o desconto) em um único UPDATE.
+
+        O UPDATE só afeta o carrinho pendente cujo subtotal resultante cobre
+        o desconto. Sem linha afetada, retorna None se o carrinho não existe,
+        lança CarrinhoNaoPendente se ele já foi fechado e ValueError se o
+        desconto ficaria maior que o subtotal.
+        """
+        desconto = Venda.desconto_total if desconto_total is None else desconto_total
+        novo_subtotal = Venda.subtotal + variacao_subtotal
+        stmt = (
+            update(Venda)
+            .where(Venda.id == carrinho_id, Venda.status == StatusVenda.PENDENTE, novo_subtotal >= desconto)
+            .values(
+                subtotal=novo_subtotal,
+                desconto_total=desconto,
+                total_venda=novo_subtotal - desconto,
+                data_atualizacao=datetime.now(timezone.utc)
+            )
+            .returning(*COLUNAS_TOTAIS)
+            .execution_options(synchronize_session=False)
+        )
+        linha = db.execute(stmt).mappings().first()
+        if linha is None:
+            if not self._verificar_pendente(db, carrinho_id):
+                return None
+            raise ValueError("Desconto maior que o subtotal do carrinho")
+        return dict(linha)
+
+    def _ajustar_resumo(self, db: Session, totais: Dict[str, Any], variacao_total: int) -> None:
+        """Soma a variação do total do carrinho ao valor pendente do resumo diário"""
+        if variacao_total:
+            chave = (
+                totais["data_venda"],
+                StatusVenda.PENDENTE,
+                VendaResumoDiario.FORMA_TOTAL,
+                totais["vendedor_id"] or VendaResumoDiario.SEM_VENDEDOR
+            )
+            crud_venda._gravar_resumo(db, {chave: [0, variacao_total]})
+
+    def criar(self, db: Session, obj_in: CarrinhoCreate) -> Venda:
+        """Abre um carrinho vazio, na sessão de caixa informada (que precisa estar aberta)"""
+        try:
+            crud_caixa.validar_sessao_venda(obj_in.sessao_caixa_id)
+            crud_caixa.verificar_aberta(db, obj_in.sessao_caixa_id)
+            agora = datetime.now(timezone.utc)
+            hoje = crud_venda.data_negocio(agora)
+            carrinho_id = uuid.uuid4()
+            db_carrinho = Venda(
+                id=carrinho_id,
+                numero_venda=self.numero_provisorio(carrinho_id),
+                data_criacao=agora,
+                data_venda=hoje,
+                cliente_id=obj_in.cliente_id,
+                vendedor_id=obj_in.vendedor_id,
+                sessao_caixa_id=obj_in.sessao_caixa_id,
+                subtotal=0,
+                desconto_total=0,
+                total_venda=0,
+                status=StatusVenda.PENDENTE,
+                observacoes=obj_in.observacoes,
+                criado_por=obj_in.criado_por
+            )
+            db.add(db_carrinho)
+
+            deltas = {}
+            crud_venda._acumular_resumo(deltas, hoje, StatusVenda.PENDENTE, obj_in.vendedor_id, 0, [])
+            crud_venda._gravar_resumo(db, deltas)
+
+            db.commit()
+            db.refresh(db_carrinho)
+            return db_carrinho
+
+        except Exception as e:
+            db.rollback()
+            raise e
+
+    def adicionar_item(
+        self, db: Session, carrinho_id: uuid.UUID, item: ItemVendaCreate
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Inclui um item no carrinho, somando seu subtotal aos totais.
+
+        Returns:
+            Totais do carrinho e o item incluído (None se o carrinho não existe)
+        """
+        try:
+            subtotal_item = item.quantidade * item.preco_unitario - item.desconto_item
+            if subtotal_item < 0:
+                raise ValueError("Desconto do item maior que o valor do item")
+            produtos = catalogo_produtos.buscar(db, [item.produto_id])
+
+            totais = self._atualizar_totais(db, carrinho_id, subtotal_item)
+            if totais is None:
+                db.rollback()
+                return None
+
+            dados_item = crud_venda._dados_item(carrinho_id, totais["data_venda"], item, produtos)
+            dados_item["data_criacao"] = datetime.now(timezone.utc)
+            db.execute(insert(ItemVenda), [dados_item])
+            self._ajustar_resumo(db, totais, subtotal_item)
+
+            db.commit()
+            return {**totais, "item": dados_item}
+
+        except Exception as e:
+            db.rollback()
+            raise e
+
+    def remover_item(
+        self, db: Session, carrinho_id: uuid.UUID, item_id: uuid.UUID
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Remove um item do carrinho, subtraindo seu subtotal dos totais.
+
+        O carrinho é bloqueado (UPDATE dos totais) antes da remoção do item,
+        na mesma ordem da inclusão e da finalização. Retorna None se o
+        carrinho ou o item não existem.
+        """
+        try:
+            subtotal_item = db.query(ItemVenda.subtotal_item).filter(
+                ItemVenda.id == item_id, ItemVenda.venda_id == carrinho_id
+            ).scalar()
+            if subtotal_item is None:
+                self._verificar_pendente(db, carrinho_id)
+                return None
+
+            totais = self._atualizar_totais(db, carrinho_id, -subtotal_item)
+            removido = totais is not None and db.execute(
+                delete(ItemVenda)
+                .where(ItemVenda.id == item_id, ItemVenda.venda_id == carrinho_id)
+                .returning(ItemVenda.id)
+                .execution_options(synchronize_session=False)
+            ).scalar()
+            if not removido:
+                # Removido por outra requisição entre a leitura e o bloqueio
+                db.rollback()
+                return None
+
+            self._ajustar_resumo(db, totais, -subtotal_item)
+            db.commit()
+            return totais
+
+        except Exception as e:
+            db.rollback()
+            raise e
+
+    def aplicar_desconto(
+        self, db: Session, carrinho_id: uuid.UUID, desconto_total: int
+    ) -> Optional[Dict[str, Any]]:
+        """Substitui o desconto total do carrinho (None se o carrinho não existe)"""
+        try:
+            desconto_anterior = db.query(Venda.desconto_total).filter(
+                Venda.id == carrinho_id
+            ).with_for_update().scalar()
+            totais = self._atualizar_totais(db, carrinho_id, 0, desconto_total)
+            if totais is None:
+                db.rollback()
+                return None
+
+            self._ajustar_resumo(db, totais, desconto_anterior - desconto_total)
+            db.commit()
+            return totais
+
+        except Exception as e:
+            db.rollback()
+            raise e
+
+    def finalizar(self, db: Session, carrinho_id: uuid.UUID, obj_in: CarrinhoFinalizar) -> Optional[uuid.UUID]:
+        """
+        Conclui o carrinho em uma única transação curta.
+
+        Os totais já estão prontos, então a transação só valida os
+        pagamentos, reserva o número definitivo, muda o status (com o total
+        conferido no próprio UPDATE, que bloqueia o carrinho), grava os
+        pagamentos, dá baixa no estoque e move a venda no resumo diário e
+        nos totais da sessão de caixa (que precisa estar aberta).
+
+        A venda mantém a data de abertura do carrinho (e recebe o número
+        desse dia): a data_venda faz parte da chave referenciada pelos itens
+        e pagamentos e define a partição, então não é alterada depois que o
+        carrinho tem itens.
+
+        Returns:
+            ID da venda concluída (None se o carrinho não existe)
+        """
+        try:
+            atual = db.query(
+                Venda.status, Venda.data_venda, Venda.vendedor_id, Venda.sessao_caixa_id, Venda.total_venda
+            ).filter(Venda.id == carrinho_id).first()
+            if atual is None:
+                return None
+            if atual.status != StatusVenda.PENDENTE:
+                raise CarrinhoNaoPendente(f"Carrinho {atual.status.value}: não pode ser finalizado")
+
+            total_pagamentos = sum(pagamento.valor_pago for pagamento in obj_in.pagamentos)
+            if total_pagamentos != atual.total_venda:
+                raise ValueError(
+                    f"Total dos pagamentos ({total_pagamentos}) não corresponde ao total da venda ({atual.total_venda})"
+                )
+            versao_ranking = ranking_produtos_hoje.versao()
+
+            agora = datetime.now(timezone.utc)
+            dia = atual.data_venda
+            numero_venda = crud_venda.formatar_numero_venda(dia, crud_venda.alocar_numeros(db, dia))
+            concluida = db.execute(
+                update(Venda)
+                .where(
+                    Venda.id == carrinho_id,
+                    Venda.status == StatusVenda.PENDENTE,
+                    Venda.total_venda == total_pagamentos
+                )
+                .values(
+                    status=StatusVenda.CONCLUIDA,
+                    numero_venda=numero_venda,
+                    data_atualizacao=agora,
+                    atualizado_por=obj_in.atualizado_por
+                )
+                .returning(Venda.id)
+                .execution_options(synchronize_session=False)
+            ).scalar()
+            if concluida is None:
+                # Alterado por outra requisição depois da leitura dos totais
+                db.rollback()
+                self._verificar_pendente(db, carrinho_id)
+                raise ValueError("Os totais do carrinho mudaram durante a finalização; tente novamente")
+
+            itens = db.query(
+                ItemVenda.produto_id, ItemVenda.quantidade, ItemVenda.subtotal_item, ItemVenda.nome_produto
+            ).filter(ItemVenda.venda_id == carrinho_id).all()
+            if not itens:
+                raise ValueError("O carrinho não tem itens")
+
+            dados_pagamentos = crud_venda._dados_pagamentos(carrinho_id, dia, obj_in)
+            db.execute(insert(PagamentoVenda), dados_pagamentos)
+            crud_estoque.baixar(db, crud_venda._movimentos_estoque(carrinho_id, itens))
+
+            deltas = {}
+            crud_venda._acumular_resumo(
+                deltas, dia, StatusVenda.PENDENTE, atual.vendedor_id, atual.total_venda, [], sinal=-1
+            )
+            crud_venda._acumular_resumo(
+                deltas, dia, StatusVenda.CONCLUIDA, atual.vendedor_id, atual.total_venda,
+                [(dados["forma_pagamento"], dados["valor_pago"]) for dados in dados_pagamentos]
+            )
+            crud_venda._gravar_resumo(db, deltas)
+
+            caixa = {}
+            crud_caixa.acumular(
+                caixa, atual.sessao_caixa_id, StatusVenda.CONCLUIDA, atual.total_venda,
+                crud_venda._pagamentos_caixa(dados_pagamentos)
+            )
+            crud_caixa.gravar(db, caixa, exigir_aberta=True)
+
+            db.commit()
+            ranking_produtos_hoje.acumular(dia, [tuple(item) for item in itens], versao_ranking)
+            return carrinho_id
+
+        except Exception as e:
+            db.rollback()
+            raise e
+
+    def cancelar(self, db: Session, carrinho_id: uuid.UUID) -> Optional[Venda]:
+        """Cancela um carrinho pendente (None se o carrinho não existe)"""
+        if not self._verificar_pendente(db, carrinho_id):
+            return None
+        return crud_venda.delete(db, carrinho_id)
+
+    async def criar_async(self, db: AsyncSession, obj_in: CarrinhoCreate) -> Venda:
+        """Versão assíncrona de criar"""
+        return await db.run_sync(lambda sessao: self.criar(sessao, obj_in))
+
+    async def adicionar_item_async(
+        self, db: AsyncSession, carrinho_id: uuid.UUID, item: ItemVendaCreate
+    ) -> Optional[Dict[str, Any]]:
+        """Versão assíncrona de adicionar_item"""
+        return await db.run_sync(lambda sessao: self.adicionar_item(sessao, carrinho_id, item))
+
+    async def remover_item_async(
+        self, db: AsyncSession, carrinho_id: uuid.UUID, item_id: uuid.UUID
+    ) -> Optional[Dict[str, Any]]:
+        """Versão assíncrona de remover_item"""
+        return await db.run_sync(lambda sessao: self.remover_item(sessao, carrinho_id, item_id))
+
+    async def aplicar_desconto_async(
+        self, db: AsyncSession, carrinho_id: uuid.UUID, desconto_total: int
+    ) -> Optional[Dict[str, Any]]:
+        """Versão assíncrona de aplicar_desconto"""
+        return await db.run_sync(lambda sessao: self.aplicar_desconto(sessao, carrinho_id, desconto_total))
+
+    async def finalizar_async(
+        self, db: AsyncSession, carrinho_id: uuid.UUID, obj_in: CarrinhoFinalizar
+    ) -> Optional[Venda]:
+        """Versão assíncrona de finalizar, retornando a venda concluída"""
+        def finalizar(sessao: Session) -> Optional[Venda]:
+            venda_id = self.finalizar(sessao, carrinho_id, obj_in)
+            return crud_venda.get(sessao, venda_id) if venda_id else None
+
+        return await db.run_sync(finalizar)
+
+    async def cancelar_async(self, db: AsyncSession, carrinho_id: uuid.UUID) -> Optional[Venda]:
+        """Versão assíncrona de cancelar"""
+        return await db.run_sync(lambda sessao: self.cancelar(sessao, carrinho_id))
+
+# Instância global do CRUD
+crud_carrinho = CRUDCarrinho()
@@ -0,0 +1,191 @@
+"""
+Operações de estoque do módulo PDV: saldos e razão de movimentações.
+"""
+
+from sqlalchemy.orm import Session
+from sqlalchemy import case, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from typing import List, Optional, Dict, Tuple
+from datetime import datetime, timezone
+import uuid
+
+from app.models import EstoqueSaldo, MovimentacaoEstoque, TipoMovimentacaoEstoque
+
+# Movimento de um produto: (venda_id, produto_id, quantidade)
+Movimento = Tuple[Optional[uuid.UUID], uuid.UUID, int]
+
+class CRUDEstoque:
+    """Classe para operações de estoque"""
+
+    def _insert(self, db: Session):
+        """Retorna o construtor de INSERT do dialeto (suporta ON CONFLICT)"""
+        if db.get_bind().dialect.name == "postgresql":
+            return postgresql.insert
+        return sqlite.insert
+
+    def _totais(self, movimentos: List[Movimento]) -> Dict[uuid.UUID, int]:
+        """Soma as quantidades dos movimentos por produto"""
+        totais: Dict[uuid.UUID, int] = {}
+        for _, produto_id, quantidade in movimentos:
+            totais[produto_id] = totais.get(produto_id, 0) + quantidade
+        return totais
+
+    def _registrar_movimentos(
+        self,
+        db: Session,
+        movimentos: List[Movimento],
+        saldos_finais: Dict[uuid.UUID, int],
+        tipo: TipoMovimentacaoEstoque,
+        sinal: int
+    ) -> None:
+        """
+        Grava no razão um lançamento por movimento, com o saldo após cada um.
+
+        O saldo intermediário é recalculado a partir do saldo final
+        devolvido pelo UPDATE, desfazendo os movimentos em ordem inversa.
+        """
+        saldos = dict(saldos_finais)
+        for _, produto_id, quantidade in reversed(movimentos):
+            if produto_id in saldos:
+                saldos[produto_id] -= sinal * quantidade
+
+        lancamentos = []
+        for venda_id, produto_id, quantidade in movimentos:
+            if produto_id not in saldos:
+                continue
+            saldos[produto_id] += sinal * quantidade
+            lancamentos.append({
+                "id": uuid.uuid4(),
+                "produto_id": produto_id,
+                "tipo": tipo,
+                "quantidade": sinal * quantidade,
+                "saldo_apos": saldos[produto_id],
+                "venda_id": venda_id
+            })
+
+        if lancamentos:
+            db.execute(insert(MovimentacaoEstoque), lancamentos)
+
+    def baixar(self, db: Session, movimentos: List[Movimento]) -> Dict[uuid.UUID, int]:
+        """
+        Dá baixa no estoque dos itens vendidos, dentro da transação da venda.
+
+        Todos os produtos são decrementados com um único UPDATE condicional
+        (saldo >= quantidade) ... RETURNING, sem ler o saldo antes: o banco
+        garante que duas vendas simultâneas do mesmo produto não o deixam
+        negativo. Produtos sem saldo cadastrado não têm estoque controlado
+        e são ignorados. Não faz commit.
+
+        Returns:
+            Saldo final de cada produto baixado
+
+        Raises:
+            ValueError: Se algum produto controlado não tiver saldo suficiente
+        """
+        totais = self._totais(movimentos)
+        if not totais:
+            return {}
+
+        quantidade = case(totais, value=EstoqueSaldo.produto_id)
+        stmt = (
+            update(EstoqueSaldo)
+            .where(EstoqueSaldo.produto_id.in_(totais.keys()), EstoqueSaldo.saldo >= quantidade)
+            .values(saldo=EstoqueSaldo.saldo - quantidade, data_atualizacao=datetime.now(timezone.utc))
+            .returning(EstoqueSaldo.produto_id, EstoqueSaldo.saldo)
+            .execution_options(synchronize_session=False)
+        )
+        saldos = {produto_id: saldo for produto_id, saldo in db.execute(stmt)}
+
+        nao_baixados = set(totais) - set(saldos)
+        if nao_baixados:
+            # Entre os não baixados, os que têm saldo cadastrado estão sem estoque
+            sem_estoque = [
+                produto_id for (produto_id,) in db.query(EstoqueSaldo.produto_id).filter(
+                    EstoqueSaldo.produto_id.in_(nao_baixados)
+                )
+            ]
+            if sem_estoque:
+                produtos = ", ".join(sorted(str(produto_id) for produto_id in sem_estoque))
+                raise ValueError(f"Estoque insuficiente para o(s) produto(s): {produtos}")
+
+        self._registrar_movimentos(db, movimentos, saldos, TipoMovimentacaoEstoque.SAIDA_VENDA, -1)
+        return saldos
+
+    def devolver(self, db: Session, movimentos: List[Movimento]) -> Dict[uuid.UUID, int]:
+        """
+        Devolve ao estoque os itens de uma venda cancelada ou estornada.
+
+        Também usa um único UPDATE ... RETURNING para todos os produtos.
+        Não faz commit.
+
+        Returns:
+            Saldo final de cada produto devolvido
+        """
+        totais = self._totais(movimentos)
+        if not totais:
+            return {}
+
+        quantidade = case(totais, value=EstoqueSaldo.produto_id)
+        stmt = (
+            update(EstoqueSaldo)
+            .where(EstoqueSaldo.produto_id.in_(totais.keys()))
+            .values(saldo=EstoqueSaldo.saldo + quantidade, data_atualizacao=datetime.now(timezone.utc))
+            .returning(EstoqueSaldo.produto_id, EstoqueSaldo.saldo)
+            .execution_options(synchronize_session=False)
+        )
+        saldos = {produto_id: saldo for produto_id, saldo in db.execute(stmt)}
+
+        self._registrar_movimentos(db, movimentos, saldos, TipoMovimentacaoEstoque.ESTORNO_VENDA, 1)
+        return saldos
+
+    def registrar_entrada(
+        self,
+        db: Session,
+        produto_id: uuid.UUID,
+        quantidade: int,
+        tipo: TipoMovimentacaoEstoque = TipoMovimentacaoEstoque.ENTRADA,
+        observacao: Optional[str] = None
+    ) -> int:
+        """
+        Soma uma quantidade ao saldo do produto (criando-o se preciso) e registra no razão.
+
+        Returns:
+            Saldo após a entrada
+        """
+        try:
+            stmt = self._insert(db)(EstoqueSaldo).values(produto_id=produto_id, saldo=quantidade)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[EstoqueSaldo.produto_id],
+                set_={
+                    "saldo": EstoqueSaldo.saldo + stmt.excluded.saldo,
+                    "data_atualizacao": datetime.now(timezone.utc)
+                }
+            ).returning(EstoqueSaldo.saldo)
+            saldo = db.execute(stmt).scalar()
+
+            db.add(MovimentacaoEstoque(
+                produto_id=produto_id,
+                tipo=tipo,
+                quantidade=quantidade,
+                saldo_apos=saldo,
+                observacao=observacao
+            ))
+            db.commit()
+            return saldo
+
+        except Exception as e:
+            db.rollback()
+            raise e
+
+    def get_saldo(self, db: Session, produto_id: uuid.UUID) -> Optional[int]:
+        """Saldo atual do produto (None se o estoque não é controlado)"""
+        return db.query(EstoqueSaldo.saldo).filter(EstoqueSaldo.produto_id == produto_id).scalar()
+
+    def get_movimentacoes(self, db: Session, produto_id: uuid.UUID) -> List[MovimentacaoEstoque]:
+        """Razão de movimentações do produto, em ordem cronológica"""
+        return db.query(MovimentacaoEstoque).filter(
+            MovimentacaoEstoque.produto_id == produto_id
+        ).order_by(MovimentacaoEstoque.data_criacao, MovimentacaoEstoque.id).all()
+
+# Instância global do CRUD
+crud_estoque = CRUDEstoque()
@@ -2,56 +2,401 @@
 Operações CRUD para o módulo de vendas (PDV).
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc
-from typing import List, Optional, Dict, Any
-from datetime import datetime, date
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, func, desc, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from typing import List, Optional, Dict, Any, Tuple, Iterator
+from datetime import datetime, date, timedelta, timezone
+from zoneinfo import ZoneInfo
+import base64
+import hashlib
+import json
+import os
 import uuid
 
-from app.models import Venda, ItemVenda, PagamentoVenda, StatusVenda, FormaPagamento
+from app.arquivo_vendas import arquivo_vendas
+from app.crud_caixa import crud_caixa
+from app.catalogo import catalogo_produtos
+from app.crud_estoque import crud_estoque
+from app.database import LOJA_TIMEZONE
+from app.ranking_produtos import ranking_produtos_hoje
+from app.models import (
+    Venda, ItemVenda, PagamentoVenda, StatusVenda, FormaPagamento, SequenciaVenda,
+    VendaResumoDiario, ChaveIdempotencia
+)
 from app.schemas import (
     VendaCreate, VendaUpdate, VendaFilter, ItemVendaCreate, 
     PagamentoVendaCreate, StatusVendaEnum
 )
 
+FUSO_HORARIO_LOJA = ZoneInfo(LOJA_TIMEZONE)
+
+# Validade das chaves de idempotência da criação de vendas
+IDEMPOTENCIA_TTL_HORAS = int(os.getenv("IDEMPOTENCIA_TTL_HORAS", "24"))
+
+class ChaveIdempotenciaDuplicada(Exception):
+    """A chave de idempotência já está associada a outra venda válida"""
+
 class CRUDVenda:
     """Classe para operações CRUD de vendas"""
 
-    def __init__(self):
-        pass
+    # Estratégias de carregamento de itens e pagamentos
+    ESTRATEGIAS_CARREGAMENTO = ("selectin", "joined", "lazy")
+
+    def __init__(self, carregamento_lista: str = "selectin", carregamento_unico: str = "joined"):
+        """
+        Configura como itens e pagamentos são carregados nas leituras.
+
+        - **carregamento_lista**: estratégia das listagens (padrão: selectin,
+          uma consulta extra por relacionamento para a página inteira)
+        - **carregamento_unico**: estratégia das buscas de uma venda (padrão:
+          joined, tudo em uma única consulta)
+        """
+        for estrategia in (carregamento_lista, carregamento_unico):
+            if estrategia not in self.ESTRATEGIAS_CARREGAMENTO:
+                raise ValueError(f"Estratégia de carregamento inválida: {estrategia}")
+        self.carregamento_lista = carregamento_lista
+        self.carregamento_unico = carregamento_unico
+
+    def _opcoes_carregamento(self, estrategia: str) -> list:
+        """Opções de carregamento de itens e pagamentos para a estratégia"""
+        if estrategia == "selectin":
+            return [selectinload(Venda.itens), selectinload(Venda.pagamentos)]
+        if estrategia == "joined":
+            return [joinedload(Venda.itens), joinedload(Venda.pagamentos)]
+        if estrategia == "lazy":
+            return []
+        raise ValueError(f"Estratégia de carregamento inválida: {estrategia}")
+
+    def data_negocio(self, momento: datetime) -> date:
+        """Data de negócio (no fuso horário da loja) de um instante"""
+        return momento.astimezone(FUSO_HORARIO_LOJA).date()
+
+    def _filtrar_periodo(self, query, coluna, data_inicio: Optional[date], data_fim: Optional[date]):
+        """Aplica o intervalo semiaberto [data_inicio, data_fim + 1 dia) sobre uma coluna de data"""
+        if data_inicio:
+            query = query.filter(coluna >= data_inicio)
+        if data_fim:
+            query = query.filter(coluna < data_fim + timedelta(days=1))
+        return query
+
+    def _insert(self, db: Session):
+        """Retorna o construtor de INSERT do dialeto (suporta ON CONFLICT)"""
+        if db.get_bind().dialect.name == "postgresql":
+            return postgresql.insert
+        return sqlite.insert
+
+    def alocar_numeros(self, db: Session, dia: date, quantidade: int = 1) -> int:
+        """
+        Reserva `quantidade` números no contador do dia e retorna o último.
+
+        O incremento é um único UPDATE ... RETURNING sobre a linha do dia,
+        que fica bloqueada até o fim da transação; assim dois terminais
+        nunca recebem o mesmo número, em SQLite ou PostgreSQL.
+        """
+        incrementar = (
+            update(SequenciaVenda)
+            .where(SequenciaVenda.data == dia)
+            .values(ultimo_numero=SequenciaVenda.ultimo_numero + quantidade)
+            .returning(SequenciaVenda.ultimo_numero)
+        )
+        ultimo_numero = db.execute(incrementar).scalar()
+
+        if ultimo_numero is None:
+            # Primeira venda do dia: cria o contador partindo das vendas já
+            # numeradas (caso existam) e ignora a criação concorrente
+            existentes = db.query(func.count(Venda.id)).filter(
+                Venda.numero_venda.like(f"{dia.strftime('%Y%m%d')}-%"),
+                Venda.data_venda.between(dia - timedelta(days=1), dia + timedelta(days=1))
+            ).scalar()
+            db.execute(
+                self._insert(db)(SequenciaVenda)
+                .values(data=dia, ultimo_numero=existentes)
+                .on_conflict_do_nothing(index_elements=[SequenciaVenda.data])
+            )
+            ultimo_numero = db.execute(incrementar).scalar()
+
+        return ultimo_numero
+
+    def formatar_numero_venda(self, dia: date, sequencial: int) -> str:
+        """Formata o número da venda: YYYYMMDD-NNNN"""
+        return f"{dia.strftime('%Y%m%d')}-{sequencial:04d}"
+
+    def data_do_numero(self, numero_venda: str) -> Optional[date]:
+        """Dia codificado no número da venda (YYYYMMDD-NNNN), se o número seguir o formato"""
+        try:
+            return datetime.strptime(numero_venda.split("-", 1)[0], "%Y%m%d").date()
+        except ValueError:
+            return None
 
     def gerar_numero_venda(self, db: Session) -> str:
         """Gera um número único para a venda"""
-        # Busca o último número de venda do dia
-        hoje = datetime.now().date()
-        ultimo_numero = db.query(Venda).filter(
-            func.date(Venda.data_criacao) == hoje
-        ).count()
+        hoje = self.data_negocio(datetime.now(timezone.utc))
+        return self.formatar_numero_venda(hoje, self.alocar_numeros(db, hoje))
+
+    def _acumular_resumo(
+        self,
+        deltas: Dict[tuple, List[int]],
+        dia: date,
+        status: StatusVenda,
+        vendedor_id: Optional[uuid.UUID],
+        total_venda: int,
+        pagamentos: List[Tuple[FormaPagamento, int]],
+        sinal: int = 1
+    ) -> None:
+        """Acumula em `deltas` a contribuição de uma venda para o resumo diário"""
+        vendedor = vendedor_id or VendaResumoDiario.SEM_VENDEDOR
+        contribuicoes = [(VendaResumoDiario.FORMA_TOTAL, total_venda)]
+        contribuicoes += [(forma.value, valor) for forma, valor in pagamentos]
+
+        for forma, valor in contribuicoes:
+            acumulado = deltas.setdefault((dia, status, forma, vendedor), [0, 0])
+            acumulado[0] += sinal
+            acumulado[1] += sinal * valor
+
+    def _gravar_resumo(self, db: Session, deltas: Dict[tuple, List[int]], bloco: int = 500) -> None:
+        """Aplica os deltas acumulados ao resumo diário com upserts em lote"""
+        linhas = [
+            {
+                "data": dia,
+                "status": status,
+                "forma_pagamento": forma,
+                "vendedor_id": vendedor,
+                "quantidade": quantidade,
+                "valor": valor
+            }
+            for (dia, status, forma, vendedor), (quantidade, valor) in deltas.items()
+        ]
+
+        for inicio in range(0, len(linhas), bloco):
+            stmt = self._insert(db)(VendaResumoDiario).values(linhas[inicio:inicio + bloco])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[
+                    VendaResumoDiario.data,
+                    VendaResumoDiario.status,
+                    VendaResumoDiario.forma_pagamento,
+                    VendaResumoDiario.vendedor_id
+                ],
+                set_={
+                    "quantidade": VendaResumoDiario.quantidade + stmt.excluded.quantidade,
+                    "valor": VendaResumoDiario.valor + stmt.excluded.valor
+                }
+            )
+            db.execute(stmt)
+
+    def _movimentos_estoque(self, venda_id: uuid.UUID, itens) -> List[Tuple[uuid.UUID, uuid.UUID, int]]:
+        """Movimentos de estoque (venda, produto, quantidade) dos itens da venda"""
+        return [(venda_id, item.produto_id, item.quantidade) for item in itens]
+
+    def _alterar_status(self, db: Session, db_obj: Venda, novo_status: StatusVenda) -> None:
+        """
+        Altera o status da venda, movendo sua contribuição no resumo diário.
+
+        Uma venda que deixa de estar concluída devolve seus itens ao
+        estoque; uma que passa a estar concluída dá baixa neles. Os totais
+        de uma sessão de caixa já fechada não mudam: a venda passa para a
+        sessão aberta do mesmo terminal, que recebe só o novo status (sem
+        caixa aberto no terminal, lança CaixaNaoAberto).
+        """
+        if db_obj.status == novo_status:
+            return
+
+        movimentos = self._movimentos_estoque(db_obj.id, db_obj.itens)
+        if db_obj.status == StatusVenda.CONCLUIDA:
+            crud_estoque.devolver(db, movimentos)
+        elif novo_status == StatusVenda.CONCLUIDA:
+            crud_estoque.baixar(db, movimentos)
+
+        deltas = {}
+        dia = db_obj.data_venda
+        pagamentos = [(pagamento.forma_pagamento, pagamento.valor_pago) for pagamento in db_obj.pagamentos]
+        self._acumular_resumo(
+            deltas, dia, db_obj.status, db_obj.vendedor_id, db_obj.total_venda, pagamentos, sinal=-1
+        )
+        self._acumular_resumo(
+            deltas, dia, novo_status, db_obj.vendedor_id, db_obj.total_venda, pagamentos
+        )
+        self._gravar_resumo(db, deltas)
+
+        # Totais da sessão de caixa vigente, que precisa estar aberta
+        caixa = {}
+        pagamentos_caixa = [
+            (pagamento.forma_pagamento, pagamento.valor_pago, pagamento.troco) for pagamento in db_obj.pagamentos
+        ]
+        sessao_caixa_id = crud_caixa.sessao_vigente(db, db_obj.sessao_caixa_id)
+        if sessao_caixa_id == db_obj.sessao_caixa_id:
+            crud_caixa.acumular(
+                caixa, sessao_caixa_id, db_obj.status, db_obj.total_venda, pagamentos_caixa, sinal=-1
+            )
+        crud_caixa.acumular(caixa, sessao_caixa_id, novo_status, db_obj.total_venda, pagamentos_caixa)
+        crud_caixa.gravar(db, caixa, exigir_aberta=True)
+        db_obj.sessao_caixa_id = sessao_caixa_id
+        db_obj.status = novo_status
+
+    def calcular_totais(self, obj_in: VendaCreate) -> tuple[int, int]:
+        """Calcula subtotal e total da venda, validando os pagamentos"""
+        subtotal = sum(
+            item.quantidade * item.preco_unitario - item.desconto_item 
+            for item in obj_in.itens
+        )
+        total_venda = subtotal - obj_in.desconto_total
+        
+        # Valida se o total dos pagamentos corresponde ao total da venda
+        total_pagamentos = sum(pagamento.valor_pago for pagamento in obj_in.pagamentos)
+        if total_pagamentos != total_venda:
+            raise ValueError(f"Total dos pagamentos ({total_pagamentos}) não corresponde ao total da venda ({total_venda})")
+
+        return subtotal, total_venda
+
+    def buscar_produtos(self, db: Session, vendas: List[VendaCreate]) -> Dict[uuid.UUID, dict]:
+        """Snapshot dos produtos de todas as vendas, em uma única consulta ao catálogo"""
+        return catalogo_produtos.buscar(
+            db, [item.produto_id for obj_in in vendas for item in obj_in.itens]
+        )
+
+    def _dados_itens(
+        self, venda_id: uuid.UUID, data_venda: date, obj_in: VendaCreate, produtos: Dict[uuid.UUID, dict]
+    ) -> List[Dict[str, Any]]:
+        """Monta os dados dos itens da venda com o snapshot dos produtos"""
+        return [self._dados_item(venda_id, data_venda, item_data, produtos) for item_data in obj_in.itens]
+
+    def _dados_item(
+        self, venda_id: uuid.UUID, data_venda: date, item_data: ItemVendaCreate, produtos: Dict[uuid.UUID, dict]
+    ) -> Dict[str, Any]:
+        """Monta os dados de um item com o snapshot do produto"""
+        subtotal_item = item_data.quantidade * item_data.preco_unitario - item_data.desconto_item
+        # Produto fora do catálogo: mantém o item com um nome genérico
+        snapshot = produtos.get(item_data.produto_id) or {
+            "nome_produto": f"Produto {item_data.produto_id}",
+            "codigo_barras": None,
+            "sku": None
+        }
         
-        # Formato: YYYYMMDD-NNNN
-        numero = f"{hoje.strftime('%Y%m%d')}-{(ultimo_numero + 1):04d}"
-        return numero
+        return {
+            "id": uuid.uuid4(),
+            "venda_id": venda_id,
+            "data_venda": data_venda,
+            "produto_id": item_data.produto_id,
+            "quantidade": item_data.quantidade,
+            "preco_unitario": item_data.preco_unitario,
+            "desconto_item": item_data.desconto_item,
+            "subtotal_item": subtotal_item,
+            **snapshot
+        }
 
-    def create(self, db: Session, obj_in: VendaCreate) -> Venda:
-        """Cria uma nova venda com itens e pagamentos"""
+    def _dados_pagamentos(
+        self, venda_id: uuid.UUID, data_venda: date, obj_in: VendaCreate
+    ) -> List[Dict[str, Any]]:
+        """Monta os dados dos pagamentos da venda, calculando o troco"""
+        pagamentos = []
+        for pagamento_data in obj_in.pagamentos:
+            forma_pagamento = FormaPagamento(pagamento_data.forma_pagamento.value)
+            troco = 0
+            if (forma_pagamento == FormaPagamento.DINHEIRO and 
+                pagamento_data.valor_recebido):
+                troco = pagamento_data.valor_recebido - pagamento_data.valor_pago
+
+            pagamentos.append({
+                "id": uuid.uuid4(),
+                "venda_id": venda_id,
+                "data_venda": data_venda,
+                "forma_pagamento": forma_pagamento,
+                "valor_pago": pagamento_data.valor_pago,
+                "valor_recebido": pagamento_data.valor_recebido,
+                "troco": troco,
+                "numero_transacao": pagamento_data.numero_transacao,
+                "numero_autorizacao": pagamento_data.numero_autorizacao
+            })
+        return pagamentos
+
+    def _pagamentos_caixa(self, dados_pagamentos: List[Dict[str, Any]]) -> List[Tuple[FormaPagamento, int, int]]:
+        """Pagamentos (forma, valor pago, troco) para os totais da sessão de caixa"""
+        return [
+            (dados["forma_pagamento"], dados["valor_pago"], dados["troco"])
+            for dados in dados_pagamentos
+        ]
+
+    def _itens_ranking(self, dados_itens: List[Dict[str, Any]]) -> List[tuple]:
+        """Itens (produto, quantidade, subtotal, nome) para o ranking de produtos do dia"""
+        return [
+            (dados["produto_id"], dados["quantidade"], dados["subtotal_item"], dados["nome_produto"])
+            for dados in dados_itens
+        ]
+
+    def hash_requisicao(self, obj_in: VendaCreate) -> str:
+        """SHA-256 do corpo da venda, para detectar chaves reutilizadas com outro conteúdo"""
+        return hashlib.sha256(obj_in.model_dump_json().encode()).hexdigest()
+
+    def _registrar_chave_idempotencia(
+        self, db: Session, chave: str, venda_id: uuid.UUID, obj_in: VendaCreate, agora: datetime
+    ) -> None:
+        """
+        Associa a chave à venda na transação da venda.
+
+        Uma chave expirada é reaproveitada; uma chave válida gera
+        ChaveIdempotenciaDuplicada (e a venda é desfeita).
+        """
+        stmt = self._insert(db)(ChaveIdempotencia).values(
+            chave=chave,
+            venda_id=venda_id,
+            hash_requisicao=self.hash_requisicao(obj_in),
+            data_criacao=agora,
+            expira_em=agora + timedelta(hours=IDEMPOTENCIA_TTL_HORAS)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ChaveIdempotencia.chave],
+            set_={
+                "venda_id": stmt.excluded.venda_id,
+                "hash_requisicao": stmt.excluded.hash_requisicao,
+                "resposta": None,
+                "data_criacao": stmt.excluded.data_criacao,
+                "expira_em": stmt.excluded.expira_em
+            },
+            where=ChaveIdempotencia.expira_em <= agora
+        ).returning(ChaveIdempotencia.chave)
+
+        if db.execute(stmt).scalar() is None:
+            raise ChaveIdempotenciaDuplicada(chave)
+
+    def create(
+        self,
+        db: Session,
+        obj_in: VendaCreate,
+        chave_idempotencia: Optional[str] = None,
+        exigir_caixa_aberto: bool = True
+    ) -> Venda:
+        """
+        Cria uma nova venda com itens e pagamentos.
+
+        A baixa de estoque ocorre na mesma transação, depois da reserva do
+        número da venda (cujo bloqueio ordena as vendas concorrentes); se
+        algum produto controlado não tiver saldo, a venda inteira é desfeita
+        e um ValueError é lançado. Com `chave_idempotencia`, a chave é
+        gravada junto com a venda. A sessão de caixa informada precisa
+        estar aberta; com `exigir_caixa_aberto=False` (vendas offline), a
+        venda de uma sessão já fechada vai para a sessão aberta do terminal.
+        """
         try:
             # Calcula totais
-            subtotal = sum(
-                item.quantidade * item.preco_unitario - item.desconto_item 
-                for item in obj_in.itens
-            )
-            total_venda = subtotal - obj_in.desconto_total
-            
-            # Valida se o total dos pagamentos corresponde ao total da venda
-            total_pagamentos = sum(pagamento.valor_pago for pagamento in obj_in.pagamentos)
-            if total_pagamentos != total_venda:
-                raise ValueError(f"Total dos pagamentos ({total_pagamentos}) não corresponde ao total da venda ({total_venda})")
+            subtotal, total_venda = self.calcular_totais(obj_in)
+            crud_caixa.validar_sessao_venda(obj_in.sessao_caixa_id)
+            sessao_caixa_id = obj_in.sessao_caixa_id
+            if not exigir_caixa_aberto:
+                sessao_caixa_id = crud_caixa.sessao_vigente(db, sessao_caixa_id)
+            produtos = self.buscar_produtos(db, [obj_in])
+            versao_ranking = ranking_produtos_hoje.versao()
 
             # Cria a venda
+            agora = datetime.now(timezone.utc)
+            hoje = self.data_negocio(agora)
             db_venda = Venda(
-                numero_venda=self.gerar_numero_venda(db),
+                numero_venda=self.formatar_numero_venda(hoje, self.alocar_numeros(db, hoje)),
+                data_criacao=agora,
+                data_venda=hoje,
                 cliente_id=obj_in.cliente_id,
                 vendedor_id=obj_in.vendedor_id,
+                sessao_caixa_id=sessao_caixa_id,
                 subtotal=subtotal,
                 desconto_total=obj_in.desconto_total,
                 total_venda=total_venda,
@@ -63,44 +408,38 @@ class CRUDVenda:
             db.add(db_venda)
             db.flush()  # Para obter o ID da venda
 
-            # Cria os itens da venda
-            for item_data in obj_in.itens:
-                # Aqui deveria buscar os dados do produto para fazer snapshot
-                # Por simplicidade, vamos usar dados básicos
-                subtotal_item = item_data.quantidade * item_data.preco_unitario - item_data.desconto_item
-                
-                db_item = ItemVenda(
-                    venda_id=db_venda.id,
-                    produto_id=item_data.produto_id,
-                    quantidade=item_data.quantidade,
-                    preco_unitario=item_data.preco_unitario,
-                    desconto_item=item_data.desconto_item,
-                    subtotal_item=subtotal_item,
-                    nome_produto=f"Produto {item_data.produto_id}",  # Deveria vir do banco
-                    codigo_barras=None,  # Deveria vir do banco
-                    sku=None  # Deveria vir do banco
-                )
-                db.add(db_item)
-
-            # Cria os pagamentos da venda
-            for pagamento_data in obj_in.pagamentos:
-                troco = 0
-                if (pagamento_data.forma_pagamento == FormaPagamento.DINHEIRO and 
-                    pagamento_data.valor_recebido):
-                    troco = pagamento_data.valor_recebido - pagamento_data.valor_pago
-
-                db_pagamento = PagamentoVenda(
-                    venda_id=db_venda.id,
-                    forma_pagamento=pagamento_data.forma_pagamento,
-                    valor_pago=pagamento_data.valor_pago,
-                    valor_recebido=pagamento_data.valor_recebido,
-                    troco=troco,
-                    numero_transacao=pagamento_data.numero_transacao,
-                    numero_autorizacao=pagamento_data.numero_autorizacao
-                )
-                db.add(db_pagamento)
+            if chave_idempotencia:
+                self._registrar_chave_idempotencia(db, chave_idempotencia, db_venda.id, obj_in, agora)
+
+            # Cria os itens e pagamentos da venda
+            dados_pagamentos = self._dados_pagamentos(db_venda.id, hoje, obj_in)
+            dados_itens = self._dados_itens(db_venda.id, hoje, obj_in, produtos)
+            for dados_item in dados_itens:
+                db.add(ItemVenda(**dados_item))
+            for dados_pagamento in dados_pagamentos:
+                db.add(PagamentoVenda(**dados_pagamento))
+
+            # Baixa o estoque de todos os itens com um único UPDATE condicional
+            crud_estoque.baixar(db, self._movimentos_estoque(db_venda.id, obj_in.itens))
+
+            # Atualiza o resumo diário na mesma transação
+            deltas = {}
+            self._acumular_resumo(
+                deltas, hoje, StatusVenda.CONCLUIDA, obj_in.vendedor_id, total_venda,
+                [(dados["forma_pagamento"], dados["valor_pago"]) for dados in dados_pagamentos]
+            )
+            self._gravar_resumo(db, deltas)
+
+            # Soma a venda aos totais da sessão de caixa, que precisa estar aberta
+            caixa = {}
+            crud_caixa.acumular(
+                caixa, sessao_caixa_id, StatusVenda.CONCLUIDA, total_venda,
+                self._pagamentos_caixa(dados_pagamentos)
+            )
+            crud_caixa.gravar(db, caixa, exigir_aberta=True)
 
             db.commit()
+            ranking_produtos_hoje.acumular(hoje, self._itens_ranking(dados_itens), versao_ranking)
             db.refresh(db_venda)
             return db_venda
 
@@ -108,30 +447,171 @@ class CRUDVenda:
             db.rollback()
             raise e
 
-    def get(self, db: Session, id: uuid.UUID) -> Optional[Venda]:
+    def create_lote(
+        self,
+        db: Session,
+        vendas: List[VendaCreate],
+        tamanho_commit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """
+        Cria várias vendas de uma vez (sincronização de terminais offline).
+
+        Cada bloco de `tamanho_commit` vendas reserva seus números com um único
+        incremento do contador do dia e grava vendas, itens e pagamentos com
+        INSERTs em lote (executemany), atualizando o resumo diário com um único
+        upsert; o snapshot dos produtos do bloco vem de uma única consulta ao
+        catálogo e a baixa de estoque do bloco é um único UPDATE condicional.
+        Se um bloco falhar, ele é reprocessado venda a venda, de modo que uma
+        venda inválida não derruba o lote. Vendas de uma sessão de caixa já
+        fechada entram na sessão aberta do mesmo terminal. Retorna o
+        resultado de cada venda, na ordem recebida.
+        """
+        resultados: List[Optional[Dict[str, Any]]] = [None] * len(vendas)
+
+        # Valida todas as vendas antes de gravar
+        validas = []
+        for indice, obj_in in enumerate(vendas):
+            try:
+                subtotal, total_venda = self.calcular_totais(obj_in)
+                crud_caixa.validar_sessao_venda(obj_in.sessao_caixa_id)
+                validas.append((indice, obj_in, subtotal, total_venda))
+            except ValueError as e:
+                resultados[indice] = {"indice": indice, "sucesso": False, "erro": str(e)}
+
+        for inicio in range(0, len(validas), tamanho_commit):
+            bloco = validas[inicio:inicio + tamanho_commit]
+            try:
+                agora = datetime.now(timezone.utc)
+                hoje = self.data_negocio(agora)
+                produtos = self.buscar_produtos(db, [obj_in for _, obj_in, _, _ in bloco])
+                versao_ranking = ranking_produtos_hoje.versao()
+                ultimo_numero = self.alocar_numeros(db, hoje, len(bloco))
+                primeiro_numero = ultimo_numero - len(bloco) + 1
+
+                dados_vendas, dados_itens, dados_pagamentos, movimentos = [], [], [], []
+                deltas, caixa, sessoes = {}, {}, {}
+                for posicao, (indice, obj_in, subtotal, total_venda) in enumerate(bloco):
+                    if obj_in.sessao_caixa_id not in sessoes:
+                        sessoes[obj_in.sessao_caixa_id] = crud_caixa.sessao_vigente(db, obj_in.sessao_caixa_id)
+                    sessao_caixa_id = sessoes[obj_in.sessao_caixa_id]
+                    venda_id = uuid.uuid4()
+                    numero_venda = self.formatar_numero_venda(hoje, primeiro_numero + posicao)
+                    dados_vendas.append({
+                        "id": venda_id,
+                        "numero_venda": numero_venda,
+                        "data_criacao": agora,
+                        "data_venda": hoje,
+                        "cliente_id": obj_in.cliente_id,
+                        "vendedor_id": obj_in.vendedor_id,
+                        "sessao_caixa_id": sessao_caixa_id,
+                        "subtotal": subtotal,
+                        "desconto_total": obj_in.desconto_total,
+                        "total_venda": total_venda,
+                        "status": StatusVenda.CONCLUIDA,
+                        "observacoes": obj_in.observacoes,
+                        "criado_por": obj_in.criado_por
+                    })
+                    pagamentos_venda = self._dados_pagamentos(venda_id, hoje, obj_in)
+                    dados_itens.extend(self._dados_itens(venda_id, hoje, obj_in, produtos))
+                    dados_pagamentos.extend(pagamentos_venda)
+                    movimentos.extend(self._movimentos_estoque(venda_id, obj_in.itens))
+                    self._acumular_resumo(
+                        deltas, hoje, StatusVenda.CONCLUIDA, obj_in.vendedor_id, total_venda,
+                        [(dados["forma_pagamento"], dados["valor_pago"]) for dados in pagamentos_venda]
+                    )
+                    crud_caixa.acumular(
+                        caixa, sessao_caixa_id, StatusVenda.CONCLUIDA, total_venda,
+                        self._pagamentos_caixa(pagamentos_venda)
+                    )
+                    resultados[indice] = {
+                        "indice": indice,
+                        "sucesso": True,
+                        "venda_id": venda_id,
+                        "numero_venda": numero_venda
+                    }
+
+                db.execute(insert(Venda), dados_vendas)
+                db.execute(insert(ItemVenda), dados_itens)
+                db.execute(insert(PagamentoVenda), dados_pagamentos)
+                crud_estoque.baixar(db, movimentos)
+                self._gravar_resumo(db, deltas)
+                crud_caixa.gravar(db, caixa, exigir_aberta=True)
+                db.commit()
+                ranking_produtos_hoje.acumular(hoje, self._itens_ranking(dados_itens), versao_ranking)
+
+            except Exception:
+                db.rollback()
+                # Reprocessa o bloco venda a venda para isolar a falha
+                for indice, obj_in, _, _ in bloco:
+                    try:
+                        db_venda = self.create(db, obj_in, exigir_caixa_aberto=False)
+                        resultados[indice] = {
+                            "indice": indice,
+                            "sucesso": True,
+                            "venda_id": db_venda.id,
+                            "numero_venda": db_venda.numero_venda
+                        }
+                    except Exception as e:
+                        resultados[indice] = {"indice": indice, "sucesso": False, "erro": str(e)}
+
+        return resultados
+
+    def get(self, db: Session, id: uuid.UUID, carregamento: Optional[str] = None) -> Optional[Venda]:
         """Busca uma venda por ID"""
-        return db.query(Venda).filter(Venda.id == id).first()
+        return db.query(Venda).options(
+            *self._opcoes_carregamento(carregamento or self.carregamento_unico)
+        ).filter(Venda.id == id).first()
 
-    def get_by_numero(self, db: Session, numero_venda: str) -> Optional[Venda]:
+    def get_by_numero(
+        self, db: Session, numero_venda: str, carregamento: Optional[str] = None
+    ) -> Optional[Venda]:
         """Busca uma venda por número"""
-        return db.query(Venda).filter(Venda.numero_venda == numero_venda).first()
+        query = db.query(Venda).options(
+            *self._opcoes_carregamento(carregamento or self.carregamento_unico)
+        ).filter(Venda.numero_venda == numero_venda)
+        dia = self.data_do_numero(numero_venda)
+        if dia:
+            # Restringe às partições do dia do número (com folga de um dia para
+            # vendas numeradas antes de data_venda existir, em outro fuso)
+            query = query.filter(Venda.data_venda.between(dia - timedelta(days=1), dia + timedelta(days=1)))
+        return query.first()
+
+    def codificar_cursor(self, venda: Venda) -> str:
+        """Gera o cursor opaco que aponta para depois da venda informada"""
+        posicao = {"data_criacao": venda.data_criacao.isoformat(), "id": str(venda.id)}
+        return base64.urlsafe_b64encode(json.dumps(posicao).encode()).decode()
+
+    def decodificar_cursor(self, cursor: str) -> tuple[datetime, uuid.UUID]:
+        """Lê o cursor gerado por codificar_cursor"""
+        try:
+            posicao = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return datetime.fromisoformat(posicao["data_criacao"]), uuid.UUID(posicao["id"])
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError("Cursor de paginação inválido") from e
 
     def get_multi(
         self, 
         db: Session, 
         skip: int = 0, 
         limit: int = 100,
-        filtros: Optional[VendaFilter] = None
-    ) -> tuple[List[Venda], int]:
-        """Lista vendas com filtros e paginação"""
+        filtros: Optional[VendaFilter] = None,
+        cursor: Optional[str] = None,
+        contar_total: bool = True,
+        carregamento: Optional[str] = None
+    ) -> tuple[List[Venda], Optional[int]]:
+        """
+        Lista vendas com filtros e paginação.
+
+        Com `cursor`, a paginação é por chave (keyset): busca as vendas
+        seguintes à posição do cursor na ordem (data_criacao DESC, id DESC),
+        ignorando `skip`, de modo que qualquer página custa o mesmo. Com
+        `contar_total=False` o total não é calculado e retorna None.
+        """
         query = db.query(Venda)
 
         # Aplica filtros
         if filtros:
-            if filtros.data_inicio:
-                query = query.filter(func.date(Venda.data_criacao) >= filtros.data_inicio)
-            if filtros.data_fim:
-                query = query.filter(func.date(Venda.data_criacao) <= filtros.data_fim)
+            query = self._filtrar_periodo(query, Venda.data_venda, filtros.data_inicio, filtros.data_fim)
             if filtros.cliente_id:
                 query = query.filter(Venda.cliente_id == filtros.cliente_id)
             if filtros.vendedor_id:
@@ -142,76 +622,137 @@ class CRUDVenda:
                 query = query.filter(Venda.numero_venda.ilike(f"%{filtros.numero_venda}%"))
 
         # Conta total de registros
-        total = query.count()
+        total = query.count() if contar_total else None
+
+        # Aplica ordenação, paginação e carregamento de itens e pagamentos
+        query = query.options(
+            *self._opcoes_carregamento(carregamento or self.carregamento_lista)
+        ).order_by(desc(Venda.data_criacao), desc(Venda.id))
+        if cursor:
+            data_cursor, id_cursor = self.decodificar_cursor(cursor)
+            query = query.filter(
+                or_(
+                    Venda.data_criacao < data_cursor,
+                    and_(Venda.data_criacao == data_cursor, Venda.id < id_cursor)
+                )
+            )
+        else:
+            query = query.offset(skip)
 
-        # Aplica ordenação e paginação
-        vendas = query.order_by(desc(Venda.data_criacao)).offset(skip).limit(limit).all()
+        vendas = query.limit(limit).all()
 
         return vendas, total
 
+    def iterar_vendas(
+        self,
+        db: Session,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None,
+        tamanho_lote: int = 500
+    ) -> Iterator[Venda]:
+        """
+        Percorre as vendas do período com itens e pagamentos, em lotes.
+
+        Usa um cursor no servidor (stream_results + yield_per): apenas um
+        lote de vendas fica em memória por vez, com itens e pagamentos
+        carregados por lote (selectin), qualquer que seja o tamanho do período.
+        """
+        query = db.query(Venda).options(*self._opcoes_carregamento("selectin"))
+        query = self._filtrar_periodo(query, Venda.data_venda, data_inicio, data_fim)
+        query = query.order_by(Venda.data_criacao, Venda.id).execution_options(
+            stream_results=True
+        ).yield_per(tamanho_lote)
+
+        for venda in query:
+            yield venda
+
     def update(self, db: Session, db_obj: Venda, obj_in: VendaUpdate) -> Venda:
         """Atualiza uma venda"""
         update_data = obj_in.dict(exclude_unset=True)
         
-        for field, value in update_data.items():
-            if field == "status" and value:
-                setattr(db_obj, field, StatusVenda(value.value))
-            else:
-                setattr(db_obj, field, value)
+        try:
+            for field, value in update_data.items():
+                if field == "status" and value:
+                    self._alterar_status(db, db_obj, StatusVenda(value.value))
+                else:
+                    setattr(db_obj, field, value)
 
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+            db.add(db_obj)
+            db.commit()
+            if "status" in update_data:
+                # A venda pode ter entrado ou saído do ranking de produtos do dia
+                ranking_produtos_hoje.invalidar()
+            db.refresh(db_obj)
+            return db_obj
+
+        except Exception as e:
+            db.rollback()
+            raise e
 
     def delete(self, db: Session, id: uuid.UUID) -> Optional[Venda]:
         """Remove uma venda (soft delete - muda status para cancelada)"""
         db_obj = self.get(db, id)
         if db_obj:
-            db_obj.status = StatusVenda.CANCELADA
-            db.add(db_obj)
-            db.commit()
-            db.refresh(db_obj)
+            try:
+                self._alterar_status(db, db_obj, StatusVenda.CANCELADA)
+                db.add(db_obj)
+                db.commit()
+                ranking_produtos_hoje.invalidar()
+                db.refresh(db_obj)
+            except Exception as e:
+                db.rollback()
+                raise e
         return db_obj
 
     def get_resumo_vendas(
         self, 
         db: Session, 
         data_inicio: Optional[date] = None,
-        data_fim: Optional[date] = None
+        data_fim: Optional[date] = None,
+        vendedor_id: Optional[uuid.UUID] = None
     ) -> Dict[str, Any]:
-        """Gera resumo de vendas por período"""
-        query = db.query(Venda).filter(Venda.status == StatusVenda.CONCLUIDA)
+        """
+        Gera resumo de vendas por período.
 
-        if data_inicio:
-            query = query.filter(func.date(Venda.data_criacao) >= data_inicio)
-        if data_fim:
-            query = query.filter(func.date(Venda.data_criacao) <= data_fim)
+        Lê o resumo diário (vendas_resumo_diario) em uma única consulta
+        agrupada por status e forma de pagamento, que devolve poucas
+        linhas independentemente do volume de vendas. Totais, ticket
+        médio e a distribuição por forma de pagamento (quantidade de
+        pagamentos e soma de valor_pago) consideram apenas as vendas
+        concluídas.
+        """
+        query = db.query(
+            VendaResumoDiario.status,
+            VendaResumoDiario.forma_pagamento,
+            func.sum(VendaResumoDiario.quantidade),
+            func.sum(VendaResumoDiario.valor)
+        )
 
-        vendas = query.all()
-        
-        if not vendas:
-            return {
-                "total_vendas": 0,
-                "valor_total": 0,
-                "ticket_medio": 0.0,
-                "vendas_por_status": {},
-                "vendas_por_forma_pagamento": {}
-            }
+        query = self._filtrar_periodo(query, VendaResumoDiario.data, data_inicio, data_fim)
+        if vendedor_id:
+            query = query.filter(VendaResumoDiario.vendedor_id == vendedor_id)
 
-        total_vendas = len(vendas)
-        valor_total = sum(venda.total_venda for venda in vendas)
-        ticket_medio = valor_total / total_vendas if total_vendas > 0 else 0
+        linhas = query.group_by(VendaResumoDiario.status, VendaResumoDiario.forma_pagamento).all()
 
-        # Vendas por status
+        total_vendas = 0
+        valor_total = 0
         vendas_por_status = {}
-        for status in StatusVenda:
-            count = len([v for v in vendas if v.status == status])
-            if count > 0:
-                vendas_por_status[status.value] = count
-
-        # Vendas por forma de pagamento (seria necessário fazer join com pagamentos)
         vendas_por_forma_pagamento = {}
+        for status, forma_pagamento, quantidade, valor in linhas:
+            if not quantidade:
+                continue
+            if forma_pagamento == VendaResumoDiario.FORMA_TOTAL:
+                vendas_por_status[status.value] = int(quantidade)
+                if status == StatusVenda.CONCLUIDA:
+                    total_vendas = int(quantidade)
+                    valor_total = int(valor)
+            elif status == StatusVenda.CONCLUIDA:
+                vendas_por_forma_pagamento[forma_pagamento] = {
+                    "quantidade": int(quantidade),
+                    "valor_total": int(valor)
+                }
+
+        ticket_medio = valor_total / total_vendas if total_vendas > 0 else 0.0
 
         return {
             "total_vendas": total_vendas,
@@ -221,9 +762,213 @@ class CRUDVenda:
             "vendas_por_forma_pagamento": vendas_por_forma_pagamento
         }
 
-    def buscar_vendas_cliente(self, db: Session, cliente_id: uuid.UUID) -> List[Venda]:
+    def get_ranking_vendedores(
+        self,
+        db: Session,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None,
+        limite: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Ranking de vendedores por valor vendido no período (vendas concluídas).
+
+        Uma única consulta agrupa as vendas por vendedor e dia e, com funções
+        de janela, calcula os totais de cada vendedor e sua posição
+        (DENSE_RANK por valor total; empates dividem a posição). Lê apenas
+        o índice (status, data_venda, vendedor_id, total_venda). Com
+        `limite`, retorna no máximo `limite` vendedores: o corte segue o
+        valor total e, nos empates, o vendedor_id.
+        """
+        diario = db.query(
+            Venda.vendedor_id.label("vendedor_id"),
+            Venda.data_venda.label("data"),
+            func.count().label("quantidade"),
+            func.sum(Venda.total_venda).label("valor")
+        ).filter(
+            Venda.status == StatusVenda.CONCLUIDA,
+            Venda.vendedor_id.isnot(None)
+        )
+        diario = self._filtrar_periodo(diario, Venda.data_venda, data_inicio, data_fim)
+        diario = diario.group_by(Venda.vendedor_id, Venda.data_venda).subquery("diario")
+
+        por_vendedor = db.query(
+            diario,
+            func.sum(diario.c.quantidade).over(partition_by=diario.c.vendedor_id).label("total_vendas"),
+            func.sum(diario.c.valor).over(partition_by=diario.c.vendedor_id).label("valor_total")
+        ).subquery("por_vendedor")
+
+        ranking = db.query(
+            por_vendedor,
+            func.dense_rank().over(order_by=por_vendedor.c.valor_total.desc()).label("posicao"),
+            # Ordem única por vendedor (as linhas são por vendedor e dia)
+            func.dense_rank().over(
+                order_by=(por_vendedor.c.valor_total.desc(), por_vendedor.c.vendedor_id)
+            ).label("ordem")
+        ).subquery("ranking")
+
+        query = db.query(ranking)
+        if limite:
+            query = query.filter(ranking.c.ordem <= limite)
+        linhas = query.order_by(ranking.c.posicao, ranking.c.vendedor_id, ranking.c.data).all()
+
+        vendedores: Dict[uuid.UUID, Dict[str, Any]] = {}
+        for linha in linhas:
+            vendedor = vendedores.get(linha.vendedor_id)
+            if vendedor is None:
+                total_vendas = int(linha.total_vendas)
+                valor_total = int(linha.valor_total)
+                vendedor = vendedores[linha.vendedor_id] = {
+                    "posicao": linha.posicao,
+                    "vendedor_id": linha.vendedor_id,
+                    "total_vendas": total_vendas,
+                    "valor_total": valor_total,
+                    "ticket_medio": valor_total / total_vendas,
+                    "serie_diaria": []
+                }
+            vendedor["serie_diaria"].append({
+                "data": linha.data,
+                "total_vendas": int(linha.quantidade),
+                "valor_total": int(linha.valor)
+            })
+
+        return list(vendedores.values())
+
+    def _agregar_produtos(self, db: Session, data_inicio: Optional[date], data_fim: Optional[date]):
+        """Consulta agrupada por produto: quantidade, receita e nome dos itens de vendas concluídas"""
+        quantidade = func.sum(ItemVenda.quantidade).label("quantidade")
+        receita = func.sum(ItemVenda.subtotal_item).label("receita")
+        query = db.query(
+            ItemVenda.produto_id,
+            quantidade,
+            receita,
+            func.max(ItemVenda.nome_produto).label("nome_produto")
+        ).join(
+            Venda, and_(Venda.id == ItemVenda.venda_id, Venda.data_venda == ItemVenda.data_venda)
+        ).filter(Venda.status == StatusVenda.CONCLUIDA)
+        # O período vale para as duas tabelas, para descartar partições de ambas
+        query = self._filtrar_periodo(query, Venda.data_venda, data_inicio, data_fim)
+        query = self._filtrar_periodo(query, ItemVenda.data_venda, data_inicio, data_fim)
+        return query.group_by(ItemVenda.produto_id), quantidade, receita
+
+    def get_ranking_produtos(
+        self,
+        db: Session,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None,
+        criterio: str = "quantidade",
+        limite: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Produtos mais vendidos no período (vendas concluídas), por unidades ou receita.
+
+        Uma única consulta soma quantidade e subtotal_item dos itens por
+        produto (índice itens_venda(produto_id, venda_id)) e devolve só as
+        `limite` primeiras posições. O dia corrente é servido do cache
+        ranking_produtos_hoje, incrementado a cada venda criada.
+        """
+        if criterio not in ("quantidade", "receita"):
+            raise ValueError(f"Critério de ranking inválido: {criterio}")
+
+        hoje = self.data_negocio(datetime.now(timezone.utc))
+        if data_inicio == data_fim == hoje:
+            totais = ranking_produtos_hoje.obter(hoje)
+            if totais is None:
+                versao = ranking_produtos_hoje.versao()
+                query, _, _ = self._agregar_produtos(db, hoje, hoje)
+                totais = {
+                    produto_id: [int(quantidade), int(receita), nome_produto]
+                    for produto_id, quantidade, receita, nome_produto in query
+                }
+                ranking_produtos_hoje.carregar(hoje, totais, versao)
+
+            indice = 0 if criterio == "quantidade" else 1
+            linhas = sorted(
+                ((produto_id, *valores) for produto_id, valores in totais.items()),
+                key=lambda linha: (-linha[indice + 1], str(linha[0]))
+            )[:limite]
+        else:
+            query, quantidade, receita = self._agregar_produtos(db, data_inicio, data_fim)
+            metrica = quantidade if criterio == "quantidade" else receita
+            linhas = query.order_by(metrica.desc(), ItemVenda.produto_id).limit(limite).all()
+
+        return [
+            {
+                "posicao": posicao,
+                "produto_id": produto_id,
+                "nome_produto": nome_produto,
+                "quantidade": int(quantidade),
+                "receita": int(receita)
+            }
+            for posicao, (produto_id, quantidade, receita, nome_produto) in enumerate(linhas, start=1)
+        ]
+
+    def reconstruir_resumo_diario(self, db: Session, dias_por_bloco: int = 31) -> int:
+        """
+        Regera o resumo diário a partir do histórico de vendas.
+
+        O histórico é percorrido em blocos de `dias_por_bloco` dias, cada um
+        agregado no banco e gravado em sua própria transação. As vendas
+        movidas para o arquivo frio entram pela leitura dos arquivos
+        Parquet. Deve ser executado com os terminais parados. Retorna o
+        número de linhas geradas.
+        """
+        db.query(VendaResumoDiario).delete()
+        db.commit()
+
+        arquivadas = arquivo_vendas.resumo_diario()
+        self._gravar_resumo(db, arquivadas)
+        db.commit()
+        total_linhas = len(arquivadas)
+
+        primeira, ultima = db.query(
+            func.min(Venda.data_venda), func.max(Venda.data_venda)
+        ).one()
+        if primeira is None:
+            return total_linhas
+
+        inicio = primeira
+
+        while inicio <= ultima:
+            fim = inicio + timedelta(days=dias_por_bloco)
+            periodo = and_(Venda.data_venda >= inicio, Venda.data_venda < fim)
+            deltas = {}
+
+            vendas = db.query(
+                Venda.data_venda, Venda.status, Venda.vendedor_id,
+                func.count(Venda.id), func.sum(Venda.total_venda)
+            ).filter(periodo).group_by(Venda.data_venda, Venda.status, Venda.vendedor_id)
+            for dia, status, vendedor, quantidade, valor in vendas:
+                chave = (dia, status, VendaResumoDiario.FORMA_TOTAL, vendedor or VendaResumoDiario.SEM_VENDEDOR)
+                deltas[chave] = [quantidade, int(valor)]
+
+            pagamentos = db.query(
+                Venda.data_venda, Venda.status, PagamentoVenda.forma_pagamento, Venda.vendedor_id,
+                func.count(PagamentoVenda.id), func.sum(PagamentoVenda.valor_pago)
+            ).join(
+                Venda, and_(Venda.id == PagamentoVenda.venda_id, Venda.data_venda == PagamentoVenda.data_venda)
+            ).filter(
+                periodo, PagamentoVenda.data_venda >= inicio, PagamentoVenda.data_venda < fim
+            ).group_by(
+                Venda.data_venda, Venda.status, PagamentoVenda.forma_pagamento, Venda.vendedor_id
+            )
+            for dia, status, forma, vendedor, quantidade, valor in pagamentos:
+                chave = (dia, status, forma.value, vendedor or VendaResumoDiario.SEM_VENDEDOR)
+                deltas[chave] = [quantidade, int(valor)]
+
+            self._gravar_resumo(db, deltas)
+            db.commit()
+            total_linhas += len(deltas)
+            inicio = fim
+
+        return total_linhas
+
+    def buscar_vendas_cliente(
+        self, db: Session, cliente_id: uuid.UUID, carregamento: Optional[str] = None
+    ) -> List[Venda]:
         """Busca todas as vendas de um cliente"""
-        return db.query(Venda).filter(
+        return db.query(Venda).options(
+            *self._opcoes_carregamento(carregamento or self.carregamento_lista)
+        ).filter(
             and_(
                 Venda.cliente_id == cliente_id,
                 Venda.status == StatusVenda.CONCLUIDA
@@ -235,23 +980,174 @@ class CRUDVenda:
         db: Session, 
         vendedor_id: uuid.UUID,
         data_inicio: Optional[date] = None,
-        data_fim: Optional[date] = None
+        data_fim: Optional[date] = None,
+        carregamento: Optional[str] = None
     ) -> List[Venda]:
         """Busca vendas de um vendedor por período"""
-        query = db.query(Venda).filter(
+        query = db.query(Venda).options(
+            *self._opcoes_carregamento(carregamento or self.carregamento_lista)
+        ).filter(
             and_(
                 Venda.vendedor_id == vendedor_id,
                 Venda.status == StatusVenda.CONCLUIDA
             )
         )
 
-        if data_inicio:
-            query = query.filter(func.date(Venda.data_criacao) >= data_inicio)
-        if data_fim:
-            query = query.filter(func.date(Venda.data_criacao) <= data_fim)
+        query = self._filtrar_periodo(query, Venda.data_venda, data_inicio, data_fim)
 
         return query.order_by(desc(Venda.data_criacao)).all()
 
+    def buscar_chave_idempotencia(self, db: Session, chave: str) -> Optional[ChaveIdempotencia]:
+        """Busca uma chave de idempotência ainda válida"""
+        return db.query(ChaveIdempotencia).filter(
+            ChaveIdempotencia.chave == chave,
+            ChaveIdempotencia.expira_em > datetime.now(timezone.utc)
+        ).first()
+
+    def salvar_resposta_idempotente(self, db: Session, chave: str, resposta: str) -> None:
+        """Guarda a resposta (JSON) devolvida para a chave, usada nas repetições"""
+        try:
+            db.query(ChaveIdempotencia).filter(ChaveIdempotencia.chave == chave).update(
+                {"resposta": resposta}, synchronize_session=False
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise e
+
+    def limpar_chaves_expiradas(self, db: Session) -> int:
+        """Remove as chaves de idempotência expiradas; retorna quantas foram removidas"""
+        try:
+            removidas = db.query(ChaveIdempotencia).filter(
+                ChaveIdempotencia.expira_em <= datetime.now(timezone.utc)
+            ).delete(synchronize_session=False)
+            db.commit()
+            return removidas
+        except Exception as e:
+            db.rollback()
+            raise e
+
+    async def create_async(
+        self, db: AsyncSession, obj_in: VendaCreate, chave_idempotencia: Optional[str] = None
+    ) -> Venda:
+        """
+        Versão assíncrona de create, para os routers async.
+
+        As variantes assíncronas executam as mesmas operações síncronas sobre a
+        conexão do driver assíncrono (aiosqlite/asyncpg) via AsyncSession.run_sync,
+        sem bloquear o event loop enquanto aguardam o banco. Como não há
+        carregamento preguiçoso fora de run_sync, as vendas retornadas já
+        vêm com itens e pagamentos carregados.
+        """
+        return await db.run_sync(
+            lambda sessao: self.get(sessao, self.create(sessao, obj_in, chave_idempotencia).id)
+        )
+
+    async def create_lote_async(
+        self, db: AsyncSession, vendas: List[VendaCreate], tamanho_commit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Versão assíncrona de create_lote"""
+        return await db.run_sync(lambda sessao: self.create_lote(sessao, vendas, tamanho_commit))
+
+    async def get_async(self, db: AsyncSession, id: uuid.UUID) -> Optional[Venda]:
+        """Versão assíncrona de get"""
+        return await db.run_sync(lambda sessao: self.get(sessao, id))
+
+    async def get_by_numero_async(self, db: AsyncSession, numero_venda: str) -> Optional[Venda]:
+        """Versão assíncrona de get_by_numero"""
+        return await db.run_sync(lambda sessao: self.get_by_numero(sessao, numero_venda))
+
+    async def get_multi_async(
+        self,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        filtros: Optional[VendaFilter] = None,
+        cursor: Optional[str] = None,
+        contar_total: bool = True
+    ) -> tuple[List[Venda], Optional[int]]:
+        """Versão assíncrona de get_multi"""
+        return await db.run_sync(
+            lambda sessao: self.get_multi(
+                sessao, skip=skip, limit=limit, filtros=filtros, cursor=cursor,
+                contar_total=contar_total
+            )
+        )
+
+    async def update_async(self, db: AsyncSession, db_obj: Venda, obj_in: VendaUpdate) -> Venda:
+        """Versão assíncrona de update"""
+        return await db.run_sync(
+            lambda sessao: self.get(sessao, self.update(sessao, db_obj, obj_in).id)
+        )
+
+    async def delete_async(self, db: AsyncSession, id: uuid.UUID) -> Optional[Venda]:
+        """Versão assíncrona de delete"""
+        def cancelar(sessao: Session) -> Optional[Venda]:
+            return self.get(sessao, id) if self.delete(sessao, id) else None
+
+        return await db.run_sync(cancelar)
+
+    async def get_resumo_vendas_async(
+        self,
+        db: AsyncSession,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None,
+        vendedor_id: Optional[uuid.UUID] = None
+    ) -> Dict[str, Any]:
+        """Versão assíncrona de get_resumo_vendas"""
+        return await db.run_sync(
+            lambda sessao: self.get_resumo_vendas(sessao, data_inicio, data_fim, vendedor_id)
+        )
+
+    async def get_ranking_vendedores_async(
+        self,
+        db: AsyncSession,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None,
+        limite: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Versão assíncrona de get_ranking_vendedores"""
+        return await db.run_sync(
+            lambda sessao: self.get_ranking_vendedores(sessao, data_inicio, data_fim, limite)
+        )
+
+    async def get_ranking_produtos_async(
+        self,
+        db: AsyncSession,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None,
+        criterio: str = "quantidade",
+        limite: int = 10
+    ) -> List[Dict[str, Any]]:
+        """Versão assíncrona de get_ranking_produtos"""
+        return await db.run_sync(
+            lambda sessao: self.get_ranking_produtos(sessao, data_inicio, data_fim, criterio, limite)
+        )
+
+    async def buscar_vendas_cliente_async(self, db: AsyncSession, cliente_id: uuid.UUID) -> List[Venda]:
+        """Versão assíncrona de buscar_vendas_cliente"""
+        return await db.run_sync(lambda sessao: self.buscar_vendas_cliente(sessao, cliente_id))
+
+    async def buscar_vendas_vendedor_async(
+        self,
+        db: AsyncSession,
+        vendedor_id: uuid.UUID,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None
+    ) -> List[Venda]:
+        """Versão assíncrona de buscar_vendas_vendedor"""
+        return await db.run_sync(
+            lambda sessao: self.buscar_vendas_vendedor(sessao, vendedor_id, data_inicio, data_fim)
+        )
+
+    async def buscar_chave_idempotencia_async(self, db: AsyncSession, chave: str) -> Optional[ChaveIdempotencia]:
+        """Versão assíncrona de buscar_chave_idempotencia"""
+        return await db.run_sync(lambda sessao: self.buscar_chave_idempotencia(sessao, chave))
+
+    async def salvar_resposta_idempotente_async(self, db: AsyncSession, chave: str, resposta: str) -> None:
+        """Versão assíncrona de salvar_resposta_idempotente"""
+        await db.run_sync(lambda sessao: self.salvar_resposta_idempotente(sessao, chave, resposta))
+
 # Instância global do CRUD
 crud_venda = CRUDVenda()
 
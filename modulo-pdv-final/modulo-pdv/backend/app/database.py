@@ -3,7 +3,9 @@ Configuração do banco de dados SQLite para o módulo PDV.
 """
 
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
@@ -17,6 +19,25 @@ DATABASE_URL = os.getenv(
     "sqlite:///./pdv.db"
 )
 
+def _url_assincrona(url: str) -> str:
+    """Troca o driver da URL pelo equivalente assíncrono (aiosqlite/asyncpg)"""
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    if url.startswith(("postgresql://", "postgresql+psycopg2://")):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    return url
+
+# URL de conexão usada pelos routers assíncronos (mesmo banco, driver assíncrono)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _url_assincrona(DATABASE_URL))
+
+# Schema do catálogo de produtos (o mesmo do módulo de produtos). No SQLite,
+# o schema é o banco PRODUTOS_SQLITE_PATH, anexado a cada conexão (se existir)
+PRODUTOS_SCHEMA = os.getenv("PRODUTOS_SCHEMA", "produtos")
+PRODUTOS_SQLITE_PATH = os.getenv("PRODUTOS_SQLITE_PATH", "./produtos.db")
+
+# Fuso horário da loja, usado para calcular a data de negócio das vendas
+LOJA_TIMEZONE = os.getenv("LOJA_TIMEZONE", "America/Sao_Paulo")
+
 # Criação do engine do SQLAlchemy
 engine = create_engine(
     DATABASE_URL,
@@ -24,12 +45,43 @@ engine = create_engine(
     echo=False  # Mude para True para debug SQL
 )
 
+def anexar_catalogo(engine_sync: Engine, caminho: str = PRODUTOS_SQLITE_PATH) -> None:
+    """
+    No SQLite, anexa o banco do catálogo a cada nova conexão do engine, como PRODUTOS_SCHEMA.
+
+    Só anexa um arquivo existente: o ATTACH criaria um banco vazio no
+    lugar de um catálogo ausente.
+    """
+    if engine_sync.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine_sync, "connect")
+    def _anexar(conexao_dbapi, registro):
+        if not os.path.exists(caminho):
+            return
+        cursor = conexao_dbapi.cursor()
+        cursor.execute(f"ATTACH DATABASE '{caminho}' AS {PRODUTOS_SCHEMA}")
+        cursor.close()
+
+anexar_catalogo(engine)
+
 # Criação da sessão do banco de dados
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine e sessão assíncronos: o acesso ao banco não bloqueia o event loop
+async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=False)
+anexar_catalogo(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 # Base para os modelos
 Base = declarative_base()
 
+# Base dos modelos de leitura de outros módulos (catálogo de produtos): fora
+# de Base.metadata, as tabelas não são criadas por create_all nem pelas migrações
+CatalogoBase = declarative_base()
+
 def get_db():
     """
     Dependency para obter uma sessão do banco de dados.
@@ -40,6 +92,13 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """
+    Dependency para obter uma sessão assíncrona do banco de dados.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def create_tables():
     """
     Cria todas as tabelas no banco de dados.
@@ -0,0 +1,59 @@
+"""
+Geração de arquivos de exportação (CSV e NDJSON) em fluxo contínuo.
+"""
+
+from typing import Iterable, Iterator, Sequence
+import csv
+import io
+import json
+
+def gerar_csv(
+    cabecalho: Sequence[str],
+    linhas: Iterable[Sequence],
+    linhas_por_bloco: int = 500
+) -> Iterator[str]:
+    """
+    Gera um CSV em blocos de texto, sem montar o arquivo inteiro em memória.
+
+    Args:
+        cabecalho: Nomes das colunas
+        linhas: Iterável com os valores de cada linha
+        linhas_por_bloco: Quantidade de linhas acumuladas antes de cada envio
+
+    Returns:
+        Iterador de blocos de texto CSV
+    """
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(cabecalho)
+
+    for numero, linha in enumerate(linhas, start=1):
+        escritor.writerow(linha)
+        if numero % linhas_por_bloco == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def gerar_ndjson(registros: Iterable[dict], registros_por_bloco: int = 500) -> Iterator[str]:
+    """
+    Gera NDJSON (um objeto JSON por linha) em blocos de texto.
+
+    Args:
+        registros: Iterável de dicionários serializáveis
+        registros_por_bloco: Quantidade de registros acumulados antes de cada envio
+
+    Returns:
+        Iterador de blocos de texto NDJSON
+    """
+    bloco = []
+    for registro in registros:
+        bloco.append(json.dumps(registro, ensure_ascii=False, default=str))
+        if len(bloco) == registros_por_bloco:
+            yield "\n".join(bloco) + "\n"
+            bloco = []
+
+    if bloco:
+        yield "\n".join(bloco) + "\n"
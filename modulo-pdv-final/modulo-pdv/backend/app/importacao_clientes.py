@@ -0,0 +1,411 @@
+"""
+Importação em massa de clientes a partir de planilhas (CSV ou XLSX).
+
+O arquivo é lido em lotes de colunas (Arrow) e cada lote é validado de
+uma vez com pyarrow.compute, com as mesmas regras de ClienteCreate. As
+linhas válidas vão para uma tabela temporária (COPY no PostgreSQL) e
+entram em clientes com um único INSERT ... SELECT: ON CONFLICT (cpf_cnpj)
+DO NOTHING descarta os CPF/CNPJ já cadastrados e um NOT EXISTS pelo
+índice de email descarta os emails já cadastrados. Assim o custo não
+depende de consultas por linha, como em ClienteCRUD.create.
+"""
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, case, cast, exists, insert, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from datetime import date, datetime
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+import csv
+import io
+import uuid
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+
+from app.crud import cache_estatisticas
+from app.models import Cliente, StatusCliente, TipoCliente
+from app.schemas import EMAIL_REGEX, ESTADOS_VALIDOS
+
+# Colunas importadas (as demais colunas da planilha são ignoradas)
+CAMPOS_IMPORTACAO = [
+    "nome", "tipo_cliente", "cpf_cnpj", "rg_ie", "email", "telefone", "celular",
+    "endereco", "numero", "complemento", "bairro", "cidade", "estado", "cep",
+    "data_nascimento", "profissao", "observacoes", "status", "limite_credito", "pontos_fidelidade"
+]
+
+# Tamanho máximo dos campos de texto (como em ClienteCreate)
+TAMANHOS_MAXIMOS = {
+    "rg_ie": 20, "telefone": 20, "celular": 20, "endereco": 255, "numero": 10,
+    "complemento": 100, "bairro": 100, "cidade": 100, "profissao": 100
+}
+
+# Formatos aceitos para a data de nascimento
+FORMATOS_DATA = ("%Y-%m-%d", "%d/%m/%Y")
+
+# Colunas do relatório de erros (CSV)
+COLUNAS_ERROS = ["linha", "campo", "motivo"]
+
+_FORMATOS = ("csv", "xlsx")
+
+def _texto_celula(valor: Any) -> Optional[str]:
+    """Valor de uma célula da planilha como texto"""
+    if valor is None:
+        return None
+    if isinstance(valor, datetime):
+        return valor.date().isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+def _colunas(cabecalho: List[Any]) -> List[str]:
+    """Nomes das colunas normalizados, exigindo a coluna nome"""
+    colunas = [str(coluna or "").strip().lower() for coluna in cabecalho]
+    if "nome" not in colunas:
+        raise ValueError("Coluna obrigatória ausente na planilha: nome")
+    return colunas
+
+def ler_csv(arquivo: BinaryIO, tamanho_lote: int = 50000) -> Iterator[Tuple[int, pa.Table]]:
+    """
+    Lê um CSV (UTF-8, separado por vírgula ou ponto e vírgula) em lotes.
+
+    Linhas em branco são ignoradas e não entram na numeração das linhas.
+
+    Returns:
+        Iterador de (linha do primeiro registro, lote com as colunas como texto)
+    """
+    cabecalho = arquivo.readline().decode("utf-8-sig")
+    arquivo.seek(0)
+    separador = ";" if cabecalho.count(";") > cabecalho.count(",") else ","
+    colunas = _colunas(next(csv.reader([cabecalho], delimiter=separador)))
+
+    leitor = pa_csv.open_csv(
+        arquivo,
+        read_options=pa_csv.ReadOptions(column_names=colunas, skip_rows=1),
+        parse_options=pa_csv.ParseOptions(delimiter=separador, newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={coluna: pa.string() for coluna in colunas},
+            include_columns=[campo for campo in CAMPOS_IMPORTACAO if campo in colunas]
+        )
+    )
+    linha = 2
+    for bloco in leitor:
+        for inicio in range(0, bloco.num_rows, tamanho_lote):
+            lote = pa.Table.from_batches([bloco.slice(inicio, tamanho_lote)])
+            yield linha, lote
+            linha += lote.num_rows
+
+def ler_xlsx(arquivo: BinaryIO, tamanho_lote: int = 50000) -> Iterator[Tuple[int, pa.Table]]:
+    """
+    Lê a primeira aba de uma planilha XLSX em lotes.
+
+    Returns:
+        Iterador de (linha do primeiro registro, lote com as colunas como texto)
+    """
+    # Dependência só da importação de planilhas XLSX
+    from openpyxl import load_workbook
+
+    planilha = load_workbook(arquivo, read_only=True, data_only=True).active
+    linhas = planilha.iter_rows(values_only=True)
+    colunas = _colunas(list(next(linhas, None) or []))
+    indices = {campo: colunas.index(campo) for campo in CAMPOS_IMPORTACAO if campo in colunas}
+
+    def montar(registros: List[tuple]) -> pa.Table:
+        return pa.table({
+            campo: pa.array(
+                [_texto_celula(registro[indice]) if indice < len(registro) else None for registro in registros],
+                type=pa.string()
+            )
+            for campo, indice in indices.items()
+        })
+
+    primeira_linha, registros = 2, []
+    for numero, registro in enumerate(linhas, start=2):
+        if not any(valor is not None for valor in registro):
+            continue
+        if not registros:
+            primeira_linha = numero
+        registros.append(registro)
+        if len(registros) == tamanho_lote:
+            yield primeira_linha, montar(registros)
+            registros = []
+    if registros:
+        yield primeira_linha, montar(registros)
+
+def ler_planilha(arquivo: BinaryIO, nome_arquivo: str, tamanho_lote: int = 50000) -> Iterator[Tuple[int, pa.Table]]:
+    """Lê a planilha de clientes em lotes, pelo formato da extensão do arquivo (.csv ou .xlsx)"""
+    formato = (nome_arquivo or "").rsplit(".", 1)[-1].lower()
+    if formato not in _FORMATOS:
+        raise ValueError("Formato de planilha não suportado: use .csv ou .xlsx")
+    leitor = ler_xlsx if formato == "xlsx" else ler_csv
+    return leitor(arquivo, tamanho_lote)
+
+def _limpar(coluna: pa.Array) -> pa.Array:
+    """Texto sem espaços nas pontas, com vazios como nulos"""
+    coluna = pc.utf8_trim_whitespace(coluna)
+    return pc.if_else(pc.equal(coluna, ""), pa.scalar(None, pa.string()), coluna)
+
+def _data(texto: pa.Array, formato: str) -> pa.Array:
+    """Datas no formato; as inexistentes (31/02), que o strptime do Arrow ajustaria, ficam nulas"""
+    datas = pc.strptime(texto, format=formato, unit="s", error_is_null=True)
+    return pc.if_else(pc.equal(pc.strftime(datas, format=formato), texto), datas, pa.scalar(None, datas.type))
+
+def _nomes_enum(valores: pa.Array, enum_modelo) -> pa.Array:
+    """Valores do enum (pessoa_fisica) convertidos para o nome gravado no banco (PESSOA_FISICA)"""
+    membros = list(enum_modelo)
+    indices = pc.index_in(valores, value_set=pa.array([membro.value for membro in membros]))
+    return pa.array([membro.name for membro in membros]).take(indices)
+
+class ImportadorClientes:
+    """Importação em massa de clientes"""
+
+    def validar(self, primeira_linha: int, lote: pa.Table) -> Tuple[pa.Table, List[Dict[str, Any]]]:
+        """
+        Valida e normaliza um lote da planilha, coluna a coluna.
+
+        Returns:
+            Linhas válidas (com a coluna linha e os valores normalizados) e
+            os erros das demais, um por campo inválido
+        """
+        total = lote.num_rows
+        linhas = pa.array(range(primeira_linha, primeira_linha + total), type=pa.int64())
+        nulos = pa.nulls(total, pa.string())
+        valores = {
+            campo: _limpar(lote.column(campo).combine_chunks()) if campo in lote.column_names else nulos
+            for campo in CAMPOS_IMPORTACAO
+        }
+        regras = []
+
+        tamanho_nome = pc.utf8_length(valores["nome"])
+        regras.append(("nome", pc.or_kleene(
+            pc.is_null(tamanho_nome), pc.or_(pc.less(tamanho_nome, 2), pc.greater(tamanho_nome, 255))
+        ), "Nome deve ter entre 2 e 255 caracteres"))
+
+        for campo, enum_modelo, padrao, motivo in (
+            ("tipo_cliente", TipoCliente, TipoCliente.PESSOA_FISICA, "Tipo de cliente inválido"),
+            ("status", StatusCliente, StatusCliente.ATIVO, "Status inválido"),
+        ):
+            valores[campo] = pc.fill_null(pc.utf8_lower(valores[campo]), padrao.value)
+            regras.append((campo, pc.invert(pc.is_in(
+                valores[campo], value_set=pa.array([membro.value for membro in enum_modelo])
+            )), motivo))
+
+        documento = pc.replace_substring_regex(valores["cpf_cnpj"], r"[^0-9]", "")
+        tamanho_documento = pc.utf8_length(documento)
+        pessoa_fisica = pc.equal(valores["tipo_cliente"], TipoCliente.PESSOA_FISICA.value)
+        pessoa_juridica = pc.equal(valores["tipo_cliente"], TipoCliente.PESSOA_JURIDICA.value)
+        valores["cpf_cnpj"] = documento
+        regras.append(("cpf_cnpj", pc.and_(pessoa_fisica, pc.not_equal(tamanho_documento, 11)), "CPF deve ter 11 dígitos"))
+        regras.append(("cpf_cnpj", pc.and_(pessoa_juridica, pc.not_equal(tamanho_documento, 14)), "CNPJ deve ter 14 dígitos"))
+
+        email = pc.utf8_lower(valores["email"])
+        valores["email"] = email
+        regras.append(("email", pc.or_(
+            pc.invert(pc.match_substring_regex(email, EMAIL_REGEX)), pc.greater(pc.utf8_length(email), 255)
+        ), "Email inválido"))
+
+        cep = pc.replace_substring_regex(valores["cep"], r"[^0-9]", "")
+        valores["cep"] = cep
+        regras.append(("cep", pc.not_equal(pc.utf8_length(cep), 8), "CEP deve ter 8 dígitos"))
+
+        estado = pc.utf8_upper(valores["estado"])
+        valores["estado"] = estado
+        regras.append(("estado", pc.and_(
+            pc.is_valid(estado), pc.invert(pc.is_in(estado, value_set=pa.array(ESTADOS_VALIDOS)))
+        ), "Estado inválido"))
+
+        texto_data = valores["data_nascimento"]
+        data_nascimento = pc.coalesce(*(
+            _data(texto_data, formato) for formato in FORMATOS_DATA
+        )).cast(pa.date32())
+        valores["data_nascimento"] = data_nascimento
+        regras.append(("data_nascimento", pc.and_(pc.is_valid(texto_data), pc.is_null(data_nascimento)),
+                       "Data de nascimento inválida (use AAAA-MM-DD ou DD/MM/AAAA)"))
+
+        for campo in ("limite_credito", "pontos_fidelidade"):
+            texto = valores[campo]
+            inteiro = pc.match_substring_regex(texto, r"^[0-9]{1,9}$")
+            regras.append((campo, pc.invert(inteiro), "Valor deve ser um número inteiro não negativo"))
+            valores[campo] = pc.fill_null(
+                pc.if_else(inteiro, texto, pa.scalar(None, pa.string())).cast(pa.int64()), 0
+            )
+
+        for campo, tamanho in TAMANHOS_MAXIMOS.items():
+            regras.append((campo, pc.greater(pc.utf8_length(valores[campo]), tamanho), f"Campo com mais de {tamanho} caracteres"))
+
+        invalidas = pa.array([False] * total)
+        erros: List[Dict[str, Any]] = []
+        for campo, mascara, motivo in regras:
+            mascara = pc.fill_null(mascara, False)
+            invalidas = pc.or_(invalidas, mascara)
+            for linha in linhas.filter(mascara).to_pylist():
+                erros.append({"linha": linha, "campo": campo, "motivo": motivo})
+
+        validas = pa.table({"linha": linhas, **valores}).filter(pc.invert(invalidas))
+        return validas, erros
+
+    def _tabela_temporaria(self) -> Table:
+        """Tabela temporária com as colunas importadas (enums como texto, pelo nome)"""
+        colunas = [Column("linha", Integer), Column("id", Cliente.__table__.c.id.type)]
+        for campo in CAMPOS_IMPORTACAO:
+            tipo = Cliente.__table__.c[campo].type
+            colunas.append(Column(campo, String(20) if campo in ("tipo_cliente", "status") else tipo))
+        return Table("clientes_importacao", MetaData(), *colunas, prefixes=["TEMPORARY"])
+
+    def _preparar(self, validas: pa.Table, vistos: Dict[str, set], erros: List[Dict[str, Any]]) -> pa.Table:
+        """Descarta CPF/CNPJ e emails repetidos no arquivo e grava os enums pelo nome"""
+        manter = []
+        for linha, documento, email in zip(
+            validas.column("linha").to_pylist(),
+            validas.column("cpf_cnpj").to_pylist(),
+            validas.column("email").to_pylist()
+        ):
+            if documento is not None and documento in vistos["cpf_cnpj"]:
+                erros.append({"linha": linha, "campo": "cpf_cnpj", "motivo": "CPF/CNPJ repetido no arquivo"})
+                manter.append(False)
+            elif email is not None and email in vistos["email"]:
+                erros.append({"linha": linha, "campo": "email", "motivo": "Email repetido no arquivo"})
+                manter.append(False)
+            else:
+                manter.append(True)
+                vistos["cpf_cnpj"].add(documento)
+                vistos["email"].add(email)
+
+        validas = validas.filter(pa.array(manter, type=pa.bool_()))
+        validas = validas.set_column(
+            validas.column_names.index("tipo_cliente"), "tipo_cliente",
+            _nomes_enum(validas.column("tipo_cliente").combine_chunks(), TipoCliente)
+        )
+        validas = validas.set_column(
+            validas.column_names.index("status"), "status",
+            _nomes_enum(validas.column("status").combine_chunks(), StatusCliente)
+        )
+        return validas
+
+    def _copiar(self, conexao: Connection, tabela: Table, validas: pa.Table) -> None:
+        """Grava o lote, com um novo ID por cliente, na tabela temporária (COPY no PostgreSQL com psycopg2)"""
+        if conexao.dialect.name == "postgresql" and conexao.dialect.driver == "psycopg2":
+            validas = validas.add_column(1, "id", pa.array([str(uuid.uuid4()) for _ in range(validas.num_rows)]))
+            buffer = io.BytesIO()
+            pa_csv.write_csv(validas, buffer, write_options=pa_csv.WriteOptions(include_header=False))
+            buffer.seek(0)
+            colunas = ", ".join(validas.column_names)
+            with conexao.connection.driver_connection.cursor() as cursor:
+                cursor.copy_expert(f"COPY {tabela.name} ({colunas}) FROM STDIN WITH (FORMAT csv)", buffer)
+            return
+
+        # Demais bancos: executemany do INSERT compilado, com os valores convertidos
+        # coluna a coluna (montar os parâmetros linha a linha pelo SQLAlchemy é o gargalo)
+        colunas = ["id", *validas.column_names]
+        valores = {"id": [uuid.uuid4() for _ in range(validas.num_rows)]}
+        valores.update((nome, validas.column(nome).to_pylist()) for nome in validas.column_names)
+        for nome in colunas:
+            processador = tabela.c[nome].type.bind_processor(conexao.dialect)
+            if processador:
+                valores[nome] = [processador(valor) for valor in valores[nome]]
+
+        comando = tabela.insert().compile(dialect=conexao.dialect, column_keys=colunas)
+        if conexao.dialect.positional:
+            parametros = list(zip(*(valores[nome] for nome in comando.positiontup)))
+        else:
+            parametros = [dict(zip(colunas, linha)) for linha in zip(*(valores[nome] for nome in colunas))]
+        conexao.exec_driver_sql(str(comando), parametros)
+
+    def _mesclar(self, conexao: Connection, tabela: Table, criado_por: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        Insere em clientes os registros da tabela temporária ainda não cadastrados.
+
+        Returns:
+            Erros dos registros não inseridos (CPF/CNPJ ou email já cadastrado)
+        """
+        clientes = Cliente.__table__
+        colunas = ["id", *CAMPOS_IMPORTACAO, "criado_por"]
+        selecao = select(
+            tabela.c.id,
+            *(cast(tabela.c[campo], clientes.c[campo].type) if campo in ("tipo_cliente", "status") else tabela.c[campo]
+              for campo in CAMPOS_IMPORTACAO),
+            literal(criado_por, String)
+        ).where(~exists().where(clientes.c.email == tabela.c.email))
+
+        dialeto = conexao.dialect.name
+        if dialeto in ("postgresql", "sqlite"):
+            comando = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}[dialeto](clientes)
+            comando = comando.from_select(colunas, selecao).on_conflict_do_nothing(index_elements=["cpf_cnpj"])
+        else:
+            comando = insert(clientes).from_select(
+                colunas, selecao.where(~exists().where(clientes.c.cpf_cnpj == tabela.c.cpf_cnpj))
+            )
+        conexao.execute(comando)
+
+        documento_cadastrado = exists().where(clientes.c.cpf_cnpj == tabela.c.cpf_cnpj)
+        recusados = conexao.execute(
+            select(
+                tabela.c.linha,
+                case((documento_cadastrado, "cpf_cnpj"), else_="email"),
+                case((documento_cadastrado, "CPF/CNPJ já cadastrado"), else_="Email já cadastrado")
+            ).where(~exists().where(clientes.c.id == tabela.c.id))
+        )
+        return [{"linha": linha, "campo": campo, "motivo": motivo} for linha, campo, motivo in recusados]
+
+    def importar(
+        self,
+        db: Session,
+        lotes: Iterator[Tuple[int, pa.Table]],
+        criado_por: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Importa os lotes da planilha (ver ler_planilha) em uma única transação.
+
+        Linhas inválidas, com CPF/CNPJ ou email repetido no arquivo ou já
+        cadastrado são recusadas e informadas em `erros`; as demais são
+        inseridas.
+
+        Returns:
+            Quantidades de linhas lidas, importadas, duplicadas e inválidas, e
+            os erros por linha
+        """
+        tabela = self._tabela_temporaria()
+        conexao = db.connection()
+        tabela.drop(conexao, checkfirst=True)
+        tabela.create(conexao)
+
+        total_linhas = preparadas = repetidas = 0
+        linhas_invalidas = set()
+        erros: List[Dict[str, Any]] = []
+        vistos = {"cpf_cnpj": set(), "email": set()}
+        try:
+            for primeira_linha, lote in lotes:
+                total_linhas += lote.num_rows
+                validas, erros_lote = self.validar(primeira_linha, lote)
+                linhas_invalidas.update(erro["linha"] for erro in erros_lote)
+                erros.extend(erros_lote)
+                candidatas = validas.num_rows
+                validas = self._preparar(validas, vistos, erros)
+                repetidas += candidatas - validas.num_rows
+                preparadas += validas.num_rows
+                if validas.num_rows:
+                    self._copiar(conexao, tabela, validas)
+
+            recusados = self._mesclar(conexao, tabela, criado_por)
+            erros.extend(recusados)
+            tabela.drop(conexao)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        cache_estatisticas.invalidar()
+
+        erros.sort(key=lambda erro: erro["linha"])
+        return {
+            "total_linhas": total_linhas,
+            "importados": preparadas - len(recusados),
+            "duplicados": repetidas + len(recusados),
+            "invalidos": len(linhas_invalidas),
+            "erros": erros
+        }
+
+# Instância global do importador
+importador_clientes = ImportadorClientes()
@@ -6,11 +6,17 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+import asyncio
 import uvicorn
 import os
 
-from app.database import create_tables
-from app.routers import clientes, vendas
+from app.database import SessionLocal, async_engine, create_tables, engine
+from app.autocomplete_clientes import indice_autocomplete_clientes
+from app.busca_clientes import garantir_indice_busca
+from app.crud_vendas import crud_venda
+from app.particionamento import garantir_particoes_futuras
+from app.routers import caixas, carrinhos, clientes, vendas
 
 # Configuração do lifespan da aplicação
 @asynccontextmanager
@@ -22,11 +28,27 @@ async def lifespan(app: FastAPI):
     print("🚀 Iniciando aplicação...")
     create_tables()
     print("✅ Tabelas do banco de dados criadas/verificadas")
+    with SessionLocal() as db:
+        removidas = crud_venda.limpar_chaves_expiradas(db)
+    print(f"🧹 Chaves de idempotência expiradas removidas: {removidas}")
+    with engine.begin() as conexao:
+        criadas = garantir_particoes_futuras(conexao, crud_venda.data_negocio(datetime.now(timezone.utc)))
+    if criadas:
+        print(f"🗂️  Partições de vendas criadas: {', '.join(criadas)}")
+    with engine.begin() as conexao:
+        if garantir_indice_busca(conexao):
+            print("🔎 Índice de busca de clientes criado")
+    with SessionLocal() as db:
+        carregados = indice_autocomplete_clientes.carregar(db)
+    print(f"🔤 Autocomplete de clientes carregado: {carregados} clientes")
+    atualizacao_autocomplete = asyncio.create_task(indice_autocomplete_clientes.manter_atualizado(SessionLocal))
     
     yield
     
     # Shutdown
     print("🛑 Encerrando aplicação...")
+    atualizacao_autocomplete.cancel()
+    await async_engine.dispose()
 
 # Criação da aplicação FastAPI
 app = FastAPI(
@@ -99,6 +121,8 @@ async def error_handling_middleware(request: Request, call_next):
 # Inclusão dos routers
 app.include_router(clientes.router, prefix="/api/v1")
 app.include_router(vendas.router)
+app.include_router(carrinhos.router)
+app.include_router(caixas.router)
 
 # Endpoint de health check
 @app.get("/", tags=["health"])
@@ -2,11 +2,11 @@
 Modelos SQLAlchemy para o módulo de gestão de clientes.
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Enum, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Enum, Date, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.database import Base
+from app.database import Base, CatalogoBase, PRODUTOS_SCHEMA
 import uuid
 import enum
 
@@ -29,6 +29,11 @@ class Cliente(Base):
     Inclui informações de contato, endereço e dados para fidelidade.
     """
     __tablename__ = "clientes"
+    __table_args__ = (
+        # Consulta periódica de alterações do autocomplete de clientes
+        Index("idx_clientes_data_criacao", "data_criacao"),
+        Index("idx_clientes_data_atualizacao", "data_atualizacao"),
+    )
 
     # Identificação única
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
@@ -124,6 +129,18 @@ class FormaPagamento(enum.Enum):
     VALE_PRESENTE = "vale_presente"
     CREDIARIO = "crediario"
 
+class StatusSessaoCaixa(enum.Enum):
+    """Enum para status da sessão de caixa"""
+    ABERTA = "aberta"
+    FECHADA = "fechada"
+
+class TipoMovimentacaoEstoque(enum.Enum):
+    """Enum para tipos de movimentação de estoque"""
+    ENTRADA = "entrada"
+    SAIDA_VENDA = "saida_venda"
+    ESTORNO_VENDA = "estorno_venda"
+    AJUSTE = "ajuste"
+
 class Venda(Base):
     """
     Modelo para a tabela de vendas.
@@ -132,6 +149,15 @@ class Venda(Base):
     do cliente, vendedor, totais e status da venda.
     """
     __tablename__ = "vendas"
+    __table_args__ = (
+        # Paginação por chave na ordem (data_criacao DESC, id DESC)
+        Index("idx_vendas_data_criacao_id", "data_criacao", "id"),
+        # Filtros por período combinados com status, vendedor e cliente
+        # (vendedor_id e total_venda no fim cobrem o ranking de vendedores)
+        Index("idx_vendas_status_data_vendedor_total", "status", "data_venda", "vendedor_id", "total_venda"),
+        Index("idx_vendas_vendedor_data_venda", "vendedor_id", "data_venda"),
+        Index("idx_vendas_cliente_data_venda", "cliente_id", "data_venda"),
+    )
 
     # Identificação única
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
@@ -140,6 +166,7 @@ class Venda(Base):
     # Relacionamentos
     cliente_id = Column(UUID(as_uuid=True), nullable=True, index=True)  # FK para clientes
     vendedor_id = Column(UUID(as_uuid=True), nullable=True, index=True)  # FK para usuários
+    sessao_caixa_id = Column(UUID(as_uuid=True), ForeignKey('sessoes_caixa.id'), nullable=True, index=True)
     
     # Dados da venda
     subtotal = Column(Integer, nullable=False, default=0)  # Em centavos
@@ -150,6 +177,9 @@ class Venda(Base):
     status = Column(Enum(StatusVenda), nullable=False, default=StatusVenda.PENDENTE)
     observacoes = Column(Text, nullable=True)
     
+    # Data de negócio da venda (no fuso horário da loja), usada nos filtros por período
+    data_venda = Column(Date, nullable=False, index=True)
+    
     # Auditoria
     data_criacao = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     data_atualizacao = Column(DateTime(timezone=True), onupdate=func.now())
@@ -170,17 +200,40 @@ class Venda(Base):
             "numero_venda": self.numero_venda,
             "cliente_id": str(self.cliente_id) if self.cliente_id else None,
             "vendedor_id": str(self.vendedor_id) if self.vendedor_id else None,
+            "sessao_caixa_id": str(self.sessao_caixa_id) if self.sessao_caixa_id else None,
             "subtotal": self.subtotal,
             "desconto_total": self.desconto_total,
             "total_venda": self.total_venda,
             "status": self.status.value,
             "observacoes": self.observacoes,
+            "data_venda": self.data_venda.isoformat() if self.data_venda else None,
             "data_criacao": self.data_criacao.isoformat() if self.data_criacao else None,
             "data_atualizacao": self.data_atualizacao.isoformat() if self.data_atualizacao else None,
             "criado_por": self.criado_por,
             "atualizado_por": self.atualizado_por
         }
 
+class Produto(CatalogoBase):
+    """
+    Modelo de leitura do catálogo de produtos.
+    
+    O catálogo pertence ao módulo de produtos; o PDV lê apenas os campos
+    usados no snapshot dos itens vendidos (nome, código de barras e SKU).
+    A tabela fica no schema PRODUTOS_SCHEMA e não é criada pelo PDV.
+    """
+    __tablename__ = "produtos"
+    __table_args__ = {"schema": PRODUTOS_SCHEMA}
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    nome = Column(String(255), nullable=False)
+    codigo_barras = Column(String(255), nullable=True)
+    sku = Column(String(255), nullable=True)
+    preco_venda = Column(Integer, nullable=False, default=0)  # Em centavos
+    data_atualizacao = Column(DateTime(timezone=True), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<Produto(id={self.id}, nome='{self.nome}', sku='{self.sku}')>"
+
 class ItemVenda(Base):
     """
     Modelo para a tabela de itens de venda.
@@ -189,12 +242,19 @@ class ItemVenda(Base):
     incluindo quantidade, preços e descontos aplicados.
     """
     __tablename__ = "itens_venda"
+    __table_args__ = (
+        # Ranking de produtos: agrupa por produto e junta com a venda pelo índice
+        Index("idx_itens_venda_produto_venda", "produto_id", "venda_id"),
+    )
 
     # Identificação única
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     
     # Relacionamentos
     venda_id = Column(UUID(as_uuid=True), ForeignKey('vendas.id'), nullable=False, index=True)  # FK para vendas
+    
+    # Data de negócio da venda, repetida aqui para particionar a tabela por mês junto com vendas
+    data_venda = Column(Date, nullable=False)
     produto_id = Column(UUID(as_uuid=True), nullable=False, index=True)  # FK para produtos
     
     # Dados do item
@@ -241,6 +301,12 @@ class PagamentoVenda(Base):
     permitindo pagamentos mistos.
     """
     __tablename__ = "pagamentos_venda"
+    __table_args__ = (
+        # Atende o resumo por forma de pagamento (join por venda + agrupamento)
+        Index("idx_pagamentos_venda_forma", "venda_id", "forma_pagamento"),
+        # Conciliação com o extrato da adquirente/PIX
+        Index("idx_pagamentos_venda_numero_transacao", "numero_transacao"),
+    )
 
     # Identificação única
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
@@ -248,6 +314,9 @@ class PagamentoVenda(Base):
     # Relacionamentos
     venda_id = Column(UUID(as_uuid=True), ForeignKey('vendas.id'), nullable=False, index=True)  # FK para vendas
     
+    # Data de negócio da venda, repetida aqui para particionar a tabela por mês junto com vendas
+    data_venda = Column(Date, nullable=False)
+    
     # Dados do pagamento
     forma_pagamento = Column(Enum(FormaPagamento), nullable=False)
     valor_pago = Column(Integer, nullable=False)  # Em centavos
@@ -281,3 +350,177 @@ class PagamentoVenda(Base):
             "data_criacao": self.data_criacao.isoformat() if self.data_criacao else None
         }
 
+class SequenciaVenda(Base):
+    """
+    Modelo para a tabela de sequências de numeração de vendas.
+    
+    Mantém um contador por dia usado para gerar o número da venda
+    (YYYYMMDD-NNNN). O contador é incrementado atomicamente com um
+    único UPDATE ... RETURNING, evitando números duplicados entre
+    terminais que finalizam vendas ao mesmo tempo.
+    """
+    __tablename__ = "sequencias_venda"
+
+    # Dia ao qual o contador pertence
+    data = Column(Date, primary_key=True)
+    
+    # Último número alocado no dia
+    ultimo_numero = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<SequenciaVenda(data={self.data}, ultimo_numero={self.ultimo_numero})>"
+
+class VendaResumoDiario(Base):
+    """
+    Modelo para a tabela de resumo diário de vendas (rollup).
+    
+    Mantém contadores e somas por dia, status, forma de pagamento e
+    vendedor, atualizados na mesma transação que cria, altera ou cancela
+    a venda. As linhas com forma_pagamento igual a FORMA_TOTAL guardam a
+    quantidade de vendas e a soma de total_venda; as demais guardam a
+    quantidade de pagamentos e a soma de valor_pago daquela forma.
+    """
+    __tablename__ = "vendas_resumo_diario"
+
+    # Marcadores usados na chave (que não admite nulos)
+    FORMA_TOTAL = "total"
+    SEM_VENDEDOR = uuid.UUID(int=0)
+
+    # Chave do resumo
+    data = Column(Date, primary_key=True)
+    status = Column(Enum(StatusVenda), primary_key=True)
+    forma_pagamento = Column(String(20), primary_key=True)
+    vendedor_id = Column(UUID(as_uuid=True), primary_key=True)
+    
+    # Valores agregados
+    quantidade = Column(Integer, nullable=False, default=0)
+    valor = Column(Integer, nullable=False, default=0)  # Em centavos
+
+    def __repr__(self):
+        return (
+            f"<VendaResumoDiario(data={self.data}, status='{self.status.value}', "
+            f"forma='{self.forma_pagamento}', quantidade={self.quantidade}, valor={self.valor})>"
+        )
+
+class EstoqueSaldo(Base):
+    """
+    Modelo para a tabela de saldos de estoque.
+    
+    Guarda o saldo atual de cada produto controlado pelo PDV. O saldo só
+    é alterado por UPDATEs condicionais (saldo >= quantidade), de modo que
+    vendas simultâneas do mesmo produto nunca o deixam negativo. Produtos
+    sem linha nesta tabela não têm o estoque controlado.
+    """
+    __tablename__ = "estoque_saldos"
+
+    produto_id = Column(UUID(as_uuid=True), primary_key=True)
+    saldo = Column(Integer, nullable=False, default=0)
+    data_atualizacao = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<EstoqueSaldo(produto_id={self.produto_id}, saldo={self.saldo})>"
+
+class MovimentacaoEstoque(Base):
+    """
+    Modelo para a tabela de movimentações de estoque (razão).
+    
+    Registro somente de inclusão: cada alteração de saldo gera uma linha
+    com a quantidade movimentada (negativa nas saídas) e o saldo
+    resultante, permitindo auditar e reconstruir o saldo de qualquer produto.
+    """
+    __tablename__ = "movimentacoes_estoque"
+    __table_args__ = (
+        # Extrato de um produto em ordem cronológica
+        Index("idx_movimentacoes_produto_data", "produto_id", "data_criacao"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    produto_id = Column(UUID(as_uuid=True), nullable=False)
+    tipo = Column(Enum(TipoMovimentacaoEstoque), nullable=False)
+    quantidade = Column(Integer, nullable=False)  # Negativa nas saídas
+    saldo_apos = Column(Integer, nullable=False)
+    # Sem chave estrangeira: a venda pode ter sido movida para o arquivo frio
+    venda_id = Column(UUID(as_uuid=True), nullable=True, index=True)
+    observacao = Column(String(255), nullable=True)
+    data_criacao = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return (
+            f"<MovimentacaoEstoque(produto_id={self.produto_id}, tipo='{self.tipo.value}', "
+            f"quantidade={self.quantidade}, saldo_apos={self.saldo_apos})>"
+        )
+
+class ChaveIdempotencia(Base):
+    """
+    Modelo para a tabela de chaves de idempotência da criação de vendas.
+    
+    Associa o cabeçalho Idempotency-Key enviado pelo terminal à venda
+    criada e à resposta devolvida, para que uma nova tentativa da mesma
+    requisição receba a resposta original em vez de criar outra venda.
+    As chaves valem até expira_em.
+    """
+    __tablename__ = "chaves_idempotencia"
+
+    chave = Column(String(255), primary_key=True)
+    venda_id = Column(UUID(as_uuid=True), ForeignKey('vendas.id'), nullable=False)
+    hash_requisicao = Column(String(64), nullable=False)  # SHA-256 do corpo da requisição
+    resposta = Column(Text, nullable=True)  # JSON da VendaResponse
+    data_criacao = Column(DateTime(timezone=True), nullable=False)
+    expira_em = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<ChaveIdempotencia(chave='{self.chave}', venda_id={self.venda_id})>"
+
+class SessaoCaixa(Base):
+    """
+    Modelo para a tabela de sessões de caixa (turno de um operador em um terminal).
+    
+    Cada venda é registrada em uma sessão aberta. Os totais da sessão
+    (vendas concluídas, valor por forma de pagamento, troco e
+    cancelamentos) são atualizados na mesma transação que cria, conclui
+    ou cancela cada venda, de modo que o fechamento do caixa lê apenas
+    esta linha. Cada terminal tem no máximo uma sessão aberta.
+    """
+    __tablename__ = "sessoes_caixa"
+    __table_args__ = (
+        Index(
+            "idx_sessoes_caixa_terminal_aberta", "terminal", unique=True,
+            sqlite_where=text("status = 'ABERTA'"), postgresql_where=text("status = 'ABERTA'")
+        ),
+    )
+
+    # Totais por forma de pagamento: coluna total_<forma> (valor_pago somado)
+    COLUNAS_FORMAS = {forma: f"total_{forma.value}" for forma in FormaPagamento}
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    terminal = Column(String(50), nullable=False, index=True)
+    operador = Column(String(100), nullable=False)
+    status = Column(Enum(StatusSessaoCaixa), nullable=False, default=StatusSessaoCaixa.ABERTA)
+    
+    # Abertura e fechamento
+    data_abertura = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    data_fechamento = Column(DateTime(timezone=True), nullable=True)
+    valor_abertura = Column(Integer, nullable=False, default=0)  # Fundo de troco, em centavos
+    valor_fechamento = Column(Integer, nullable=True)  # Dinheiro contado no fechamento, em centavos
+    observacoes = Column(Text, nullable=True)
+    
+    # Totais das vendas concluídas (em centavos)
+    quantidade_vendas = Column(Integer, nullable=False, default=0)
+    total_vendas = Column(Integer, nullable=False, default=0)
+    total_troco = Column(Integer, nullable=False, default=0)
+    total_dinheiro = Column(Integer, nullable=False, default=0)
+    total_cartao_credito = Column(Integer, nullable=False, default=0)
+    total_cartao_debito = Column(Integer, nullable=False, default=0)
+    total_pix = Column(Integer, nullable=False, default=0)
+    total_vale_presente = Column(Integer, nullable=False, default=0)
+    total_crediario = Column(Integer, nullable=False, default=0)
+    
+    # Vendas canceladas
+    quantidade_cancelamentos = Column(Integer, nullable=False, default=0)
+    total_cancelado = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return (
+            f"<SessaoCaixa(id={self.id}, terminal='{self.terminal}', "
+            f"status='{self.status.value}', total={self.total_vendas})>"
+        )
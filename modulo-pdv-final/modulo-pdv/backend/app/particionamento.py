@@ -0,0 +1,161 @@
+"""
+Particionamento mensal (PostgreSQL) das tabelas de vendas, itens e pagamentos.
+
+Com o particionamento ativo (migração com PARTICIONAR_VENDAS=true), vendas,
+itens_venda e pagamentos_venda são particionadas por intervalo de
+data_venda, uma partição por mês em cada tabela (vendas_p2026_10, ...). Os
+filtros por período de crud_vendas usam data_venda, de modo que o
+PostgreSQL lê apenas as partições do período (partition pruning).
+"""
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from datetime import date
+from typing import Dict, List, Optional
+import os
+import re
+
+# Tabelas particionadas por data_venda, na ordem de dependência (vendas primeiro)
+TABELAS_PARTICIONADAS = ("vendas", "itens_venda", "pagamentos_venda")
+
+# Meses à frente do atual que devem ter partição criada
+PARTICOES_MESES_FUTUROS = int(os.getenv("PARTICOES_MESES_FUTUROS", "3"))
+
+# Schema que recebe as partições arquivadas
+ARQUIVO_SCHEMA = os.getenv("ARQUIVO_SCHEMA", "arquivo_pdv")
+
+_PADRAO_PARTICAO = re.compile(r"^(?P<tabela>\w+)_p(?P<ano>\d{4})_(?P<mes>\d{2})$")
+
+def inicio_mes(dia: date) -> date:
+    """Primeiro dia do mês de `dia`"""
+    return dia.replace(day=1)
+
+def somar_meses(mes: date, meses: int) -> date:
+    """Primeiro dia do mês `meses` meses depois (ou antes) do mês de `mes`"""
+    indice = mes.year * 12 + mes.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+def meses_entre(desde: date, ate: date) -> List[date]:
+    """Primeiro dia de cada mês de `desde` até `ate`, inclusive"""
+    meses = []
+    mes = inicio_mes(desde)
+    while mes <= ate:
+        meses.append(mes)
+        mes = somar_meses(mes, 1)
+    return meses
+
+def nome_particao(tabela: str, mes: date) -> str:
+    """Nome da partição de uma tabela para o mês: vendas_p2026_10"""
+    return f"{tabela}_p{mes:%Y_%m}"
+
+def mes_da_particao(tabela: str, nome: str) -> Optional[date]:
+    """Mês de uma partição a partir do nome (None se não seguir o padrão)"""
+    encontrado = _PADRAO_PARTICAO.match(nome)
+    if not encontrado or encontrado["tabela"] != tabela:
+        return None
+    return date(int(encontrado["ano"]), int(encontrado["mes"]), 1)
+
+def particionado(conexao: Connection) -> bool:
+    """Indica se a tabela de vendas está particionada neste banco"""
+    if conexao.dialect.name != "postgresql":
+        return False
+    tipo = conexao.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass('vendas')")
+    ).scalar()
+    return tipo == "p"
+
+def listar_particoes(conexao: Connection, tabela: str) -> Dict[date, str]:
+    """Partições mensais anexadas à tabela, por mês"""
+    nomes = conexao.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:tabela)"
+        ),
+        {"tabela": tabela}
+    ).scalars()
+    particoes = {}
+    for nome in nomes:
+        mes = mes_da_particao(tabela, nome)
+        if mes:
+            particoes[mes] = nome
+    return particoes
+
+def criar_particoes(conexao: Connection, desde: date, ate: date) -> List[str]:
+    """
+    Cria as partições mensais que faltam, de `desde` até `ate`, nas três tabelas.
+
+    Só executa DDL para os meses sem partição: criar uma partição bloqueia
+    a tabela mãe, então as existentes não são tocadas. Não faz commit.
+
+    Returns:
+        Nomes das partições criadas
+    """
+    preparador = conexao.dialect.identifier_preparer
+    criadas = []
+    for tabela in TABELAS_PARTICIONADAS:
+        existentes = listar_particoes(conexao, tabela)
+        for mes in meses_entre(desde, ate):
+            if mes in existentes:
+                continue
+            nome = nome_particao(tabela, mes)
+            conexao.execute(text(
+                f"CREATE TABLE {preparador.quote(nome)} PARTITION OF {preparador.quote(tabela)} "
+                f"FOR VALUES FROM ('{mes.isoformat()}') TO ('{somar_meses(mes, 1).isoformat()}')"
+            ))
+            criadas.append(nome)
+    return criadas
+
+def garantir_particoes_futuras(
+    conexao: Connection, hoje: date, meses: int = PARTICOES_MESES_FUTUROS
+) -> List[str]:
+    """
+    Garante partições do mês atual até `meses` meses à frente.
+
+    Executado na inicialização da aplicação e pelo script de partições
+    (agendado diariamente). Não faz nada sem particionamento ativo.
+    """
+    if not particionado(conexao):
+        return []
+    return criar_particoes(conexao, inicio_mes(hoje), somar_meses(inicio_mes(hoje), meses))
+
+def arquivar_particoes(conexao: Connection, antes_de: date, schema: str = ARQUIVO_SCHEMA) -> List[str]:
+    """
+    Desanexa as partições dos meses anteriores ao de `antes_de` e as move para `schema`.
+
+    Itens e pagamentos saem antes das vendas: a partição de vendas só pode
+    ser desanexada quando nenhuma linha particionada a referencia. As
+    chaves estrangeiras das partições desanexadas são removidas, pois
+    apontariam para vendas que deixam a tabela. Os dados continuam
+    consultáveis no schema de arquivo. Não faz commit.
+
+    Returns:
+        Nomes qualificados das partições arquivadas
+    """
+    if not particionado(conexao):
+        raise ValueError("As tabelas de vendas não estão particionadas neste banco")
+
+    preparador = conexao.dialect.identifier_preparer
+    limite = inicio_mes(antes_de)
+    conexao.execute(text(f"CREATE SCHEMA IF NOT EXISTS {preparador.quote(schema)}"))
+
+    arquivadas = []
+    for tabela in reversed(TABELAS_PARTICIONADAS):
+        for mes, nome in sorted(listar_particoes(conexao, tabela).items()):
+            if mes >= limite:
+                continue
+            conexao.execute(text(
+                f"ALTER TABLE {preparador.quote(tabela)} DETACH PARTITION {preparador.quote(nome)}"
+            ))
+            restricoes = conexao.execute(
+                text("SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:nome) AND contype = 'f'"),
+                {"nome": nome}
+            ).scalars().all()
+            for restricao in restricoes:
+                conexao.execute(text(
+                    f"ALTER TABLE {preparador.quote(nome)} DROP CONSTRAINT {preparador.quote(restricao)}"
+                ))
+            conexao.execute(text(
+                f"ALTER TABLE {preparador.quote(nome)} SET SCHEMA {preparador.quote(schema)}"
+            ))
+            arquivadas.append(f"{schema}.{nome}")
+    return arquivadas
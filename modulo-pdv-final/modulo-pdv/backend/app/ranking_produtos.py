@@ -0,0 +1,86 @@
+"""
+Cache em memória do ranking de produtos vendidos no dia corrente.
+"""
+
+from typing import Dict, Iterable, Optional, Tuple
+from datetime import date
+import os
+import threading
+import time
+import uuid
+
+# Tempo máximo (segundos) sem recarregar do banco, para incluir vendas de outros processos
+RANKING_PRODUTOS_CACHE_TTL = float(os.getenv("RANKING_PRODUTOS_CACHE_TTL", "60"))
+
+# Totais de um produto: [quantidade, receita, nome_produto]
+Totais = Dict[uuid.UUID, list]
+
+class RankingProdutosDia:
+    """
+    Totais por produto das vendas concluídas de um dia, atualizados a cada venda.
+
+    O cache é carregado do banco na primeira consulta e, a partir daí,
+    incrementado com os itens de cada venda criada neste processo, depois
+    do commit. Para não contar uma venda duas vezes (ou nenhuma), cada
+    venda guarda a versão da carga vista antes do commit: se houve outra
+    carga no meio do caminho, o cache é descartado em vez de incrementado;
+    e uma carga só é guardada se nenhuma venda foi registrada enquanto o
+    banco era consultado.
+    """
+
+    def __init__(self, ttl: float = RANKING_PRODUTOS_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._dia: Optional[date] = None
+        self._totais: Optional[Totais] = None
+        self._expira_em = 0.0
+        self._carga = 0
+        self._escritas = 0
+
+    def versao(self) -> Tuple[int, int]:
+        """Versão atual (carga, escritas), registrada antes de consultar ou gravar no banco"""
+        with self._lock:
+            return self._carga, self._escritas
+
+    def obter(self, dia: date) -> Optional[Totais]:
+        """Totais do dia, se estiverem em cache e dentro da validade"""
+        with self._lock:
+            if self._totais is None or self._dia != dia or time.monotonic() >= self._expira_em:
+                return None
+            return {produto_id: list(totais) for produto_id, totais in self._totais.items()}
+
+    def carregar(self, dia: date, totais: Totais, versao: Tuple[int, int]) -> None:
+        """Guarda os totais lidos do banco, se nenhuma venda foi registrada desde `versao`"""
+        with self._lock:
+            if self._escritas != versao[1]:
+                return
+            self._dia = dia
+            self._totais = {produto_id: list(valores) for produto_id, valores in totais.items()}
+            self._expira_em = time.monotonic() + self.ttl
+            self._carga += 1
+
+    def acumular(
+        self, dia: date, itens: Iterable[Tuple[uuid.UUID, int, int, str]], versao: Tuple[int, int]
+    ) -> None:
+        """Soma os itens (produto, quantidade, subtotal, nome) de uma venda já gravada"""
+        with self._lock:
+            self._escritas += 1
+            if self._totais is None or self._dia != dia:
+                return
+            if self._carga != versao[0]:
+                # O cache foi carregado depois do início da venda: pode já incluí-la
+                self._totais = None
+                return
+            for produto_id, quantidade, subtotal, nome in itens:
+                totais = self._totais.setdefault(produto_id, [0, 0, nome])
+                totais[0] += quantidade
+                totais[1] += subtotal
+
+    def invalidar(self) -> None:
+        """Descarta o cache (por exemplo, ao cancelar uma venda)"""
+        with self._lock:
+            self._escritas += 1
+            self._totais = None
+
+# Instância global do cache
+ranking_produtos_hoje = RankingProdutosDia()
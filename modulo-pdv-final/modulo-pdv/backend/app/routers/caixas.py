@@ -0,0 +1,131 @@
+"""
+Router para endpoints das sessões de caixa do PDV.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+import uuid
+
+from app.database import get_async_db
+from app.crud_caixa import crud_caixa, CaixaJaAberto, CaixaNaoAberto
+from app.models import StatusSessaoCaixa
+from app.schemas import SessaoCaixaCreate, SessaoCaixaFechamento, SessaoCaixaResponse, StatusSessaoCaixaEnum
+
+router = APIRouter(prefix="/api/v1/caixas", tags=["caixas"])
+
+@router.post("/", response_model=SessaoCaixaResponse, status_code=status.HTTP_201_CREATED)
+async def abrir_caixa(
+    sessao: SessaoCaixaCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Abre uma sessão de caixa no terminal.
+
+    - **terminal**: Identificação do terminal (no máximo uma sessão aberta por terminal)
+    - **operador**: Operador do caixa
+    - **valor_abertura**: Fundo de troco em centavos
+    """
+    try:
+        db_sessao = await crud_caixa.abrir_async(db=db, obj_in=sessao)
+    except CaixaJaAberto as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao abrir caixa: {str(e)}"
+        )
+    return crud_caixa.resumo(db_sessao)
+
+@router.get("/", response_model=List[SessaoCaixaResponse])
+async def listar_caixas(
+    pagina: int = Query(1, ge=1, description="Número da página"),
+    por_pagina: int = Query(20, ge=1, le=100, description="Itens por página"),
+    terminal: Optional[str] = Query(None, description="Filtro por terminal"),
+    status_sessao: Optional[StatusSessaoCaixaEnum] = Query(None, alias="status", description="Status da sessão"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Lista as sessões de caixa, das mais recentes para as mais antigas.
+
+    - **pagina**: Número da página (padrão: 1)
+    - **por_pagina**: Itens por página (padrão: 20, máximo: 100)
+    - **terminal**: Filtro por terminal
+    - **status**: Filtro por status (aberta ou fechada)
+    """
+    sessoes = await crud_caixa.get_multi_async(
+        db=db,
+        skip=(pagina - 1) * por_pagina,
+        limit=por_pagina,
+        terminal=terminal,
+        status=StatusSessaoCaixa(status_sessao.value) if status_sessao else None
+    )
+    return [crud_caixa.resumo(sessao) for sessao in sessoes]
+
+@router.get("/terminal/{terminal}/aberta", response_model=SessaoCaixaResponse)
+async def buscar_caixa_aberto(
+    terminal: str,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Retorna a sessão de caixa aberta do terminal.
+
+    - **terminal**: Identificação do terminal
+    """
+    db_sessao = await crud_caixa.get_aberta_async(db=db, terminal=terminal)
+    if not db_sessao:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Nenhum caixa aberto neste terminal"
+        )
+    return crud_caixa.resumo(db_sessao)
+
+@router.get("/{sessao_id}", response_model=SessaoCaixaResponse)
+async def buscar_caixa(
+    sessao_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Retorna a sessão de caixa com os totais do turno.
+
+    - **sessao_id**: ID da sessão de caixa
+    """
+    db_sessao = await crud_caixa.get_async(db=db, id=sessao_id)
+    if not db_sessao:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sessão de caixa não encontrada"
+        )
+    return crud_caixa.resumo(db_sessao)
+
+@router.post("/{sessao_id}/fechar", response_model=SessaoCaixaResponse)
+async def fechar_caixa(
+    sessao_id: uuid.UUID,
+    fechamento: SessaoCaixaFechamento,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Fecha a sessão de caixa e retorna o resumo do turno.
+
+    Os totais são mantidos a cada venda, então o fechamento lê apenas a
+    linha da sessão. A resposta traz o dinheiro esperado na gaveta e a
+    diferença para o valor contado.
+
+    - **sessao_id**: ID da sessão de caixa
+    - **valor_fechamento**: Dinheiro contado na gaveta em centavos
+    """
+    try:
+        db_sessao = await crud_caixa.fechar_async(db=db, id=sessao_id, obj_in=fechamento)
+    except CaixaNaoAberto as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao fechar caixa: {str(e)}"
+        )
+    if not db_sessao:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sessão de caixa não encontrada"
+        )
+    return crud_caixa.resumo(db_sessao)
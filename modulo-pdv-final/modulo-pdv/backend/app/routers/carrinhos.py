@@ -0,0 +1,161 @@
+"""
+Router para endpoints do carrinho do PDV (venda pendente montada no servidor).
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+import uuid
+
+from app.database import get_async_db
+from app.crud_carrinhos import crud_carrinho, CarrinhoNaoPendente
+from app.crud_vendas import crud_venda
+from app.schemas import (
+    CarrinhoCreate, CarrinhoDesconto, CarrinhoFinalizar, CarrinhoResumo, CarrinhoItemResponse,
+    ItemVendaCreate, VendaResponse, SuccessResponse
+)
+
+router = APIRouter(prefix="/api/v1/carrinhos", tags=["carrinhos"])
+
+def _erro_carrinho(e: Exception, acao: str) -> HTTPException:
+    """Converte as exceções das operações do carrinho na resposta HTTP"""
+    if isinstance(e, CarrinhoNaoPendente):
+        return HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    if isinstance(e, ValueError):
+        return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=f"Erro ao {acao}: {str(e)}"
+    )
+
+def _nao_encontrado(detalhe: str = "Carrinho não encontrado") -> HTTPException:
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detalhe)
+
+@router.post("/", response_model=CarrinhoResumo, status_code=status.HTTP_201_CREATED)
+async def abrir_carrinho(
+    carrinho: CarrinhoCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Abre um carrinho vazio (venda com status pendente).
+
+    - **carrinho**: Cliente, vendedor e observações da venda
+    """
+    try:
+        return await crud_carrinho.criar_async(db=db, obj_in=carrinho)
+    except Exception as e:
+        raise _erro_carrinho(e, "abrir carrinho")
+
+@router.get("/{carrinho_id}", response_model=VendaResponse)
+async def obter_carrinho(
+    carrinho_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Retorna o carrinho com seus itens.
+
+    - **carrinho_id**: ID do carrinho (ID da venda)
+    """
+    db_carrinho = await crud_venda.get_async(db=db, id=carrinho_id)
+    if not db_carrinho:
+        raise _nao_encontrado()
+    return db_carrinho
+
+@router.post("/{carrinho_id}/itens", response_model=CarrinhoItemResponse, status_code=status.HTTP_201_CREATED)
+async def adicionar_item(
+    carrinho_id: uuid.UUID,
+    item: ItemVendaCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Inclui um item no carrinho e retorna os totais atualizados.
+
+    - **carrinho_id**: ID do carrinho
+    - **item**: Produto, quantidade, preço unitário e desconto do item
+    """
+    try:
+        resultado = await crud_carrinho.adicionar_item_async(db=db, carrinho_id=carrinho_id, item=item)
+    except Exception as e:
+        raise _erro_carrinho(e, "incluir item")
+    if resultado is None:
+        raise _nao_encontrado()
+    return resultado
+
+@router.delete("/{carrinho_id}/itens/{item_id}", response_model=CarrinhoResumo)
+async def remover_item(
+    carrinho_id: uuid.UUID,
+    item_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Remove um item do carrinho e retorna os totais atualizados.
+
+    - **carrinho_id**: ID do carrinho
+    - **item_id**: ID do item
+    """
+    try:
+        resultado = await crud_carrinho.remover_item_async(db=db, carrinho_id=carrinho_id, item_id=item_id)
+    except Exception as e:
+        raise _erro_carrinho(e, "remover item")
+    if resultado is None:
+        raise _nao_encontrado("Carrinho ou item não encontrado")
+    return resultado
+
+@router.put("/{carrinho_id}/desconto", response_model=CarrinhoResumo)
+async def aplicar_desconto(
+    carrinho_id: uuid.UUID,
+    desconto: CarrinhoDesconto,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Define o desconto total do carrinho.
+
+    - **carrinho_id**: ID do carrinho
+    - **desconto_total**: Desconto em centavos (não pode passar do subtotal)
+    """
+    try:
+        resultado = await crud_carrinho.aplicar_desconto_async(
+            db=db, carrinho_id=carrinho_id, desconto_total=desconto.desconto_total
+        )
+    except Exception as e:
+        raise _erro_carrinho(e, "aplicar desconto")
+    if resultado is None:
+        raise _nao_encontrado()
+    return resultado
+
+@router.post("/{carrinho_id}/finalizar", response_model=VendaResponse)
+async def finalizar_carrinho(
+    carrinho_id: uuid.UUID,
+    finalizacao: CarrinhoFinalizar,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Finaliza o carrinho: registra os pagamentos, dá baixa no estoque e conclui a venda.
+
+    - **carrinho_id**: ID do carrinho
+    - **pagamentos**: Pagamentos cuja soma deve ser igual ao total do carrinho
+    """
+    try:
+        db_venda = await crud_carrinho.finalizar_async(db=db, carrinho_id=carrinho_id, obj_in=finalizacao)
+    except Exception as e:
+        raise _erro_carrinho(e, "finalizar carrinho")
+    if db_venda is None:
+        raise _nao_encontrado()
+    return db_venda
+
+@router.delete("/{carrinho_id}", response_model=SuccessResponse)
+async def cancelar_carrinho(
+    carrinho_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Cancela um carrinho pendente.
+
+    - **carrinho_id**: ID do carrinho
+    """
+    try:
+        db_carrinho = await crud_carrinho.cancelar_async(db=db, carrinho_id=carrinho_id)
+    except Exception as e:
+        raise _erro_carrinho(e, "cancelar carrinho")
+    if db_carrinho is None:
+        raise _nao_encontrado()
+    return SuccessResponse(message="Carrinho cancelado com sucesso")
@@ -2,26 +2,45 @@
 Endpoints da API para gestão de clientes.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Iterator, List, Optional
+from datetime import date, datetime
+from enum import Enum
 from uuid import UUID
 import math
 
-from app.database import get_db
+from app.database import get_async_db, get_db
+from app.autocomplete_clientes import indice_autocomplete_clientes
 from app.crud import ClienteCRUD
+from app.exportacao import gerar_csv, gerar_ndjson
+from app.importacao_clientes import importador_clientes, ler_planilha
 from app.schemas import (
     ClienteCreate, 
     ClienteUpdate, 
     ClienteResponse, 
     ClienteList, 
     ClienteFilter,
+    ClienteSugestao,
+    ImportacaoClientesResultado,
     ErrorResponse,
+    FormatoExportacaoEnum,
     SuccessResponse,
     TipoClienteEnum,
     StatusClienteEnum
 )
 
+# Colunas disponíveis na exportação de clientes
+COLUNAS_EXPORTACAO = [
+    "id", "nome", "tipo_cliente", "cpf_cnpj", "rg_ie", "email", "telefone", "celular",
+    "endereco", "numero", "complemento", "bairro", "cidade", "estado", "cep",
+    "data_nascimento", "profissao", "observacoes", "status", "limite_credito", "pontos_fidelidade",
+    "data_criacao", "data_atualizacao", "criado_por", "atualizado_por"
+]
+
 router = APIRouter(
     prefix="/clientes",
     tags=["clientes"],
@@ -37,7 +56,7 @@ router = APIRouter(
 )
 async def criar_cliente(
     cliente: ClienteCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Cria um novo cliente no sistema.
@@ -51,7 +70,7 @@ async def criar_cliente(
     """
     try:
         crud = ClienteCRUD(db)
-        db_cliente = crud.create(cliente)
+        db_cliente = await crud.create_async(cliente)
         return db_cliente
     except ValueError as e:
         raise HTTPException(
@@ -80,7 +99,7 @@ async def listar_clientes(
     estado: Optional[str] = Query(None, description="Filtro por estado"),
     cpf_cnpj: Optional[str] = Query(None, description="Filtro por CPF/CNPJ"),
     email: Optional[str] = Query(None, description="Filtro por email"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Lista clientes com paginação e filtros opcionais.
@@ -90,10 +109,10 @@ async def listar_clientes(
     - **por_pagina**: Número de itens por página (máximo 100)
     
     Filtros disponíveis:
-    - **nome**: Busca parcial por nome
+    - **nome**: Busca parcial por nome (sem distinção de acentos)
     - **tipo_cliente**: pessoa_fisica ou pessoa_juridica
     - **status**: ativo, inativo ou bloqueado
-    - **cidade**: Busca parcial por cidade
+    - **cidade**: Busca parcial por cidade (sem distinção de acentos)
     - **estado**: UF do estado
     - **cpf_cnpj**: CPF ou CNPJ exato
     - **email**: Busca parcial por email
@@ -116,7 +135,7 @@ async def listar_clientes(
         skip = (pagina - 1) * por_pagina
         
         # Busca clientes
-        clientes, total = crud.get_all(skip=skip, limit=por_pagina, filters=filters)
+        clientes, total = await crud.get_all_async(skip=skip, limit=por_pagina, filters=filters)
         
         # Calcula total de páginas
         total_paginas = math.ceil(total / por_pagina) if total > 0 else 1
@@ -134,6 +153,153 @@ async def listar_clientes(
             detail="Erro interno do servidor"
         )
 
+@router.get(
+    "/autocomplete",
+    response_model=List[ClienteSugestao],
+    summary="Autocomplete de clientes",
+    description="Sugere clientes pelo início do nome ou do CPF/CNPJ, sem consultar o banco"
+)
+async def autocomplete_clientes(
+    termo: str = Query(..., min_length=1, description="Início do nome ou do CPF/CNPJ"),
+    limite: int = Query(10, ge=1, le=50, description="Número máximo de sugestões")
+):
+    """
+    Sugere clientes para o termo digitado no PDV.
+    
+    - **termo**: Início do nome (ou de qualquer palavra do nome), sem
+      distinção de acentos, ou início do CPF/CNPJ
+    - **limite**: Número máximo de sugestões (máximo 50)
+    
+    As sugestões vêm de um índice em memória, carregado na inicialização e
+    atualizado periodicamente; clientes inativos não são sugeridos.
+    """
+    if not indice_autocomplete_clientes.carregado:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Índice de autocomplete de clientes ainda não carregado"
+        )
+    return indice_autocomplete_clientes.sugerir(termo, limite)
+
+def _valor_exportacao(valor: Any) -> Any:
+    """Converte o valor lido do banco para o arquivo exportado"""
+    if isinstance(valor, Enum):
+        return valor.value
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    if isinstance(valor, UUID):
+        return str(valor)
+    return valor
+
+@router.get(
+    "/export",
+    summary="Exportar clientes",
+    description="Exporta os clientes em CSV ou NDJSON, com as colunas escolhidas"
+)
+async def exportar_clientes(
+    formato: FormatoExportacaoEnum = Query(FormatoExportacaoEnum.CSV, description="Formato do arquivo"),
+    colunas: Optional[str] = Query(None, description="Colunas separadas por vírgula (padrão: todas)"),
+    nome: Optional[str] = Query(None, description="Filtro por nome"),
+    tipo_cliente: Optional[TipoClienteEnum] = Query(None, description="Filtro por tipo"),
+    status_cliente: Optional[StatusClienteEnum] = Query(None, alias="status", description="Filtro por status"),
+    cidade: Optional[str] = Query(None, description="Filtro por cidade"),
+    estado: Optional[str] = Query(None, description="Filtro por estado"),
+    db: Session = Depends(get_db)
+):
+    """
+    Exporta os clientes, na ordem de cadastro.
+    
+    - **formato**: csv ou ndjson (um objeto por cliente)
+    - **colunas**: Colunas exportadas, por exemplo nome,cpf_cnpj,celular;
+      só elas são lidas do banco
+    - **nome**, **tipo_cliente**, **status**, **cidade**, **estado**: Os
+      mesmos filtros da listagem de clientes
+    
+    O arquivo é gerado em fluxo contínuo a partir de um cursor no banco,
+    sem carregar todos os clientes em memória.
+    """
+    selecionadas = list(dict.fromkeys(
+        coluna.strip().lower() for coluna in colunas.split(",") if coluna.strip()
+    )) if colunas else COLUNAS_EXPORTACAO
+    invalidas = [coluna for coluna in selecionadas if coluna not in COLUNAS_EXPORTACAO]
+    if invalidas or not selecionadas:
+        db.close()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Colunas inválidas: {', '.join(invalidas)}" if invalidas else "Informe ao menos uma coluna"
+        )
+
+    filters = ClienteFilter(
+        nome=nome,
+        tipo_cliente=tipo_cliente,
+        status=status_cliente,
+        cidade=cidade,
+        estado=estado
+    )
+
+    # Usa a sessão síncrona: o StreamingResponse consome o gerador em uma
+    # thread do pool, fora do event loop
+    def conteudo() -> Iterator[str]:
+        try:
+            linhas = ClienteCRUD(db).iterar(selecionadas, filters)
+            valores = ([_valor_exportacao(valor) for valor in linha] for linha in linhas)
+            if formato == FormatoExportacaoEnum.CSV:
+                yield from gerar_csv(selecionadas, valores)
+            else:
+                yield from gerar_ndjson(dict(zip(selecionadas, linha)) for linha in valores)
+        finally:
+            # A resposta é enviada depois que a dependência get_db já encerrou
+            db.close()
+
+    media_type = "text/csv" if formato == FormatoExportacaoEnum.CSV else "application/x-ndjson"
+    return StreamingResponse(
+        conteudo(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="clientes.{formato.value}"'}
+    )
+
+@router.post(
+    "/importar",
+    response_model=ImportacaoClientesResultado,
+    summary="Importar clientes",
+    description="Importa clientes em massa de uma planilha CSV ou XLSX"
+)
+async def importar_clientes(
+    arquivo: UploadFile = File(..., description="Planilha de clientes (.csv ou .xlsx)"),
+    criado_por: Optional[str] = Query(None, max_length=100, description="Usuário responsável pela importação"),
+    tamanho_lote: int = Query(50000, ge=1000, le=200000, description="Linhas validadas por lote"),
+    db: Session = Depends(get_db)
+):
+    """
+    Importa clientes de uma planilha, com uma coluna por campo do cliente.
+    
+    - **arquivo**: CSV (UTF-8, separado por vírgula ou ponto e vírgula) ou
+      XLSX (primeira aba); a coluna nome é obrigatória
+    - **criado_por**: Usuário registrado como criador dos clientes
+    - **tamanho_lote**: Linhas validadas de uma vez
+    
+    Linhas inválidas ou com CPF/CNPJ ou email repetido no arquivo ou já
+    cadastrado são recusadas e listadas em erros, com a linha e o motivo;
+    as demais são importadas em uma única transação.
+    """
+    try:
+        # Importação longa: roda em uma thread do pool, fora do event loop
+        return await run_in_threadpool(
+            importador_clientes.importar,
+            db,
+            ler_planilha(arquivo.file, arquivo.filename, tamanho_lote),
+            criado_por
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao importar clientes: {str(e)}"
+        )
+
 @router.get(
     "/{cliente_id}",
     response_model=ClienteResponse,
@@ -142,7 +308,7 @@ async def listar_clientes(
 )
 async def buscar_cliente(
     cliente_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Busca um cliente específico pelo ID.
@@ -150,7 +316,7 @@ async def buscar_cliente(
     - **cliente_id**: ID único do cliente (UUID)
     """
     crud = ClienteCRUD(db)
-    cliente = crud.get_by_id(cliente_id)
+    cliente = await crud.get_by_id_async(cliente_id)
     
     if not cliente:
         raise HTTPException(
@@ -169,7 +335,7 @@ async def buscar_cliente(
 async def atualizar_cliente(
     cliente_id: UUID,
     cliente_update: ClienteUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Atualiza os dados de um cliente existente.
@@ -179,7 +345,7 @@ async def atualizar_cliente(
     """
     try:
         crud = ClienteCRUD(db)
-        cliente = crud.update(cliente_id, cliente_update)
+        cliente = await crud.update_async(cliente_id, cliente_update)
         
         if not cliente:
             raise HTTPException(
@@ -207,7 +373,7 @@ async def atualizar_cliente(
 )
 async def remover_cliente(
     cliente_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Remove um cliente do sistema.
@@ -217,7 +383,7 @@ async def remover_cliente(
     **Atenção**: Esta operação é irreversível!
     """
     crud = ClienteCRUD(db)
-    sucesso = crud.delete(cliente_id)
+    sucesso = await crud.delete_async(cliente_id)
     
     if not sucesso:
         raise HTTPException(
@@ -236,7 +402,7 @@ async def remover_cliente(
 async def inativar_cliente(
     cliente_id: UUID,
     usuario: Optional[str] = Query(None, description="Usuário responsável pela operação"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Marca um cliente como inativo (soft delete).
@@ -245,7 +411,7 @@ async def inativar_cliente(
     - **usuario**: Usuário responsável pela operação (opcional)
     """
     crud = ClienteCRUD(db)
-    cliente = crud.soft_delete(cliente_id, usuario)
+    cliente = await crud.soft_delete_async(cliente_id, usuario)
     
     if not cliente:
         raise HTTPException(
@@ -264,7 +430,7 @@ async def inativar_cliente(
 async def buscar_clientes(
     termo: str,
     limite: int = Query(10, ge=1, le=50, description="Número máximo de resultados"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Busca clientes por termo de pesquisa.
@@ -272,10 +438,11 @@ async def buscar_clientes(
     - **termo**: Termo para busca (nome, email ou CPF/CNPJ)
     - **limite**: Número máximo de resultados (máximo 50)
     
-    A busca é feita nos campos: nome, email e CPF/CNPJ
+    A busca é feita nos campos: nome, email e CPF/CNPJ, sem distinção de
+    acentos e maiúsculas, com os resultados mais relevantes primeiro
     """
     crud = ClienteCRUD(db)
-    clientes = crud.search(termo, limite)
+    clientes = await crud.search_async(termo, limite)
     return clientes
 
 @router.get(
@@ -284,7 +451,7 @@ async def buscar_clientes(
     description="Retorna estatísticas gerais dos clientes"
 )
 async def estatisticas_clientes(
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Retorna estatísticas gerais dos clientes.
@@ -293,9 +460,14 @@ async def estatisticas_clientes(
     - Total de clientes
     - Distribuição por status (ativo, inativo, bloqueado)
     - Distribuição por tipo (pessoa física, pessoa jurídica)
+    - Distribuição por década de nascimento
+    - Distribuição por UF
+    
+    Calculadas em uma única consulta e mantidas em cache por
+    CLIENTES_STATS_CACHE_TTL segundos (descartado a cada alteração).
     """
     crud = ClienteCRUD(db)
-    stats = crud.get_stats()
+    stats = await crud.get_stats_async()
     return stats
 
 @router.get(
@@ -306,7 +478,7 @@ async def estatisticas_clientes(
 )
 async def buscar_por_cpf_cnpj(
     documento: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Busca um cliente pelo CPF ou CNPJ.
@@ -314,7 +486,7 @@ async def buscar_por_cpf_cnpj(
     - **documento**: CPF (11 dígitos) ou CNPJ (14 dígitos)
     """
     crud = ClienteCRUD(db)
-    cliente = crud.get_by_cpf_cnpj(documento)
+    cliente = await crud.get_by_cpf_cnpj_async(documento)
     
     if not cliente:
         raise HTTPException(
@@ -332,7 +504,7 @@ async def buscar_por_cpf_cnpj(
 )
 async def buscar_por_email(
     email: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Busca um cliente pelo email.
@@ -340,7 +512,7 @@ async def buscar_por_email(
     - **email**: Email do cliente
     """
     crud = ClienteCRUD(db)
-    cliente = crud.get_by_email(email)
+    cliente = await crud.get_by_email_async(email)
     
     if not cliente:
         raise HTTPException(
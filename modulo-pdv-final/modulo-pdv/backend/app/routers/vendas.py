@@ -2,34 +2,87 @@
 Router para endpoints de vendas (PDV).
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, Response, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Annotated, Iterator, List, Optional
 from datetime import date
+import io
 import uuid
 
-from app.database import get_db
-from app.crud_vendas import crud_venda
+from app.arquivo_vendas import arquivo_vendas
+from app.conciliacao import ConciliadorPagamentos, ler_extrato
+from app.crud_caixa import CaixaNaoAberto
+from app.database import get_async_db, get_db
+from app.crud_vendas import crud_venda, ChaveIdempotenciaDuplicada
+from app.exportacao import gerar_csv, gerar_ndjson
 from app.schemas import (
     VendaCreate, VendaUpdate, VendaResponse, VendaList, VendaFilter,
-    VendaResumo, ErrorResponse, SuccessResponse, StatusVendaEnum
+    VendaResumo, VendaLoteResponse, ErrorResponse, SuccessResponse, StatusVendaEnum,
+    FormatoExportacaoEnum, VendedoresRanking, ProdutosRanking, CriterioRankingProdutosEnum,
+    ConciliacaoResultado
 )
 
+# Colunas do CSV de exportação: uma linha por item vendido
+COLUNAS_EXPORTACAO = [
+    "numero_venda", "data_venda", "data_criacao", "status", "cliente_id", "vendedor_id",
+    "subtotal", "desconto_total", "total_venda", "produto_id", "nome_produto", "sku",
+    "quantidade", "preco_unitario", "desconto_item", "subtotal_item", "pagamentos"
+]
+
 router = APIRouter(prefix="/api/v1/vendas", tags=["vendas"])
 
+async def _repetir_resposta(db: AsyncSession, chave: str, venda: VendaCreate) -> Optional[Response]:
+    """Resposta original da venda criada com a chave de idempotência, se houver"""
+    registro = await crud_venda.buscar_chave_idempotencia_async(db, chave)
+    if registro is None:
+        return None
+    if registro.hash_requisicao != crud_venda.hash_requisicao(venda):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key já utilizada com uma venda diferente"
+        )
+
+    resposta = registro.resposta
+    if resposta is None:
+        # A venda foi gravada, mas a resposta não chegou a ser guardada
+        db_venda = await crud_venda.get_async(db=db, id=registro.venda_id)
+        resposta = VendaResponse.model_validate(db_venda).model_dump_json()
+
+    return Response(
+        content=resposta,
+        media_type="application/json",
+        status_code=status.HTTP_201_CREATED,
+        headers={"Idempotent-Replayed": "true"}
+    )
+
 @router.post("/", response_model=VendaResponse, status_code=status.HTTP_201_CREATED)
 async def criar_venda(
     venda: VendaCreate,
-    db: Session = Depends(get_db)
+    idempotency_key: Annotated[
+        Optional[str],
+        Header(alias="Idempotency-Key", max_length=255, description="Chave para repetir a requisição com segurança")
+    ] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Cria uma nova venda no PDV.
     
     - **venda**: Dados da venda incluindo itens e pagamentos
+    - **Idempotency-Key** (cabeçalho): Se informado, repetições da mesma
+      requisição devolvem a venda já criada em vez de criar outra
     """
+    if idempotency_key:
+        repeticao = await _repetir_resposta(db, idempotency_key, venda)
+        if repeticao:
+            return repeticao
+
     try:
-        db_venda = crud_venda.create(db=db, obj_in=venda)
-        return db_venda
+        db_venda = await crud_venda.create_async(db=db, obj_in=venda, chave_idempotencia=idempotency_key)
+    except ChaveIdempotenciaDuplicada:
+        db_venda = None
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -41,23 +94,77 @@ async def criar_venda(
             detail=f"Erro interno do servidor: {str(e)}"
         )
 
+    if db_venda is None:
+        # Uma requisição simultânea com a mesma chave criou a venda primeiro
+        repeticao = await _repetir_resposta(db, idempotency_key, venda)
+        if repeticao:
+            return repeticao
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Requisição com esta Idempotency-Key em processamento"
+        )
+
+    if idempotency_key:
+        await crud_venda.salvar_resposta_idempotente_async(
+            db, idempotency_key, VendaResponse.model_validate(db_venda).model_dump_json()
+        )
+    return db_venda
+
+@router.post("/lote", response_model=VendaLoteResponse)
+async def criar_vendas_lote(
+    vendas: List[VendaCreate],
+    tamanho_commit: int = Query(100, ge=1, le=1000, description="Vendas gravadas por commit"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Cria várias vendas de uma vez (sincronização de terminais offline).
+    
+    - **vendas**: Lista de vendas, cada uma com itens e pagamentos
+    - **tamanho_commit**: Quantidade de vendas gravadas por commit (padrão: 100)
+    
+    Retorna o resultado de cada venda; vendas inválidas não impedem
+    a gravação das demais.
+    """
+    try:
+        resultados = await crud_venda.create_lote_async(
+            db=db,
+            vendas=vendas,
+            tamanho_commit=tamanho_commit
+        )
+        sucesso = sum(1 for resultado in resultados if resultado["sucesso"])
+        return VendaLoteResponse(
+            total=len(resultados),
+            sucesso=sucesso,
+            falhas=len(resultados) - sucesso,
+            resultados=resultados
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao processar lote de vendas: {str(e)}"
+        )
+
 @router.get("/", response_model=VendaList)
 async def listar_vendas(
     pagina: int = Query(1, ge=1, description="Número da página"),
     por_pagina: int = Query(20, ge=1, le=100, description="Itens por página"),
+    cursor: Optional[str] = Query(None, description="Cursor retornado pela página anterior"),
+    contar_total: bool = Query(True, description="Calcula o total de registros"),
     data_inicio: Optional[date] = Query(None, description="Data de início do período"),
     data_fim: Optional[date] = Query(None, description="Data de fim do período"),
     cliente_id: Optional[uuid.UUID] = Query(None, description="ID do cliente"),
     vendedor_id: Optional[uuid.UUID] = Query(None, description="ID do vendedor"),
     status: Optional[StatusVendaEnum] = Query(None, description="Status da venda"),
     numero_venda: Optional[str] = Query(None, description="Número da venda"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Lista vendas com filtros e paginação.
     
     - **pagina**: Número da página (padrão: 1)
     - **por_pagina**: Itens por página (padrão: 20, máximo: 100)
+    - **cursor**: Cursor da página anterior (paginação por chave; ignora `pagina`)
+    - **contar_total**: Se falso, não calcula `total` nem `total_paginas`
     - **data_inicio**: Filtro por data de início
     - **data_fim**: Filtro por data de fim
     - **cliente_id**: Filtro por cliente
@@ -76,34 +183,154 @@ async def listar_vendas(
         numero_venda=numero_venda
     )
     
-    vendas, total = crud_venda.get_multi(
-        db=db, 
-        skip=skip, 
-        limit=por_pagina,
-        filtros=filtros
-    )
+    try:
+        vendas, total = await crud_venda.get_multi_async(
+            db=db, 
+            skip=skip, 
+            limit=por_pagina,
+            filtros=filtros,
+            cursor=cursor,
+            contar_total=contar_total
+        )
+    except ValueError as e:
+        # O parâmetro `status` encobre o módulo fastapi.status nesta função
+        raise HTTPException(status_code=400, detail=str(e))
     
-    total_paginas = (total + por_pagina - 1) // por_pagina
+    total_paginas = (total + por_pagina - 1) // por_pagina if total is not None else None
+    proximo_cursor = crud_venda.codificar_cursor(vendas[-1]) if len(vendas) == por_pagina else None
     
     return VendaList(
         vendas=vendas,
         total=total,
         pagina=pagina,
         por_pagina=por_pagina,
-        total_paginas=total_paginas
+        total_paginas=total_paginas,
+        proximo_cursor=proximo_cursor
     )
 
+def _linhas_csv_vendas(vendas) -> Iterator[list]:
+    """Achata cada venda em uma linha por item, com os pagamentos resumidos"""
+    for venda in vendas:
+        pagamentos = ";".join(
+            f"{pagamento.forma_pagamento.value}:{pagamento.valor_pago}"
+            for pagamento in venda.pagamentos
+        )
+        for item in venda.itens:
+            yield [
+                venda.numero_venda, venda.data_venda, venda.data_criacao.isoformat(),
+                venda.status.value, venda.cliente_id or "", venda.vendedor_id or "",
+                venda.subtotal, venda.desconto_total, venda.total_venda,
+                item.produto_id, item.nome_produto, item.sku or "",
+                item.quantidade, item.preco_unitario, item.desconto_item, item.subtotal_item,
+                pagamentos
+            ]
+
+def _registros_ndjson_vendas(vendas) -> Iterator[dict]:
+    """Converte cada venda em um dicionário com itens e pagamentos"""
+    for venda in vendas:
+        registro = venda.to_dict()
+        registro["itens"] = [item.to_dict() for item in venda.itens]
+        registro["pagamentos"] = [pagamento.to_dict() for pagamento in venda.pagamentos]
+        yield registro
+
+@router.get("/export")
+async def exportar_vendas(
+    formato: FormatoExportacaoEnum = Query(FormatoExportacaoEnum.CSV, description="Formato do arquivo"),
+    data_inicio: Optional[date] = Query(None, description="Data de início do período"),
+    data_fim: Optional[date] = Query(None, description="Data de fim do período"),
+    db: Session = Depends(get_db)
+):
+    """
+    Exporta o histórico de vendas com itens e pagamentos.
+    
+    - **formato**: csv (uma linha por item) ou ndjson (um objeto por venda)
+    - **data_inicio**: Data de início do período
+    - **data_fim**: Data de fim do período
+    
+    O arquivo é gerado em fluxo contínuo a partir de um cursor no banco,
+    sem carregar o período inteiro em memória.
+    """
+    # Usa a sessão síncrona: o StreamingResponse consome o gerador em uma
+    # thread do pool, fora do event loop
+    def conteudo():
+        try:
+            vendas = crud_venda.iterar_vendas(db=db, data_inicio=data_inicio, data_fim=data_fim)
+            if formato == FormatoExportacaoEnum.CSV:
+                yield from gerar_csv(COLUNAS_EXPORTACAO, _linhas_csv_vendas(vendas))
+            else:
+                yield from gerar_ndjson(_registros_ndjson_vendas(vendas))
+        finally:
+            # A resposta é enviada depois que a dependência get_db já encerrou
+            db.close()
+
+    periodo = "_".join(str(data) for data in (data_inicio, data_fim) if data) or "completo"
+    media_type = "text/csv" if formato == FormatoExportacaoEnum.CSV else "application/x-ndjson"
+    return StreamingResponse(
+        conteudo(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="vendas_{periodo}.{formato.value}"'}
+    )
+
+@router.post("/pagamentos/conciliacao", response_model=ConciliacaoResultado)
+async def conciliar_pagamentos(
+    extrato: UploadFile = File(..., description="CSV do extrato da adquirente/PIX"),
+    data_inicio: Optional[date] = Query(None, description="Início do período do extrato"),
+    data_fim: Optional[date] = Query(None, description="Fim do período do extrato"),
+    incluir_conciliados: bool = Query(False, description="Listar também as transações conciliadas"),
+    tamanho_lote: int = Query(2000, ge=100, le=10000, description="Transações do extrato por consulta"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Concilia o extrato da adquirente/PIX com os pagamentos do PDV.
+    
+    - **extrato**: CSV com as colunas numero_transacao e valor (em reais);
+      numero_autorizacao é opcional
+    - **data_inicio** / **data_fim**: Período do extrato; se informado, lista
+      também os pagamentos com cartão/PIX do período ausentes do extrato
+    - **incluir_conciliados**: Lista as transações conciliadas (padrão: só o resumo)
+    - **tamanho_lote**: Transações do extrato buscadas por consulta
+    
+    Retorna o resumo e as transações divergentes, não encontradas no PDV,
+    sem extrato e inválidas.
+    """
+    if (data_inicio is None) != (data_fim is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Informe data_inicio e data_fim juntas"
+        )
+
+    try:
+        texto = (await extrato.read()).decode("utf-8-sig")
+        conciliador = ConciliadorPagamentos(tamanho_lote=tamanho_lote)
+        return await conciliador.conciliar_async(
+            db=db,
+            linhas=ler_extrato(io.StringIO(texto)),
+            data_inicio=data_inicio,
+            data_fim=data_fim,
+            incluir_conciliados=incluir_conciliados
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao conciliar pagamentos: {str(e)}"
+        )
+
 @router.get("/{venda_id}", response_model=VendaResponse)
 async def buscar_venda(
     venda_id: uuid.UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Busca uma venda específica por ID.
     
     - **venda_id**: ID único da venda
     """
-    db_venda = crud_venda.get(db=db, id=venda_id)
+    db_venda = await crud_venda.get_async(db=db, id=venda_id)
     if not db_venda:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -114,14 +341,20 @@ async def buscar_venda(
 @router.get("/numero/{numero_venda}", response_model=VendaResponse)
 async def buscar_venda_por_numero(
     numero_venda: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Busca uma venda específica por número.
     
     - **numero_venda**: Número único da venda
+    
+    Vendas antigas movidas para o arquivo frio são lidas dos arquivos Parquet.
     """
-    db_venda = crud_venda.get_by_numero(db=db, numero_venda=numero_venda)
+    db_venda = await crud_venda.get_by_numero_async(db=db, numero_venda=numero_venda)
+    if not db_venda:
+        db_venda = await run_in_threadpool(
+            arquivo_vendas.buscar_venda, numero_venda, crud_venda.data_do_numero(numero_venda)
+        )
     if not db_venda:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -133,7 +366,7 @@ async def buscar_venda_por_numero(
 async def atualizar_venda(
     venda_id: uuid.UUID,
     venda: VendaUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Atualiza uma venda existente.
@@ -141,7 +374,7 @@ async def atualizar_venda(
     - **venda_id**: ID único da venda
     - **venda**: Dados para atualização
     """
-    db_venda = crud_venda.get(db=db, id=venda_id)
+    db_venda = await crud_venda.get_async(db=db, id=venda_id)
     if not db_venda:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -149,8 +382,10 @@ async def atualizar_venda(
         )
     
     try:
-        db_venda = crud_venda.update(db=db, db_obj=db_venda, obj_in=venda)
+        db_venda = await crud_venda.update_async(db=db, db_obj=db_venda, obj_in=venda)
         return db_venda
+    except CaixaNaoAberto as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -160,14 +395,14 @@ async def atualizar_venda(
 @router.delete("/{venda_id}", response_model=SuccessResponse)
 async def cancelar_venda(
     venda_id: uuid.UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Cancela uma venda (soft delete).
     
     - **venda_id**: ID único da venda
     """
-    db_venda = crud_venda.get(db=db, id=venda_id)
+    db_venda = await crud_venda.get_async(db=db, id=venda_id)
     if not db_venda:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -175,8 +410,10 @@ async def cancelar_venda(
         )
     
     try:
-        crud_venda.delete(db=db, id=venda_id)
+        await crud_venda.delete_async(db=db, id=venda_id)
         return SuccessResponse(message="Venda cancelada com sucesso")
+    except CaixaNaoAberto as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -187,7 +424,7 @@ async def cancelar_venda(
 async def resumo_vendas(
     data_inicio: Optional[date] = Query(None, description="Data de início do período"),
     data_fim: Optional[date] = Query(None, description="Data de fim do período"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Gera resumo de vendas por período.
@@ -196,7 +433,7 @@ async def resumo_vendas(
     - **data_fim**: Data de fim do período
     """
     try:
-        resumo = crud_venda.get_resumo_vendas(
+        resumo = await crud_venda.get_resumo_vendas_async(
             db=db,
             data_inicio=data_inicio,
             data_fim=data_fim
@@ -211,7 +448,7 @@ async def resumo_vendas(
 @router.get("/cliente/{cliente_id}/historico", response_model=List[VendaResponse])
 async def historico_vendas_cliente(
     cliente_id: uuid.UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Busca histórico de vendas de um cliente.
@@ -219,7 +456,7 @@ async def historico_vendas_cliente(
     - **cliente_id**: ID único do cliente
     """
     try:
-        vendas = crud_venda.buscar_vendas_cliente(db=db, cliente_id=cliente_id)
+        vendas = await crud_venda.buscar_vendas_cliente_async(db=db, cliente_id=cliente_id)
         return vendas
     except Exception as e:
         raise HTTPException(
@@ -227,12 +464,109 @@ async def historico_vendas_cliente(
             detail=f"Erro ao buscar histórico: {str(e)}"
         )
 
+@router.get("/vendedores/ranking", response_model=VendedoresRanking)
+async def ranking_vendedores(
+    data_inicio: Optional[date] = Query(None, description="Data de início do período"),
+    data_fim: Optional[date] = Query(None, description="Data de fim do período"),
+    limite: Optional[int] = Query(None, ge=1, le=100, description="Quantidade máxima de vendedores"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Ranking de desempenho dos vendedores no período.
+    
+    - **data_inicio**: Data de início do período
+    - **data_fim**: Data de fim do período
+    - **limite**: Retorna no máximo esse número de vendedores (empates no corte pelo vendedor_id)
+    
+    Para cada vendedor: posição, total de vendas concluídas, valor total,
+    ticket médio e a série diária, calculados no banco.
+    """
+    try:
+        vendedores = await crud_venda.get_ranking_vendedores_async(
+            db=db,
+            data_inicio=data_inicio,
+            data_fim=data_fim,
+            limite=limite
+        )
+        return VendedoresRanking(data_inicio=data_inicio, data_fim=data_fim, vendedores=vendedores)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao gerar ranking de vendedores: {str(e)}"
+        )
+
+@router.get("/produtos/ranking", response_model=ProdutosRanking)
+async def ranking_produtos(
+    data_inicio: Optional[date] = Query(None, description="Data de início do período"),
+    data_fim: Optional[date] = Query(None, description="Data de fim do período"),
+    criterio: CriterioRankingProdutosEnum = Query(
+        CriterioRankingProdutosEnum.QUANTIDADE, description="Ordenar por unidades vendidas ou receita"
+    ),
+    limite: int = Query(10, ge=1, le=100, description="Quantidade de produtos"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Produtos mais vendidos no período.
+    
+    - **data_inicio**: Data de início do período
+    - **data_fim**: Data de fim do período
+    - **criterio**: quantidade (unidades) ou receita (soma dos subtotais)
+    - **limite**: Quantidade de produtos retornados
+    
+    Considera apenas vendas concluídas. O dia corrente (data_inicio e
+    data_fim iguais a hoje) é servido de um cache atualizado a cada venda.
+    """
+    try:
+        produtos = await crud_venda.get_ranking_produtos_async(
+            db=db,
+            data_inicio=data_inicio,
+            data_fim=data_fim,
+            criterio=criterio.value,
+            limite=limite
+        )
+        return ProdutosRanking(
+            data_inicio=data_inicio, data_fim=data_fim, criterio=criterio, produtos=produtos
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao gerar ranking de produtos: {str(e)}"
+        )
+
+@router.get("/vendedor/{vendedor_id}/resumo", response_model=VendaResumo)
+async def resumo_vendas_vendedor(
+    vendedor_id: uuid.UUID,
+    data_inicio: Optional[date] = Query(None, description="Data de início do período"),
+    data_fim: Optional[date] = Query(None, description="Data de fim do período"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Gera resumo das vendas de um vendedor por período.
+    
+    - **vendedor_id**: ID único do vendedor
+    - **data_inicio**: Data de início do período
+    - **data_fim**: Data de fim do período
+    """
+    try:
+        resumo = await crud_venda.get_resumo_vendas_async(
+            db=db,
+            data_inicio=data_inicio,
+            data_fim=data_fim,
+            vendedor_id=vendedor_id
+        )
+        return VendaResumo(**resumo)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao gerar resumo do vendedor: {str(e)}"
+        )
+
 @router.get("/vendedor/{vendedor_id}/vendas", response_model=List[VendaResponse])
 async def vendas_por_vendedor(
     vendedor_id: uuid.UUID,
     data_inicio: Optional[date] = Query(None, description="Data de início do período"),
     data_fim: Optional[date] = Query(None, description="Data de fim do período"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Busca vendas de um vendedor por período.
@@ -242,7 +576,7 @@ async def vendas_por_vendedor(
     - **data_fim**: Data de fim do período
     """
     try:
-        vendas = crud_venda.buscar_vendas_vendedor(
+        vendas = await crud_venda.buscar_vendas_vendedor_async(
             db=db,
             vendedor_id=vendedor_id,
             data_inicio=data_inicio,
@@ -9,6 +9,16 @@ from enum import Enum
 import re
 import uuid
 
+# Formato aceito para emails de clientes
+EMAIL_REGEX = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+
+# Unidades federativas aceitas no endereço de clientes
+ESTADOS_VALIDOS = [
+    'AC', 'AL', 'AP', 'AM', 'BA', 'CE', 'DF', 'ES', 'GO', 'MA',
+    'MT', 'MS', 'MG', 'PA', 'PB', 'PR', 'PE', 'PI', 'RJ', 'RN',
+    'RS', 'RO', 'RR', 'SC', 'SP', 'SE', 'TO'
+]
+
 class TipoClienteEnum(str, Enum):
     """Enum para tipos de cliente"""
     PESSOA_FISICA = "pessoa_fisica"
@@ -72,8 +82,7 @@ class ClienteBase(BaseModel):
             return v
         
         # Validação básica de email
-        email_regex = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(email_regex, v):
+        if not re.match(EMAIL_REGEX, v):
             raise ValueError('Email inválido')
         
         return v.lower()
@@ -98,13 +107,7 @@ class ClienteBase(BaseModel):
         if v is None:
             return v
         
-        estados_validos = [
-            'AC', 'AL', 'AP', 'AM', 'BA', 'CE', 'DF', 'ES', 'GO', 'MA',
-            'MT', 'MS', 'MG', 'PA', 'PB', 'PR', 'PE', 'PI', 'RJ', 'RN',
-            'RS', 'RO', 'RR', 'SC', 'SP', 'SE', 'TO'
-        ]
-        
-        if v.upper() not in estados_validos:
+        if v.upper() not in ESTADOS_VALIDOS:
             raise ValueError('Estado inválido')
         
         return v.upper()
@@ -156,6 +159,26 @@ class ClienteList(BaseModel):
     por_pagina: int
     total_paginas: int
 
+class ClienteSugestao(BaseModel):
+    """Schema para sugestão do autocomplete de clientes"""
+    id: uuid.UUID
+    nome: str
+    cpf_cnpj: Optional[str] = None
+
+class ImportacaoClientesErro(BaseModel):
+    """Schema para uma linha recusada na importação de clientes"""
+    linha: int = Field(..., description="Linha do arquivo (o cabeçalho é a linha 1)")
+    campo: Optional[str] = Field(None, description="Campo com problema")
+    motivo: str
+
+class ImportacaoClientesResultado(BaseModel):
+    """Schema para o resultado da importação de clientes"""
+    total_linhas: int = Field(..., description="Linhas de clientes lidas do arquivo")
+    importados: int
+    duplicados: int = Field(..., description="Já cadastrados ou repetidos no arquivo")
+    invalidos: int
+    erros: List[ImportacaoClientesErro] = []
+
 class ClienteFilter(BaseModel):
     """Schema para filtros de busca de clientes"""
     nome: Optional[str] = Field(None, description="Filtro por nome (busca parcial)")
@@ -248,6 +271,7 @@ class VendaBase(BaseModel):
     """Schema base para venda"""
     cliente_id: Optional[uuid.UUID] = Field(None, description="ID do cliente (opcional)")
     vendedor_id: Optional[uuid.UUID] = Field(None, description="ID do vendedor")
+    sessao_caixa_id: Optional[uuid.UUID] = Field(None, description="ID da sessão de caixa")
     desconto_total: int = Field(default=0, ge=0, description="Desconto total em centavos")
     observacoes: Optional[str] = Field(None, description="Observações da venda")
 
@@ -279,6 +303,7 @@ class VendaResponse(VendaBase):
     subtotal: int
     total_venda: int
     status: StatusVendaEnum
+    data_venda: Optional[date] = None
     data_criacao: datetime
     data_atualizacao: Optional[datetime] = None
     criado_por: Optional[str] = None
@@ -292,10 +317,132 @@ class VendaResponse(VendaBase):
 class VendaList(BaseModel):
     """Schema para listagem de vendas"""
     vendas: List[VendaResponse]
-    total: int
+    total: Optional[int] = Field(None, description="Total de registros (ausente se não contado)")
     pagina: int
     por_pagina: int
-    total_paginas: int
+    total_paginas: Optional[int] = None
+    proximo_cursor: Optional[str] = Field(None, description="Cursor para buscar a próxima página")
+
+class VendaLoteResultado(BaseModel):
+    """Schema para o resultado de uma venda enviada em lote"""
+    indice: int = Field(..., description="Posição da venda no lote enviado")
+    sucesso: bool
+    venda_id: Optional[uuid.UUID] = None
+    numero_venda: Optional[str] = None
+    erro: Optional[str] = None
+
+class VendaLoteResponse(BaseModel):
+    """Schema para resposta de criação de vendas em lote"""
+    total: int
+    sucesso: int
+    falhas: int
+    resultados: List[VendaLoteResultado]
+
+class CarrinhoCreate(BaseModel):
+    """Schema para abertura de carrinho (venda pendente montada item a item)"""
+    cliente_id: Optional[uuid.UUID] = Field(None, description="ID do cliente (opcional)")
+    vendedor_id: Optional[uuid.UUID] = Field(None, description="ID do vendedor")
+    sessao_caixa_id: Optional[uuid.UUID] = Field(None, description="ID da sessão de caixa")
+    observacoes: Optional[str] = Field(None, description="Observações da venda")
+    criado_por: Optional[str] = Field(None, max_length=100, description="Usuário que abriu o carrinho")
+
+class CarrinhoDesconto(BaseModel):
+    """Schema para o desconto total do carrinho"""
+    desconto_total: int = Field(..., ge=0, description="Desconto total em centavos")
+
+class CarrinhoFinalizar(BaseModel):
+    """Schema para finalização do carrinho"""
+    pagamentos: List[PagamentoVendaCreate] = Field(..., min_items=1, description="Pagamentos da venda")
+    atualizado_por: Optional[str] = Field(None, max_length=100, description="Usuário que finalizou a venda")
+
+class CarrinhoResumo(BaseModel):
+    """Schema para os totais correntes do carrinho"""
+    id: uuid.UUID
+    numero_venda: str
+    status: StatusVendaEnum
+    subtotal: int
+    desconto_total: int
+    total_venda: int
+
+    class Config:
+        from_attributes = True
+
+class CarrinhoItemResponse(CarrinhoResumo):
+    """Schema para resposta da inclusão de item no carrinho"""
+    item: ItemVendaResponse
+
+class StatusSessaoCaixaEnum(str, Enum):
+    """Enum para status da sessão de caixa"""
+    ABERTA = "aberta"
+    FECHADA = "fechada"
+
+class SessaoCaixaCreate(BaseModel):
+    """Schema para abertura de sessão de caixa"""
+    terminal: str = Field(..., min_length=1, max_length=50, description="Identificação do terminal")
+    operador: str = Field(..., min_length=1, max_length=100, description="Operador do caixa")
+    valor_abertura: int = Field(default=0, ge=0, description="Fundo de troco em centavos")
+    observacoes: Optional[str] = Field(None, description="Observações da abertura")
+
+class SessaoCaixaFechamento(BaseModel):
+    """Schema para fechamento de sessão de caixa"""
+    valor_fechamento: int = Field(..., ge=0, description="Dinheiro contado na gaveta em centavos")
+    observacoes: Optional[str] = Field(None, description="Observações do fechamento")
+
+class SessaoCaixaResponse(BaseModel):
+    """Schema para resposta de sessão de caixa com os totais do turno"""
+    id: uuid.UUID
+    terminal: str
+    operador: str
+    status: StatusSessaoCaixaEnum
+    data_abertura: datetime
+    data_fechamento: Optional[datetime] = None
+    valor_abertura: int
+    valor_fechamento: Optional[int] = None
+    observacoes: Optional[str] = None
+    quantidade_vendas: int
+    total_vendas: int
+    total_troco: int
+    totais_por_forma_pagamento: dict = Field(
+        ..., description="Valor recebido por forma de pagamento, em centavos"
+    )
+    quantidade_cancelamentos: int
+    total_cancelado: int
+    dinheiro_esperado: int = Field(..., description="Fundo de troco mais pagamentos em dinheiro")
+    diferenca_caixa: Optional[int] = Field(None, description="Dinheiro contado menos o esperado")
+
+class ConciliacaoRegistro(BaseModel):
+    """Schema para uma transação da conciliação de pagamentos"""
+    situacao: str = Field(..., description="conciliado, divergente, nao_encontrado, sem_extrato ou invalido")
+    numero_transacao: Optional[str] = None
+    linha_extrato: Optional[int] = Field(None, description="Linha do arquivo de extrato")
+    valor_extrato: Optional[int] = Field(None, description="Valor no extrato em centavos")
+    valor_pdv: Optional[int] = Field(None, description="Valor pago no PDV em centavos")
+    diferenca: Optional[int] = Field(None, description="Valor do extrato menos o do PDV")
+    vendas: Optional[str] = Field(None, description="Números das vendas com a transação")
+    forma_pagamento: Optional[str] = None
+    data_venda: Optional[date] = None
+    numero_autorizacao: Optional[str] = None
+    motivo: Optional[str] = None
+
+class ConciliacaoResumo(BaseModel):
+    """Schema para o resumo da conciliação de pagamentos"""
+    total_extrato: int = Field(..., description="Linhas lidas do extrato")
+    valor_extrato: int
+    valor_conciliado: int
+    conciliado: int
+    divergente: int
+    nao_encontrado: int
+    sem_extrato: int
+    invalido: int
+
+class ConciliacaoResultado(BaseModel):
+    """Schema para o resultado da conciliação de pagamentos"""
+    resumo: ConciliacaoResumo
+    conciliados: List[ConciliacaoRegistro] = []
+    divergentes: List[ConciliacaoRegistro] = []
+    nao_encontrados: List[ConciliacaoRegistro] = []
+    sem_extrato: List[ConciliacaoRegistro] = []
+    invalidos: List[ConciliacaoRegistro] = []
 
 class VendaFilter(BaseModel):
     """Schema para filtros de busca de vendas"""
@@ -306,13 +453,62 @@ class VendaFilter(BaseModel):
     status: Optional[StatusVendaEnum] = Field(None, description="Filtro por status")
     numero_venda: Optional[str] = Field(None, description="Filtro por número da venda")
 
+class FormatoExportacaoEnum(str, Enum):
+    """Enum para formatos de exportação"""
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+class CriterioRankingProdutosEnum(str, Enum):
+    """Enum para critérios do ranking de produtos"""
+    QUANTIDADE = "quantidade"
+    RECEITA = "receita"
+
 class VendaResumo(BaseModel):
     """Schema para resumo de vendas"""
     total_vendas: int
     valor_total: int
     ticket_medio: float
     vendas_por_status: dict
-    vendas_por_forma_pagamento: dict
+    vendas_por_forma_pagamento: dict = Field(
+        default_factory=dict,
+        description="Quantidade de pagamentos e valor total por forma de pagamento"
+    )
+
+class VendaDiaria(BaseModel):
+    """Schema para um dia da série de vendas"""
+    data: date
+    total_vendas: int
+    valor_total: int
+
+class VendedorRanking(BaseModel):
+    """Schema para o desempenho de um vendedor no ranking"""
+    posicao: int
+    vendedor_id: uuid.UUID
+    total_vendas: int
+    valor_total: int
+    ticket_medio: float
+    serie_diaria: List[VendaDiaria]
+
+class VendedoresRanking(BaseModel):
+    """Schema para o ranking de vendedores"""
+    data_inicio: Optional[date] = None
+    data_fim: Optional[date] = None
+    vendedores: List[VendedorRanking]
+
+class ProdutoRanking(BaseModel):
+    """Schema para um produto no ranking de mais vendidos"""
+    posicao: int
+    produto_id: uuid.UUID
+    nome_produto: str
+    quantidade: int
+    receita: int
+
+class ProdutosRanking(BaseModel):
+    """Schema para o ranking de produtos mais vendidos"""
+    data_inicio: Optional[date] = None
+    data_fim: Optional[date] = None
+    criterio: CriterioRankingProdutosEnum
+    produtos: List[ProdutoRanking]
 
 class ProdutoVenda(BaseModel):
     """Schema simplificado de produto para o PDV"""
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Script para mover vendas antigas para o arquivo frio (Parquet).
+
+Grava as vendas fechadas com mais de --meses meses, com itens e
+pagamentos, em arquivos Parquet por mês no diretório ARQUIVO_VENDAS_DIR e
+as remove do banco. A busca por número e o resumo de vendas continuam
+atendendo os meses arquivados.
+
+Uso:
+    python scripts/arquivar_vendas.py [--meses 24] [--diretorio ./arquivo_vendas]
+"""
+
+import argparse
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Adiciona o diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.database import SessionLocal, create_tables
+from app.arquivo_vendas import ARQUIVO_VENDAS_MESES, arquivo_vendas
+from app.crud_vendas import crud_venda
+from app.particionamento import inicio_mes, somar_meses
+
+def main():
+    """Função principal."""
+    parser = argparse.ArgumentParser(description="Move vendas antigas para o arquivo frio")
+    parser.add_argument("--meses", type=int, default=ARQUIVO_VENDAS_MESES, help="Idade mínima (meses) das vendas arquivadas")
+    parser.add_argument("--diretorio", help="Diretório dos arquivos (padrão: ARQUIVO_VENDAS_DIR)")
+    args = parser.parse_args()
+
+    if args.diretorio:
+        arquivo_vendas.diretorio = Path(args.diretorio)
+    hoje = crud_venda.data_negocio(datetime.now(timezone.utc))
+    antes_de = somar_meses(inicio_mes(hoje), -args.meses)
+
+    print(f"🔧 Arquivando vendas anteriores a {antes_de:%Y-%m} em {arquivo_vendas.diretorio}...")
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        totais = arquivo_vendas.arquivar(db, antes_de)
+        print(
+            f"✅ Arquivadas {totais['vendas']} vendas, {totais['itens_venda']} itens "
+            f"e {totais['pagamentos_venda']} pagamentos!"
+        )
+    except Exception as e:
+        print(f"❌ Erro ao arquivar vendas: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
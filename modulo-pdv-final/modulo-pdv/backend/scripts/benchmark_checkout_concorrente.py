@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Teste de carga: latência do checkout com um relatório pesado em paralelo.
+
+Popula um banco SQLite temporário com vendas sintéticas e mede a latência
+de POST /api/v1/vendas/ primeiro sozinho e depois enquanto relatórios
+pesados (listagem com filtro por número e contagem total, que varre a
+tabela de vendas) rodam ao mesmo tempo, no mesmo event loop. Com a sessão
+assíncrona o relatório aguarda o banco sem bloquear o loop: a latência do
+checkout deve se manter muito abaixo da duração do relatório (que é o
+atraso que um acesso bloqueante imporia), variando apenas pela disputa de
+CPU com as consultas em andamento.
+
+Uso:
+    python scripts/benchmark_checkout_concorrente.py [--vendas 300000] [--checkouts 200] [--relatorios 4]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Adiciona o diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+
+DIRETORIO_BANCO = tempfile.mkdtemp()
+# O banco precisa estar configurado antes de importar a aplicação
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DIRETORIO_BANCO, 'carga.db')}"
+
+import httpx
+from sqlalchemy import insert
+
+from app.database import SessionLocal, async_engine, create_tables, engine
+from app.main import app
+from app.models import Venda, StatusVenda
+
+VENDA_CHECKOUT = {
+    "itens": [
+        {"produto_id": str(uuid.uuid4()), "quantidade": 2, "preco_unitario": 1500, "desconto_item": 0}
+    ],
+    "pagamentos": [
+        {"forma_pagamento": "dinheiro", "valor_pago": 3000, "valor_recebido": 5000}
+    ],
+    "criado_por": "carga"
+}
+
+def popular_vendas(quantidade, bloco=50000):
+    """Insere vendas sintéticas distribuídas pelos últimos 30 dias."""
+    print(f"🔧 Inserindo {quantidade} vendas...")
+    inicio = datetime.now() - timedelta(days=30)
+
+    with SessionLocal() as session:
+        for offset in range(0, quantidade, bloco):
+            linhas = []
+            for i in range(offset, min(offset + bloco, quantidade)):
+                total = random.randint(500, 50000)
+                data_criacao = inicio + timedelta(seconds=random.randint(0, 30 * 86400))
+                linhas.append({
+                    "id": uuid.uuid4(),
+                    "numero_venda": f"CARGA-{i:08d}",
+                    "subtotal": total,
+                    "desconto_total": 0,
+                    "total_venda": total,
+                    "status": StatusVenda.CONCLUIDA,
+                    "data_criacao": data_criacao,
+                    "data_venda": data_criacao.date()
+                })
+            session.execute(insert(Venda), linhas)
+            session.commit()
+
+    print("✅ Vendas inseridas!")
+
+async def medir_checkouts(cliente, quantidade):
+    """Executa checkouts em sequência e retorna as latências em milissegundos."""
+    latencias = []
+    for _ in range(quantidade):
+        inicio = time.perf_counter()
+        response = await cliente.post("/api/v1/vendas/", json=VENDA_CHECKOUT)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        assert response.status_code == 201, response.text
+    return latencias
+
+async def gerar_relatorios(cliente, parar, duracoes):
+    """Repete o relatório pesado até receber o sinal de parada."""
+    while not parar.is_set():
+        inicio = time.perf_counter()
+        response = await cliente.get(
+            "/api/v1/vendas/", params={"numero_venda": "INEXISTENTE", "contar_total": "true"}
+        )
+        assert response.status_code == 200, response.text
+        duracoes.append((time.perf_counter() - inicio) * 1000)
+
+def exibir(descricao, latencias):
+    """Mostra p50, p95 e máximo das latências."""
+    ordenadas = sorted(latencias)
+    p95 = ordenadas[int(len(ordenadas) * 0.95) - 1]
+    print(
+        f"📊 {descricao}: p50 {statistics.median(ordenadas):.1f} ms, "
+        f"p95 {p95:.1f} ms, máx {ordenadas[-1]:.1f} ms"
+    )
+
+async def executar(args):
+    """Mede o checkout sozinho e com relatórios concorrentes."""
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://pdv") as cliente:
+        # Aquecimento (conexões, contador de numeração do dia)
+        await medir_checkouts(cliente, 5)
+
+        sozinho = await medir_checkouts(cliente, args.checkouts)
+
+        parar = asyncio.Event()
+        relatorios = []
+        tarefas = [
+            asyncio.create_task(gerar_relatorios(cliente, parar, relatorios))
+            for _ in range(args.relatorios)
+        ]
+        await asyncio.sleep(0.1)
+        concorrente = await medir_checkouts(cliente, args.checkouts)
+        parar.set()
+        await asyncio.gather(*tarefas)
+
+    exibir("Checkout sozinho", sozinho)
+    exibir(f"Checkout com {args.relatorios} relatórios em paralelo", concorrente)
+    print(
+        f"📈 Relatórios concluídos durante a medição: {len(relatorios)}, "
+        f"duração média {statistics.mean(relatorios):.1f} ms"
+    )
+
+def main():
+    """Função principal."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vendas", type=int, default=300_000, help="Quantidade de vendas sintéticas")
+    parser.add_argument("--checkouts", type=int, default=200, help="Checkouts medidos em cada cenário")
+    parser.add_argument("--relatorios", type=int, default=4, help="Relatórios pesados simultâneos")
+    args = parser.parse_args()
+
+    create_tables()
+    # Em modo WAL leitores e o escritor do SQLite não se bloqueiam
+    # (no PostgreSQL isso já é garantido pelo MVCC)
+    with engine.connect() as conexao:
+        conexao.exec_driver_sql("PRAGMA journal_mode=WAL")
+    popular_vendas(args.vendas)
+
+    async def rodar():
+        try:
+            await executar(args)
+        finally:
+            await async_engine.dispose()
+
+    asyncio.run(rodar())
+    engine.dispose()
+
+if __name__ == "__main__":
+    main()
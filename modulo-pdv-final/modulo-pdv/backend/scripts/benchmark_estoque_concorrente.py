@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark de contenção do estoque: checkouts simultâneos do mesmo produto.
+
+Cadastra um produto "quente" com saldo limitado em um banco SQLite
+temporário e dispara mais checkouts simultâneos do que o saldo comporta.
+Verifica que nenhuma unidade é vendida além do saldo (saldo final zero,
+razão de movimentações consistente) e mostra a vazão de checkouts.
+
+Uso:
+    python scripts/benchmark_estoque_concorrente.py [--saldo 500] [--checkouts 800] [--terminais 20]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+# Adiciona o diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+
+DIRETORIO_BANCO = tempfile.mkdtemp()
+# O banco precisa estar configurado antes de importar a aplicação
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DIRETORIO_BANCO, 'estoque.db')}"
+
+from sqlalchemy import func
+
+from app.database import AsyncSessionLocal, SessionLocal, async_engine, create_tables, engine
+from app.crud_estoque import crud_estoque
+from app.crud_vendas import crud_venda
+from app.models import MovimentacaoEstoque, Venda
+from app.schemas import VendaCreate
+
+def venda_produto(produto_id):
+    """Venda de uma unidade do produto quente e de um item sem controle de estoque."""
+    return VendaCreate(**{
+        "itens": [
+            {"produto_id": str(produto_id), "quantidade": 1, "preco_unitario": 1000, "desconto_item": 0},
+            {"produto_id": str(uuid.uuid4()), "quantidade": 2, "preco_unitario": 500, "desconto_item": 0}
+        ],
+        "pagamentos": [{"forma_pagamento": "pix", "valor_pago": 2000}],
+        "criado_por": "benchmark"
+    })
+
+async def disparar_checkouts(produto_id, quantidade, terminais):
+    """Executa os checkouts com no máximo `terminais` simultâneos."""
+    limite = asyncio.Semaphore(terminais)
+    recusas = []
+
+    async def checkout():
+        async with limite, AsyncSessionLocal() as db:
+            try:
+                await crud_venda.create_async(db, venda_produto(produto_id))
+                return True
+            except ValueError as e:
+                recusas.append(str(e))
+                return False
+
+    inicio = time.perf_counter()
+    resultados = await asyncio.gather(*(checkout() for _ in range(quantidade)))
+    duracao = time.perf_counter() - inicio
+    await async_engine.dispose()
+    return sum(resultados), recusas, duracao
+
+def main():
+    """Função principal."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--saldo", type=int, default=500, help="Saldo inicial do produto quente")
+    parser.add_argument("--checkouts", type=int, default=800, help="Checkouts disparados")
+    parser.add_argument("--terminais", type=int, default=20, help="Checkouts simultâneos")
+    args = parser.parse_args()
+
+    create_tables()
+    # Em modo WAL leitores e o escritor do SQLite não se bloqueiam
+    with engine.connect() as conexao:
+        conexao.exec_driver_sql("PRAGMA journal_mode=WAL")
+
+    produto_id = uuid.uuid4()
+    with SessionLocal() as db:
+        crud_estoque.registrar_entrada(db, produto_id, args.saldo)
+
+    print(f"🔧 {args.checkouts} checkouts de 1 unidade, saldo {args.saldo}, {args.terminais} terminais...")
+    vendidas, recusas, duracao = asyncio.run(
+        disparar_checkouts(produto_id, args.checkouts, args.terminais)
+    )
+
+    with SessionLocal() as db:
+        saldo = crud_estoque.get_saldo(db, produto_id)
+        soma_razao = db.query(func.sum(MovimentacaoEstoque.quantidade)).filter(
+            MovimentacaoEstoque.produto_id == produto_id
+        ).scalar()
+        vendas = db.query(func.count(Venda.id)).scalar()
+
+    print(f"📊 Vendas concluídas: {vendidas}, recusadas por falta de estoque: {len(recusas)}")
+    print(f"📊 Vazão: {args.checkouts / duracao:.0f} checkouts/s ({duracao:.2f}s no total)")
+
+    esperado = min(args.saldo, args.checkouts)
+    assert vendidas == esperado == vendas, "Quantidade de vendas diferente do saldo disponível"
+    assert saldo == args.saldo - esperado and saldo >= 0, "Saldo final inconsistente"
+    assert soma_razao == saldo, "Razão de movimentações não confere com o saldo"
+    assert all("Estoque insuficiente" in recusa for recusa in recusas)
+    print(f"✅ Sem venda acima do saldo: saldo final {saldo}, razão confere")
+
+    engine.dispose()
+
+if __name__ == "__main__":
+    main()
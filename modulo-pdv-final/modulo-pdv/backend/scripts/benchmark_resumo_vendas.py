@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark do resumo de vendas: agregação em Python x agregação em SQL.
+
+Popula um banco SQLite temporário com vendas sintéticas e compara o tempo
+e o pico de memória da implementação anterior de get_resumo_vendas (que
+carregava todas as vendas com query.all()) com a atual, que lê o resumo
+diário (reconstruído a partir das vendas antes da medição).
+
+Uso:
+    python scripts/benchmark_resumo_vendas.py [--vendas 1000000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Adiciona o diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Venda, StatusVenda
+from app.crud_vendas import crud_venda
+
+def popular_vendas(session, quantidade, bloco=50000):
+    """Insere vendas sintéticas distribuídas pelos últimos 30 dias."""
+    print(f"🔧 Inserindo {quantidade} vendas...")
+    inicio = datetime.now() - timedelta(days=30)
+    status = [StatusVenda.CONCLUIDA] * 18 + [StatusVenda.CANCELADA, StatusVenda.ESTORNADA]
+
+    for offset in range(0, quantidade, bloco):
+        linhas = []
+        for i in range(offset, min(offset + bloco, quantidade)):
+            total = random.randint(500, 50000)
+            data_criacao = inicio + timedelta(seconds=random.randint(0, 30 * 86400))
+            linhas.append({
+                "id": uuid.uuid4(),
+                "numero_venda": f"BENCH-{i:08d}",
+                "subtotal": total,
+                "desconto_total": 0,
+                "total_venda": total,
+                "status": random.choice(status),
+                "data_criacao": data_criacao,
+                "data_venda": data_criacao.date()
+            })
+        session.execute(insert(Venda), linhas)
+        session.commit()
+
+    print("✅ Vendas inseridas!")
+
+def resumo_em_python(session):
+    """Implementação anterior: carrega todas as vendas concluídas e agrega em Python."""
+    vendas = session.query(Venda).filter(Venda.status == StatusVenda.CONCLUIDA).all()
+    total_vendas = len(vendas)
+    valor_total = sum(venda.total_venda for venda in vendas)
+    vendas_por_status = {}
+    for status in StatusVenda:
+        count = len([v for v in vendas if v.status == status])
+        if count > 0:
+            vendas_por_status[status.value] = count
+    return {
+        "total_vendas": total_vendas,
+        "valor_total": valor_total,
+        "ticket_medio": valor_total / total_vendas if total_vendas > 0 else 0,
+        "vendas_por_status": vendas_por_status
+    }
+
+def medir(descricao, funcao):
+    """Executa a função medindo tempo e pico de memória."""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcao()
+    duracao = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"📊 {descricao}: {duracao:.2f}s, pico de memória {pico / 1024 / 1024:.1f} MiB")
+    return resultado
+
+def main():
+    """Função principal."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vendas", type=int, default=1_000_000, help="Quantidade de vendas sintéticas")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        engine = create_engine(f"sqlite:///{os.path.join(diretorio, 'benchmark.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+
+        with Session() as session:
+            popular_vendas(session, args.vendas)
+
+        with Session() as session:
+            medir("Reconstrução do resumo diário", lambda: crud_venda.reconstruir_resumo_diario(session))
+
+        with Session() as session:
+            antigo = medir("Agregação em Python", lambda: resumo_em_python(session))
+        with Session() as session:
+            atual = medir("Leitura do resumo diário", lambda: crud_venda.get_resumo_vendas(session))
+
+        assert antigo["total_vendas"] == atual["total_vendas"]
+        assert antigo["valor_total"] == atual["valor_total"]
+        print(f"✅ Resultados conferem: {atual['total_vendas']} vendas concluídas, total {atual['valor_total']}")
+
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
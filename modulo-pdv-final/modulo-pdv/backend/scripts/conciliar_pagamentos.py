@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Script para conciliar o extrato da adquirente/PIX com os pagamentos do PDV.
+
+Lê o CSV do extrato (colunas numero_transacao e valor em reais;
+numero_autorizacao opcional) em lotes e grava um relatório CSV com todas
+as transações: conciliadas, divergentes, não encontradas no PDV, inválidas
+e, com o período informado, pagamentos do PDV ausentes do extrato.
+
+Uso:
+    python scripts/conciliar_pagamentos.py extrato.csv [--saida conciliacao.csv]
+        [--data-inicio 2026-10-01 --data-fim 2026-10-31] [--lote 2000]
+"""
+
+import argparse
+import csv
+import sys
+from datetime import date
+from pathlib import Path
+
+# Adiciona o diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.database import SessionLocal
+from app.conciliacao import COLUNAS_CONCILIACAO, ConciliadorPagamentos, ler_extrato
+
+def main():
+    """Função principal."""
+    parser = argparse.ArgumentParser(description="Concilia o extrato da adquirente com os pagamentos do PDV")
+    parser.add_argument("extrato", type=Path, help="CSV do extrato")
+    parser.add_argument("--saida", type=Path, help="Relatório CSV (padrão: conciliacao_<extrato>.csv)")
+    parser.add_argument("--data-inicio", type=date.fromisoformat, help="Início do período do extrato")
+    parser.add_argument("--data-fim", type=date.fromisoformat, help="Fim do período do extrato")
+    parser.add_argument("--lote", type=int, default=2000, help="Transações do extrato por consulta")
+    args = parser.parse_args()
+
+    if (args.data_inicio is None) != (args.data_fim is None):
+        parser.error("informe --data-inicio e --data-fim juntas")
+    saida = args.saida or args.extrato.with_name(f"conciliacao_{args.extrato.name}")
+
+    print(f"🔧 Conciliando {args.extrato}...")
+
+    db = SessionLocal()
+    try:
+        with open(args.extrato, encoding="utf-8-sig", newline="") as arquivo:
+            resultado = ConciliadorPagamentos(tamanho_lote=args.lote).conciliar(
+                db, ler_extrato(arquivo), data_inicio=args.data_inicio, data_fim=args.data_fim
+            )
+    except Exception as e:
+        print(f"❌ Erro ao conciliar pagamentos: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    with open(saida, "w", encoding="utf-8", newline="") as arquivo:
+        escritor = csv.DictWriter(arquivo, fieldnames=COLUNAS_CONCILIACAO)
+        escritor.writeheader()
+        for lista in ("divergentes", "nao_encontrados", "sem_extrato", "invalidos", "conciliados"):
+            escritor.writerows(resultado[lista])
+
+    resumo = resultado["resumo"]
+    print(f"📄 {resumo['total_extrato']} transações no extrato (R$ {resumo['valor_extrato'] / 100:.2f})")
+    print(f"✅ Conciliadas: {resumo['conciliado']} (R$ {resumo['valor_conciliado'] / 100:.2f})")
+    print(f"⚠️  Divergentes: {resumo['divergente']}")
+    print(f"❓ Não encontradas no PDV: {resumo['nao_encontrado']}")
+    if args.data_inicio:
+        print(f"❓ Pagamentos sem extrato: {resumo['sem_extrato']}")
+    print(f"❌ Inválidas: {resumo['invalido']}")
+    print(f"💾 Relatório gravado em {saida}")
+
+if __name__ == "__main__":
+    main()
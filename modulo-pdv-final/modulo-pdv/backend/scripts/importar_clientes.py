@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Script para importar clientes em massa de uma planilha CSV ou XLSX.
+
+Uma coluna por campo do cliente (nome obrigatória; tipo_cliente, cpf_cnpj,
+email, celular, cidade, estado, data_nascimento etc. opcionais). As linhas
+recusadas (inválidas, repetidas no arquivo ou já cadastradas) são gravadas
+em um relatório CSV com a linha e o motivo.
+
+Uso:
+    python scripts/importar_clientes.py clientes.csv [--erros erros.csv]
+        [--criado-por importacao] [--lote 50000]
+"""
+
+import argparse
+import csv
+import sys
+import time
+from pathlib import Path
+
+# Adiciona o diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.database import SessionLocal
+from app.importacao_clientes import COLUNAS_ERROS, importador_clientes, ler_planilha
+
+def main():
+    """Função principal."""
+    parser = argparse.ArgumentParser(description="Importa clientes de uma planilha CSV ou XLSX")
+    parser.add_argument("planilha", type=Path, help="Planilha de clientes (.csv ou .xlsx)")
+    parser.add_argument("--erros", type=Path, help="Relatório CSV das linhas recusadas (padrão: erros_<planilha>.csv)")
+    parser.add_argument("--criado-por", help="Usuário registrado como criador dos clientes")
+    parser.add_argument("--lote", type=int, default=50000, help="Linhas validadas por lote")
+    args = parser.parse_args()
+
+    saida = args.erros or args.planilha.with_name(f"erros_{args.planilha.stem}.csv")
+
+    print(f"🔧 Importando clientes de {args.planilha}...")
+
+    inicio = time.perf_counter()
+    db = SessionLocal()
+    try:
+        with open(args.planilha, "rb") as arquivo:
+            resultado = importador_clientes.importar(
+                db, ler_planilha(arquivo, args.planilha.name, args.lote), criado_por=args.criado_por
+            )
+    except Exception as e:
+        print(f"❌ Erro ao importar clientes: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    print(f"📄 {resultado['total_linhas']} linhas lidas em {time.perf_counter() - inicio:.1f}s")
+    print(f"✅ Importados: {resultado['importados']}")
+    print(f"⚠️  Duplicados: {resultado['duplicados']}")
+    print(f"❌ Inválidos: {resultado['invalidos']}")
+
+    if resultado["erros"]:
+        with open(saida, "w", encoding="utf-8", newline="") as arquivo:
+            escritor = csv.DictWriter(arquivo, fieldnames=COLUNAS_ERROS)
+            escritor.writeheader()
+            escritor.writerows(resultado["erros"])
+        print(f"💾 Linhas recusadas gravadas em {saida}")
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from app.database import engine, Base, create_tables
 from app.models import Cliente
+from app import busca_clientes  # cria o índice de busca junto com a tabela de clientes
 from sqlalchemy import text
 
 def create_database_schema():
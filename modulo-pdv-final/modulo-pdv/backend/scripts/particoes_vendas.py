@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Script de manutenção das partições mensais de vendas (PostgreSQL).
+
+Comandos:
+    criar      Cria as partições do mês atual até --meses meses à frente
+               (agende diariamente, por exemplo no cron)
+    arquivar   Desanexa as partições anteriores ao mês de --antes-de e as
+               move para o schema de arquivo
+
+Uso:
+    python scripts/particoes_vendas.py criar [--meses 3]
+    python scripts/particoes_vendas.py arquivar --antes-de 2025-01 [--schema arquivo_pdv]
+"""
+
+import argparse
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Adiciona o diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.database import engine
+from app.crud_vendas import crud_venda
+from app.particionamento import (
+    ARQUIVO_SCHEMA, PARTICOES_MESES_FUTUROS, arquivar_particoes, garantir_particoes_futuras, particionado
+)
+
+def mes(valor):
+    """Converte AAAA-MM na data do primeiro dia do mês."""
+    return datetime.strptime(valor, "%Y-%m").date()
+
+def main():
+    """Função principal."""
+    parser = argparse.ArgumentParser(description="Mantém as partições mensais de vendas")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    criar = comandos.add_parser("criar", help="Cria as partições dos próximos meses")
+    criar.add_argument("--meses", type=int, default=PARTICOES_MESES_FUTUROS, help="Meses à frente do atual")
+
+    arquivar = comandos.add_parser("arquivar", help="Move partições antigas para o schema de arquivo")
+    arquivar.add_argument("--antes-de", type=mes, required=True, help="Primeiro mês mantido (AAAA-MM)")
+    arquivar.add_argument("--schema", default=ARQUIVO_SCHEMA, help="Schema de destino")
+    args = parser.parse_args()
+
+    try:
+        with engine.begin() as conexao:
+            if not particionado(conexao):
+                print("ℹ️  As tabelas de vendas não estão particionadas neste banco. Nada a fazer.")
+                return
+
+            if args.comando == "criar":
+                hoje = crud_venda.data_negocio(datetime.now(timezone.utc))
+                particoes = garantir_particoes_futuras(conexao, hoje, args.meses)
+                print(f"✅ Partições criadas: {', '.join(particoes) or 'nenhuma'}")
+            else:
+                print(f"🔧 Arquivando partições anteriores a {args.antes_de:%Y-%m} em {args.schema}...")
+                particoes = arquivar_particoes(conexao, args.antes_de, args.schema)
+                print(f"✅ Partições arquivadas: {', '.join(particoes) or 'nenhuma'}")
+    except Exception as e:
+        print(f"❌ Erro na manutenção das partições: {e}")
+        sys.exit(1)
+    finally:
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Script para reconstruir o resumo diário de vendas (vendas_resumo_diario).
+
+Regera o rollup a partir do histórico de vendas, em blocos de dias, e
+recalcula os totais das sessões de caixa. Execute com os terminais parados.
+
+Uso:
+    python scripts/rebuild_resumo_diario.py [--dias-por-bloco 31]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Adiciona o diretório pai ao path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.database import SessionLocal, create_tables
+from app.crud_caixa import crud_caixa
+from app.crud_vendas import crud_venda
+
+def main():
+    """Função principal."""
+    parser = argparse.ArgumentParser(description="Reconstrói o resumo diário de vendas")
+    parser.add_argument("--dias-por-bloco", type=int, default=31, help="Dias agregados por transação")
+    args = parser.parse_args()
+
+    print("🔧 Reconstruindo resumo diário de vendas...")
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        linhas = crud_venda.reconstruir_resumo_diario(db, dias_por_bloco=args.dias_por_bloco)
+        print(f"✅ Resumo diário reconstruído: {linhas} linhas geradas!")
+        sessoes = crud_caixa.reconstruir_totais(db)
+        print(f"✅ Totais de caixa recalculados: {sessoes} sessões!")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Erro ao reconstruir resumo diário: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,14 @@ Configurações para os testes do módulo de clientes.
 import pytest
 import asyncio
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from fastapi.testclient import TestClient
 
 from app.main import app
-from app.database import get_db, Base
+from app.crud import cache_estatisticas
+from app.database import get_async_db, get_db, Base
 from app.models import Cliente
 
 # URL do banco de dados de teste (SQLite em memória)
@@ -32,8 +35,19 @@ def override_get_db():
     finally:
         db.close()
 
-# Override da dependência
+# Engine e session assíncronos de teste (sem pool: cada requisição do
+# TestClient roda em um event loop próprio)
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+async def override_get_async_db():
+    """Override da função get_async_db para usar o banco de teste."""
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+# Override das dependências
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
 
 @pytest.fixture(scope="session")
 def event_loop():
@@ -47,6 +61,8 @@ def db_session():
     """Cria uma sessão de banco de dados para cada teste."""
     # Cria as tabelas
     Base.metadata.create_all(bind=engine)
+    # Estatísticas em cache se referem às tabelas do teste anterior
+    cache_estatisticas.invalidar()
     
     # Cria a sessão
     session = TestingSessionLocal()
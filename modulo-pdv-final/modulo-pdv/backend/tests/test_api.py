@@ -2,6 +2,7 @@
 Testes para os endpoints da API do módulo de clientes.
 """
 
+import json
 import pytest
 from fastapi.testclient import TestClient
 
@@ -160,6 +161,103 @@ def test_buscar_clientes_por_termo(client, cliente_data):
     assert len(data) >= 1
     assert data[0]["nome"] == cliente_data["nome"]
 
+def test_autocomplete_clientes(client):
+    """Testa as sugestões do autocomplete de clientes."""
+    response = client.post("/api/v1/clientes/", json={
+        "nome": "Benedita Autocomplete",
+        "cpf_cnpj": "55544433322",
+        "email": "benedita.autocomplete@email.com"
+    })
+    assert response.status_code == 201
+    
+    # O cliente criado entra no índice sem esperar a consulta periódica
+    response = client.get("/api/v1/clientes/autocomplete", params={"termo": "bened auto"})
+    assert response.status_code == 200
+    data = response.json()
+    assert [sugestao["nome"] for sugestao in data] == ["Benedita Autocomplete"]
+    assert data[0]["cpf_cnpj"] == "55544433322"
+    
+    response = client.get("/api/v1/clientes/autocomplete", params={"termo": "555444"})
+    assert response.status_code == 200
+    assert response.json()[0]["nome"] == "Benedita Autocomplete"
+
+def test_importar_clientes(client):
+    """Testa a importação de clientes de uma planilha CSV."""
+    planilha = (
+        "Nome;CPF_CNPJ;Email;Estado;Data_Nascimento\n"
+        "Importado Um;700.800.900-11;Importado.Um@email.com;sp;15/03/1980\n"
+        "Importado Dois;70080090022;;;\n"
+        "X;123;email-invalido;XX;31/02/1980\n"
+        "Importado Repetido;70080090011;;;\n"
+    ).encode("utf-8")
+    response = client.post(
+        "/api/v1/clientes/importar",
+        params={"criado_por": "importacao"},
+        files={"arquivo": ("clientes.csv", planilha, "text/csv")}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["total_linhas"], data["importados"], data["duplicados"], data["invalidos"]) == (4, 2, 1, 1)
+    assert {(erro["linha"], erro["campo"]) for erro in data["erros"]} == {
+        (4, "nome"), (4, "cpf_cnpj"), (4, "email"), (4, "estado"), (4, "data_nascimento"), (5, "cpf_cnpj")
+    }
+    
+    response = client.get("/api/v1/clientes/cpf-cnpj/70080090011")
+    assert response.status_code == 200
+    cliente = response.json()
+    assert cliente["email"] == "importado.um@email.com"
+    assert cliente["estado"] == "SP"
+    assert cliente["data_nascimento"] == "1980-03-15"
+    assert cliente["status"] == "ativo"
+    
+    # Reimportar a planilha não duplica os clientes
+    response = client.post(
+        "/api/v1/clientes/importar",
+        files={"arquivo": ("clientes.csv", planilha, "text/csv")}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["importados"], data["duplicados"]) == (0, 3)
+    assert data["erros"][0] == {"linha": 2, "campo": "cpf_cnpj", "motivo": "CPF/CNPJ já cadastrado"}
+    
+    response = client.post(
+        "/api/v1/clientes/importar",
+        files={"arquivo": ("clientes.txt", planilha, "text/plain")}
+    )
+    assert response.status_code == 400
+
+def test_exportar_clientes(client):
+    """Testa a exportação de clientes com as colunas escolhidas."""
+    response = client.post("/api/v1/clientes/", json={
+        "nome": "Exportado Teste",
+        "cpf_cnpj": "81726354900",
+        "celular": "11988887777",
+        "cidade": "Sorocaba"
+    })
+    assert response.status_code == 201
+    
+    response = client.get(
+        "/api/v1/clientes/export",
+        params={"colunas": "nome,cpf_cnpj,celular", "cidade": "sorocaba"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    linhas = response.text.splitlines()
+    assert linhas[0] == "nome,cpf_cnpj,celular"
+    assert "Exportado Teste,81726354900,11988887777" in linhas[1:]
+    
+    response = client.get(
+        "/api/v1/clientes/export",
+        params={"formato": "ndjson", "colunas": "id,status,data_criacao", "cidade": "sorocaba"}
+    )
+    assert response.status_code == 200
+    registros = [json.loads(linha) for linha in response.text.splitlines()]
+    assert registros and set(registros[0]) == {"id", "status", "data_criacao"}
+    assert registros[0]["status"] == "ativo"
+    
+    response = client.get("/api/v1/clientes/export", params={"colunas": "nome,senha"})
+    assert response.status_code == 400
+
 def test_buscar_cliente_por_cpf_cnpj(client, cliente_data):
     """Testa busca de cliente por CPF/CNPJ."""
     # Criar cliente
@@ -2,11 +2,15 @@
 Testes para as operações CRUD do módulo de clientes.
 """
 
+import io
 import pytest
+from datetime import date
 from uuid import uuid4
+from app.autocomplete_clientes import IndiceAutocompleteClientes
 from app.crud import ClienteCRUD
+from app.importacao_clientes import importador_clientes, ler_planilha
 from app.schemas import ClienteCreate, ClienteUpdate, ClienteFilter
-from app.models import TipoCliente, StatusCliente
+from app.models import Cliente, TipoCliente, StatusCliente
 
 def test_criar_cliente(db_session):
     """Testa a criação de um cliente via CRUD."""
@@ -248,6 +252,153 @@ def test_buscar_clientes(db_session):
     clientes = crud.search("123456789", limit=10)
     assert len(clientes) == 1
     assert clientes[0].nome == "João Silva"
+    
+    # Trechos no meio do CPF, do email e do nome
+    assert [cliente.nome for cliente in crud.search("4567")] == ["João Silva"]
+    assert [cliente.nome for cliente in crud.search("ria@em")] == ["Maria Santos"]
+    assert [cliente.nome for cliente in crud.search("antos")] == ["Maria Santos"]
+    
+    # Os casados pelo índice vêm antes dos que só contêm o termo
+    crud.create(ClienteCreate(nome="Ana Rosemaria"))
+    assert [cliente.nome for cliente in crud.search("maria")][:2] == ["Maria Santos", "Ana Rosemaria"]
+
+def test_buscar_clientes_sem_acentos(db_session):
+    """Testa a busca e os filtros sem distinção de acentos e maiúsculas."""
+    crud = ClienteCRUD(db_session)
+    
+    joao = crud.create(ClienteCreate(nome="João Conceição", email="joao@email.com", cidade="São Paulo"))
+    crud.create(ClienteCreate(nome="Joana Souza", email="joana@email.com", cidade="Santo André"))
+    
+    # Termo sem acento encontra o nome acentuado, e vice-versa
+    assert [cliente.nome for cliente in crud.search("joao conceicao")] == ["João Conceição"]
+    assert [cliente.nome for cliente in crud.search("JOÃO")] == ["João Conceição"]
+    assert len(crud.search("jo")) == 2
+    
+    clientes, total = crud.get_all(filters=ClienteFilter(cidade="sao paulo"))
+    assert total == 1
+    assert clientes[0].nome == "João Conceição"
+    clientes, total = crud.get_all(filters=ClienteFilter(cidade="andre"))
+    assert total == 1
+    assert clientes[0].nome == "Joana Souza"
+    
+    # O índice acompanha alterações e remoções
+    crud.update(joao.id, ClienteUpdate(nome="Sebastião Araújo"))
+    assert crud.get_all(filters=ClienteFilter(nome="joao"))[1] == 0
+    assert [cliente.nome for cliente in crud.search("sebastiao araujo")] == ["Sebastião Araújo"]
+    
+    crud.delete(joao.id)
+    assert crud.search("sebastiao") == []
+    clientes, total = crud.get_all(filters=ClienteFilter(nome="souza"))
+    assert total == 1
+
+def test_filtros_contem_no_meio_da_palavra(db_session):
+    """Testa os filtros "contém" com o termo no meio de uma palavra."""
+    crud = ClienteCRUD(db_session)
+    
+    crud.create(ClienteCreate(nome="Carlos Dasilva", email="carlos@gmail.com", cidade="Florianópolis"))
+    crud.create(ClienteCreate(nome="Ana Souza", email="ana@empresa.com.br", cidade="Curitiba"))
+    
+    clientes, total = crud.get_all(filters=ClienteFilter(nome="silva"))
+    assert total == 1
+    assert clientes[0].nome == "Carlos Dasilva"
+    clientes, total = crud.get_all(filters=ClienteFilter(email="gmail"))
+    assert total == 1
+    assert clientes[0].nome == "Carlos Dasilva"
+    assert crud.get_all(filters=ClienteFilter(cidade="polis"))[1] == 1
+    assert crud.get_all(filters=ClienteFilter(nome="ouz"))[1] == 1
+    assert crud.get_all(filters=ClienteFilter(nome="50%"))[1] == 0
+
+def test_autocomplete_clientes(db_session):
+    """Testa o índice em memória do autocomplete de clientes."""
+    crud = ClienteCRUD(db_session)
+    
+    joao = crud.create(ClienteCreate(nome="João Silva", cpf_cnpj="12345678901"))
+    crud.create(ClienteCreate(nome="Maria José Silveira", tipo_cliente="pessoa_juridica", cpf_cnpj="98765432000110"))
+    crud.create(ClienteCreate(nome="Joana Inativa", status="inativo"))
+    
+    indice = IndiceAutocompleteClientes()
+    assert indice.carregar(db_session) == 2
+    
+    def nomes(termo, limite=10):
+        return [sugestao["nome"] for sugestao in indice.sugerir(termo, limite)]
+    
+    # Nomes iniciados pelo termo vêm antes dos que têm uma palavra iniciada por ele
+    assert nomes("jo") == ["João Silva", "Maria José Silveira"]
+    assert nomes("JOAO s") == ["João Silva"]
+    assert nomes("silv jo") == ["João Silva", "Maria José Silveira"]
+    assert nomes("silveira") == ["Maria José Silveira"]
+    assert nomes("jo", limite=1) == ["João Silva"]
+    assert nomes("123.456") == ["João Silva"]
+    assert indice.sugerir("987654")[0]["cpf_cnpj"] == "98765432000110"
+    assert nomes("joana") == []
+    assert nomes("xyz") == []
+    
+    # Alterações de outros processos chegam pela consulta periódica
+    crud.update(joao.id, ClienteUpdate(nome="Sebastião Souza"))
+    crud.create(ClienteCreate(nome="Joaquim Pereira"))
+    assert indice.atualizar(db_session) >= 2
+    assert nomes("jo") == ["Joaquim Pereira", "Maria José Silveira"]
+    assert nomes("sebas") == ["Sebastião Souza"]
+    
+    crud.soft_delete(joao.id)
+    indice.atualizar(db_session)
+    assert nomes("sebas") == []
+
+def test_autocomplete_clientes_alteracoes_do_processo(db_session):
+    """Testa que as alterações confirmadas por este processo entram no índice global."""
+    from app.autocomplete_clientes import indice_autocomplete_clientes
+    
+    crud = ClienteCRUD(db_session)
+    indice_autocomplete_clientes.carregar(db_session)
+    
+    cliente = crud.create(ClienteCreate(nome="Letícia Andrade"))
+    assert [s["nome"] for s in indice_autocomplete_clientes.sugerir("leticia")] == ["Letícia Andrade"]
+    
+    # Alterações desfeitas não entram no índice
+    cliente.nome = "Outro Nome"
+    db_session.flush()
+    db_session.rollback()
+    assert indice_autocomplete_clientes.sugerir("outro") == []
+    
+    crud.delete(cliente.id)
+    assert indice_autocomplete_clientes.sugerir("leticia") == []
+
+def test_importar_clientes(db_session):
+    """Testa a importação em massa de clientes, com a deduplicação por CPF/CNPJ e email."""
+    crud = ClienteCRUD(db_session)
+    crud.create(ClienteCreate(nome="Já Cadastrado", cpf_cnpj="11122233344", email="cadastrado@email.com"))
+    
+    planilha = (
+        "nome,tipo_cliente,cpf_cnpj,email,cidade,limite_credito\n"
+        "Cliente Novo,,55566677788,novo@email.com,Campinas,1500\n"
+        "Empresa Nova,pessoa_juridica,12.345.678/0001-90,,,\n"
+        "Mesmo CPF,,111.222.333-44,,,\n"
+        "Mesmo Email,,,Cadastrado@Email.com,,\n"
+        "Email Repetido,,,novo@email.com,,\n"
+        "Limite Inválido,,,,,-10\n"
+    ).encode("utf-8")
+    resultado = importador_clientes.importar(
+        db_session, ler_planilha(io.BytesIO(planilha), "clientes.csv"), criado_por="importacao"
+    )
+    
+    assert resultado["total_linhas"] == 6
+    assert resultado["importados"] == 2
+    assert resultado["duplicados"] == 3
+    assert resultado["invalidos"] == 1
+    assert resultado["erros"] == [
+        {"linha": 4, "campo": "cpf_cnpj", "motivo": "CPF/CNPJ já cadastrado"},
+        {"linha": 5, "campo": "email", "motivo": "Email já cadastrado"},
+        {"linha": 6, "campo": "email", "motivo": "Email repetido no arquivo"},
+        {"linha": 7, "campo": "limite_credito", "motivo": "Valor deve ser um número inteiro não negativo"},
+    ]
+    
+    cliente = crud.get_by_cpf_cnpj("55566677788")
+    assert cliente.cidade == "Campinas"
+    assert cliente.limite_credito == 1500
+    assert cliente.criado_por == "importacao"
+    assert crud.get_by_cpf_cnpj("12345678000190").tipo_cliente == TipoCliente.PESSOA_JURIDICA
+    assert crud.search("campinas")[0].id == cliente.id
+    assert crud.get_stats()["total"] == 3
 
 def test_estatisticas_clientes(db_session):
     """Testa obtenção de estatísticas de clientes."""
@@ -255,9 +406,9 @@ def test_estatisticas_clientes(db_session):
     
     # Criar clientes com diferentes tipos e status
     clientes_data = [
-        ClienteCreate(nome="PF Ativo 1", tipo_cliente="pessoa_fisica", status="ativo"),
-        ClienteCreate(nome="PF Ativo 2", tipo_cliente="pessoa_fisica", status="ativo"),
-        ClienteCreate(nome="PF Inativo", tipo_cliente="pessoa_fisica", status="inativo"),
+        ClienteCreate(nome="PF Ativo 1", tipo_cliente="pessoa_fisica", status="ativo", estado="SP", data_nascimento=date(1985, 3, 1)),
+        ClienteCreate(nome="PF Ativo 2", tipo_cliente="pessoa_fisica", status="ativo", estado="SP", data_nascimento=date(1989, 12, 31)),
+        ClienteCreate(nome="PF Inativo", tipo_cliente="pessoa_fisica", status="inativo", estado="RJ", data_nascimento=date(1990, 1, 1)),
         ClienteCreate(nome="PJ Ativo", tipo_cliente="pessoa_juridica", status="ativo"),
         ClienteCreate(nome="PJ Bloqueado", tipo_cliente="pessoa_juridica", status="bloqueado"),
     ]
@@ -273,4 +424,17 @@ def test_estatisticas_clientes(db_session):
     assert stats["por_status"]["bloqueados"] == 1
     assert stats["por_tipo"]["pessoa_fisica"] == 3
     assert stats["por_tipo"]["pessoa_juridica"] == 2
+    assert stats["por_decada_nascimento"] == {"1980": 2, "1990": 1, "nao_informado": 2}
+    assert stats["por_uf"] == {"RJ": 1, "SP": 2, "nao_informado": 2}
+    
+    # Alterações fora do CRUD só aparecem ao fim da validade do cache
+    db_session.add(Cliente(nome="Fora do CRUD"))
+    db_session.commit()
+    assert crud.get_stats()["total"] == 5
+    
+    # Criar pelo CRUD descarta o cache
+    crud.create(ClienteCreate(nome="PF Novo", estado="MG"))
+    stats = crud.get_stats()
+    assert stats["total"] == 7
+    assert stats["por_uf"]["MG"] == 1
 
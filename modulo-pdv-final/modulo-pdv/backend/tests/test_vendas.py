@@ -4,20 +4,49 @@ Testes para o módulo de vendas (PDV).
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+import asyncio
+import csv
+import io
+import json
+import os
+import tempfile
 import uuid
-from datetime import datetime
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
 
 from app.main import app
-from app.database import get_db, Base
-from app.models import Venda, ItemVenda, PagamentoVenda, StatusVenda, FormaPagamento
+from app.database import anexar_catalogo, get_async_db, get_db, Base, CatalogoBase
+from app.models import (
+    Venda, ItemVenda, PagamentoVenda, StatusVenda, FormaPagamento, VendaResumoDiario, Produto,
+    EstoqueSaldo, MovimentacaoEstoque, TipoMovimentacaoEstoque, ChaveIdempotencia, SessaoCaixa
+)
+from app.arquivo_vendas import arquivo_vendas
+from app.catalogo import CatalogoProdutos, catalogo_produtos
+from app.conciliacao import ConciliadorPagamentos, ler_extrato
+from app.crud_caixa import crud_caixa
+from app.crud_estoque import crud_estoque
+from app.crud_vendas import crud_venda
+from app.particionamento import (
+    garantir_particoes_futuras, mes_da_particao, meses_entre, nome_particao, particionado, somar_meses
+)
+from app.ranking_produtos import ranking_produtos_hoje
+from app.routers.vendas import criar_venda
+from app.schemas import VendaCreate
 
 # Configuração do banco de dados de teste
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test_pdv.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Catálogo de produtos de teste, anexado como o schema do catálogo
+CATALOGO_TESTE = os.path.join(tempfile.gettempdir(), "test_pdv_produtos.db")
+open(CATALOGO_TESTE, "a").close()
+anexar_catalogo(engine, CATALOGO_TESTE)
+
 def override_get_db():
     try:
         db = TestingSessionLocal()
@@ -25,13 +54,46 @@ def override_get_db():
     finally:
         db.close()
 
+# Sessão assíncrona sobre o mesmo banco; sem pool, pois o TestClient
+# executa cada requisição em um event loop próprio. O timeout maior evita
+# "database is locked" nos testes com muitos checkouts simultâneos
+async_engine = create_async_engine(
+    "sqlite+aiosqlite:///./test_pdv.db", poolclass=NullPool, connect_args={"timeout": 30}
+)
+anexar_catalogo(async_engine.sync_engine, CATALOGO_TESTE)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
 
-# Criar as tabelas de teste
+# Recriar as tabelas de teste a partir dos modelos atuais
+Base.metadata.drop_all(bind=engine)
 Base.metadata.create_all(bind=engine)
+CatalogoBase.metadata.create_all(bind=engine)
 
 client = TestClient(app)
 
+# Limite de consultas de uma listagem: contagem + vendas + itens + pagamentos
+MAX_CONSULTAS_LISTAGEM = 4
+
+@contextmanager
+def contar_consultas():
+    """Registra os comandos SQL executados no banco de teste"""
+    comandos = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        comandos.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", registrar)
+    try:
+        yield comandos
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", registrar)
+
 class TestVendas:
     """Classe de testes para vendas"""
 
@@ -39,11 +101,19 @@ class TestVendas:
         """Setup executado antes de cada teste"""
         # Limpar dados de teste
         db = TestingSessionLocal()
+        db.query(MovimentacaoEstoque).delete()
+        db.query(EstoqueSaldo).delete()
+        db.query(ChaveIdempotencia).delete()
         db.query(PagamentoVenda).delete()
         db.query(ItemVenda).delete()
         db.query(Venda).delete()
+        db.query(SessaoCaixa).delete()
+        db.query(VendaResumoDiario).delete()
+        db.query(Produto).delete()
         db.commit()
         db.close()
+        catalogo_produtos.invalidar()
+        ranking_produtos_hoje.invalidar()
 
     def test_criar_venda_simples(self):
         """Testa criação de uma venda simples"""
@@ -108,6 +178,181 @@ class TestVendas:
         assert data["desconto_total"] == 1000
         assert data["total_venda"] == 3500  # 45 - 10 (desconto total)
 
+    def test_snapshot_produtos_do_catalogo(self):
+        """Testa o snapshot dos produtos: uma consulta por venda e cache entre vendas"""
+        db = TestingSessionLocal()
+        produtos = [
+            Produto(nome=f"Produto Catálogo {i}", codigo_barras=f"789000000000{i}", sku=f"SKU-{i}", preco_venda=1000)
+            for i in range(3)
+        ]
+        db.add_all(produtos)
+        db.commit()
+        ids = [produto.id for produto in produtos]
+        db.close()
+
+        venda_data = {
+            "itens": [
+                {"produto_id": str(produto_id), "quantidade": 1, "preco_unitario": 1000, "desconto_item": 0}
+                for produto_id in ids
+            ],
+            "pagamentos": [{"forma_pagamento": "pix", "valor_pago": 3000}],
+            "criado_por": "test_user"
+        }
+
+        def consultas_catalogo(comandos):
+            return [comando for comando in comandos if "FROM produtos" in comando and " IN " in comando]
+
+        with contar_consultas() as comandos:
+            response = client.post("/api/v1/vendas/", json=venda_data)
+        assert response.status_code == 201
+        assert len(consultas_catalogo(comandos)) == 1
+
+        itens = {item["produto_id"]: item for item in response.json()["itens"]}
+        assert itens[str(ids[0])]["nome_produto"] == "Produto Catálogo 0"
+        assert itens[str(ids[0])]["codigo_barras"] == "7890000000000"
+        assert itens[str(ids[0])]["sku"] == "SKU-0"
+
+        # Segunda venda com os mesmos produtos: atendida pelo cache
+        with contar_consultas() as comandos:
+            response = client.post("/api/v1/vendas/", json=venda_data)
+        assert response.status_code == 201
+        assert consultas_catalogo(comandos) == []
+
+        # Alteração do produto (pelo módulo de produtos) sai do cache na verificação seguinte
+        db = TestingSessionLocal()
+        catalogo_produtos.verificar_alteracoes(db)
+        produto = db.get(Produto, ids[0])
+        produto.nome = "Produto Renomeado"
+        db.commit()
+        assert catalogo_produtos.verificar_alteracoes(db) == 1
+        db.close()
+
+        response = client.post("/api/v1/vendas/", json=venda_data)
+        itens = {item["produto_id"]: item for item in response.json()["itens"]}
+        assert itens[str(ids[0])]["nome_produto"] == "Produto Renomeado"
+        assert itens[str(ids[1])]["nome_produto"] == "Produto Catálogo 1"
+
+    def test_catalogo_indisponivel(self, tmp_path, caplog):
+        """Testa a venda sem o catálogo: snapshot genérico e aviso, sem criar o banco do catálogo"""
+        caminho_catalogo = tmp_path / "produtos.db"
+        engine_sem_catalogo = create_engine(f"sqlite:///{tmp_path / 'pdv.db'}")
+        anexar_catalogo(engine_sem_catalogo, str(caminho_catalogo))
+        Base.metadata.create_all(bind=engine_sem_catalogo)
+        db = sessionmaker(bind=engine_sem_catalogo)()
+        try:
+            with caplog.at_level("WARNING", logger="app.catalogo"):
+                assert CatalogoProdutos().buscar(db, [uuid.uuid4()]) == {}
+            assert "Catálogo de produtos não encontrado" in caplog.text
+            assert not caminho_catalogo.exists()
+        finally:
+            db.close()
+            engine_sem_catalogo.dispose()
+
+    def _venda_produto(self, produto_id, quantidade):
+        """Dados de uma venda de um único produto a R$ 10,00 a unidade"""
+        return {
+            "itens": [
+                {"produto_id": str(produto_id), "quantidade": quantidade, "preco_unitario": 1000, "desconto_item": 0}
+            ],
+            "pagamentos": [{"forma_pagamento": "pix", "valor_pago": 1000 * quantidade}],
+            "criado_por": "test_user"
+        }
+
+    def test_baixa_e_devolucao_de_estoque(self):
+        """Testa a baixa de estoque na venda, a recusa sem saldo e a devolução no cancelamento"""
+        produto_id = uuid.uuid4()
+        db = TestingSessionLocal()
+        assert crud_estoque.registrar_entrada(db, produto_id, 10) == 10
+
+        response = client.post("/api/v1/vendas/", json=self._venda_produto(produto_id, 4))
+        assert response.status_code == 201
+        venda_id = response.json()["id"]
+        assert crud_estoque.get_saldo(db, produto_id) == 6
+
+        # Sem saldo suficiente: a venda é recusada e nada é gravado
+        response = client.post("/api/v1/vendas/", json=self._venda_produto(produto_id, 7))
+        assert response.status_code == 400
+        assert "Estoque insuficiente" in response.json()["detail"]
+        db.expire_all()
+        assert crud_estoque.get_saldo(db, produto_id) == 6
+        assert db.query(Venda).count() == 1
+
+        # Cancelamento devolve os itens ao estoque
+        response = client.delete(f"/api/v1/vendas/{venda_id}")
+        assert response.status_code == 200
+        db.expire_all()
+        assert crud_estoque.get_saldo(db, produto_id) == 10
+
+        movimentacoes = crud_estoque.get_movimentacoes(db, produto_id)
+        assert sorted((m.tipo.value, m.quantidade, m.saldo_apos) for m in movimentacoes) == sorted([
+            (TipoMovimentacaoEstoque.ENTRADA.value, 10, 10),
+            (TipoMovimentacaoEstoque.SAIDA_VENDA.value, -4, 6),
+            (TipoMovimentacaoEstoque.ESTORNO_VENDA.value, 4, 10),
+        ])
+        db.close()
+
+    def test_estoque_concorrente_sem_venda_acima_do_saldo(self):
+        """Testa que checkouts simultâneos do mesmo produto não vendem além do saldo"""
+        produto_id = uuid.uuid4()
+        db = TestingSessionLocal()
+        crud_estoque.registrar_entrada(db, produto_id, 30)
+        db.close()
+
+        async def finalizar(terminais):
+            async with terminais, TestingAsyncSessionLocal() as db:
+                try:
+                    await criar_venda(venda=VendaCreate(**self._venda_produto(produto_id, 1)), db=db)
+                    return True
+                except Exception:
+                    return False
+
+        async def finalizar_todas(total):
+            terminais = asyncio.Semaphore(20)
+            return await asyncio.gather(*(finalizar(terminais) for _ in range(total)))
+
+        resultados = asyncio.run(finalizar_todas(50))
+
+        db = TestingSessionLocal()
+        assert sum(resultados) == 30
+        assert crud_estoque.get_saldo(db, produto_id) == 0
+        saidas = db.query(MovimentacaoEstoque).filter(
+            MovimentacaoEstoque.produto_id == produto_id,
+            MovimentacaoEstoque.tipo == TipoMovimentacaoEstoque.SAIDA_VENDA
+        ).count()
+        assert saidas == 30
+        db.close()
+
+    def test_idempotency_key(self):
+        """Testa que a repetição com a mesma Idempotency-Key devolve a venda original"""
+        venda_data = self._venda_produto(uuid.uuid4(), 2)
+        cabecalho = {"Idempotency-Key": "terminal-01-000123"}
+
+        primeira = client.post("/api/v1/vendas/", json=venda_data, headers=cabecalho)
+        assert primeira.status_code == 201
+
+        repeticao = client.post("/api/v1/vendas/", json=venda_data, headers=cabecalho)
+        assert repeticao.status_code == 201
+        assert repeticao.headers["Idempotent-Replayed"] == "true"
+        assert repeticao.json() == primeira.json()
+
+        db = TestingSessionLocal()
+        assert db.query(Venda).count() == 1
+
+        # Mesma chave com outra venda é recusada
+        outra = self._venda_produto(uuid.uuid4(), 3)
+        response = client.post("/api/v1/vendas/", json=outra, headers=cabecalho)
+        assert response.status_code == 422
+
+        # Chave expirada: a requisição cria uma nova venda
+        db.query(ChaveIdempotencia).update({"expira_em": datetime.now() - timedelta(hours=1)})
+        db.commit()
+        response = client.post("/api/v1/vendas/", json=venda_data, headers=cabecalho)
+        assert response.status_code == 201
+        assert "Idempotent-Replayed" not in response.headers
+        assert response.json()["id"] != primeira.json()["id"]
+        assert db.query(Venda).count() == 2
+        db.close()
+
     def test_criar_venda_pagamento_misto(self):
         """Testa criação de venda com pagamento misto"""
         venda_data = {
@@ -201,6 +446,176 @@ class TestVendas:
         assert data["pagina"] == 1
         assert data["por_pagina"] == 20
 
+    def test_listar_vendas_por_cursor(self):
+        """Testa a paginação por cursor sem contagem do total"""
+        for i in range(5):
+            venda_data = {
+                "itens": [
+                    {
+                        "produto_id": str(uuid.uuid4()),
+                        "quantidade": 1,
+                        "preco_unitario": 1000 + i,
+                        "desconto_item": 0
+                    }
+                ],
+                "pagamentos": [
+                    {
+                        "forma_pagamento": "pix",
+                        "valor_pago": 1000 + i
+                    }
+                ],
+                "criado_por": "test_user"
+            }
+            client.post("/api/v1/vendas/", json=venda_data)
+
+        ids = []
+        cursor = None
+        while True:
+            params = {"por_pagina": 2, "contar_total": False}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/api/v1/vendas/", params=params)
+            assert response.status_code == 200
+            data = response.json()
+            assert data["total"] is None
+            ids.extend(venda["id"] for venda in data["vendas"])
+            cursor = data["proximo_cursor"]
+            if not cursor:
+                break
+
+        assert len(ids) == 5
+        assert len(set(ids)) == 5
+
+        paginado = client.get("/api/v1/vendas/", params={"por_pagina": 5}).json()
+        assert [venda["id"] for venda in paginado["vendas"]] == ids
+        assert paginado["total"] == 5
+
+        response = client.get("/api/v1/vendas/", params={"cursor": "invalido"})
+        assert response.status_code == 400
+
+    def test_filtro_por_data_venda(self):
+        """Testa o filtro por período sobre a data de negócio da venda"""
+        venda_data = {
+            "itens": [
+                {"produto_id": str(uuid.uuid4()), "quantidade": 1, "preco_unitario": 1000}
+            ],
+            "pagamentos": [
+                {"forma_pagamento": "pix", "valor_pago": 1000}
+            ],
+            "criado_por": "test_user"
+        }
+        venda = client.post("/api/v1/vendas/", json=venda_data).json()
+        hoje = date.fromisoformat(venda["data_venda"])
+        assert venda["numero_venda"].startswith(hoje.strftime("%Y%m%d"))
+
+        params = {"data_inicio": hoje.isoformat(), "data_fim": hoje.isoformat()}
+        assert client.get("/api/v1/vendas/", params=params).json()["total"] == 1
+        assert client.get("/api/v1/vendas/resumo/vendas", params=params).json()["total_vendas"] == 1
+
+        ontem = (hoje - timedelta(days=1)).isoformat()
+        params = {"data_inicio": ontem, "data_fim": ontem}
+        assert client.get("/api/v1/vendas/", params=params).json()["total"] == 0
+        assert client.get("/api/v1/vendas/resumo/vendas", params=params).json()["total_vendas"] == 0
+
+        # Itens e pagamentos herdam a data de negócio (chave de partição)
+        db = TestingSessionLocal()
+        db_venda = db.get(Venda, uuid.UUID(venda["id"]))
+        assert [item.data_venda for item in db_venda.itens] == [hoje]
+        assert [pagamento.data_venda for pagamento in db_venda.pagamentos] == [hoje]
+        db.close()
+
+        response = client.get(f"/api/v1/vendas/numero/{venda['numero_venda']}")
+        assert response.status_code == 200
+        assert response.json()["id"] == venda["id"]
+        assert crud_venda.data_do_numero(venda["numero_venda"]) == hoje
+        assert crud_venda.data_do_numero("VDA-0001") is None
+
+    def test_particoes_mensais(self):
+        """Testa os nomes e intervalos das partições mensais e o comportamento fora do PostgreSQL"""
+        assert meses_entre(date(2025, 11, 20), date(2026, 2, 1)) == [
+            date(2025, 11, 1), date(2025, 12, 1), date(2026, 1, 1), date(2026, 2, 1)
+        ]
+        assert somar_meses(date(2025, 12, 1), 1) == date(2026, 1, 1)
+        assert somar_meses(date(2026, 1, 1), -13) == date(2024, 12, 1)
+        assert nome_particao("itens_venda", date(2026, 3, 1)) == "itens_venda_p2026_03"
+        assert mes_da_particao("itens_venda", "itens_venda_p2026_03") == date(2026, 3, 1)
+        assert mes_da_particao("vendas", "itens_venda_p2026_03") is None
+        assert mes_da_particao("vendas", "vendas_default") is None
+
+        # Em SQLite as tabelas não são particionadas: nada é criado
+        with engine.begin() as conexao:
+            assert not particionado(conexao)
+            assert garantir_particoes_futuras(conexao, date.today()) == []
+
+    def test_exportar_vendas(self):
+        """Testa a exportação de vendas em CSV e NDJSON"""
+        for quantidade_itens in (1, 2, 1):
+            venda_data = {
+                "itens": [
+                    {"produto_id": str(uuid.uuid4()), "quantidade": 1, "preco_unitario": 1000}
+                    for _ in range(quantidade_itens)
+                ],
+                "pagamentos": [
+                    {"forma_pagamento": "cartao_credito", "valor_pago": 1000 * quantidade_itens}
+                ],
+                "criado_por": "test_user"
+            }
+            venda = client.post("/api/v1/vendas/", json=venda_data).json()
+
+        response = client.get("/api/v1/vendas/export", params={"formato": "csv"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        linhas = list(csv.DictReader(io.StringIO(response.text)))
+        assert len(linhas) == 4
+        assert {linha["pagamentos"] for linha in linhas} == {"cartao_credito:1000", "cartao_credito:2000"}
+
+        response = client.get("/api/v1/vendas/export", params={"formato": "ndjson"})
+        assert response.status_code == 200
+        registros = [json.loads(linha) for linha in response.text.splitlines()]
+        assert len(registros) == 3
+        assert sorted(len(registro["itens"]) for registro in registros) == [1, 1, 2]
+        assert registros[-1]["numero_venda"] == venda["numero_venda"]
+
+        ontem = (date.fromisoformat(venda["data_venda"]) - timedelta(days=1)).isoformat()
+        response = client.get("/api/v1/vendas/export", params={"data_inicio": ontem, "data_fim": ontem})
+        assert response.text.strip() == ",".join(csv.DictReader(io.StringIO(response.text)).fieldnames)
+
+    def test_listagens_sem_n_mais_1(self):
+        """Testa que as listagens não disparam uma consulta por venda"""
+        cliente_id = str(uuid.uuid4())
+        vendedor_id = str(uuid.uuid4())
+        for _ in range(6):
+            venda_data = {
+                "itens": [
+                    {"produto_id": str(uuid.uuid4()), "quantidade": 1, "preco_unitario": 1000},
+                    {"produto_id": str(uuid.uuid4()), "quantidade": 2, "preco_unitario": 500}
+                ],
+                "pagamentos": [
+                    {"forma_pagamento": "dinheiro", "valor_pago": 1000},
+                    {"forma_pagamento": "pix", "valor_pago": 1000}
+                ],
+                "cliente_id": cliente_id,
+                "vendedor_id": vendedor_id,
+                "criado_por": "test_user"
+            }
+            client.post("/api/v1/vendas/", json=venda_data)
+
+        for url in (
+            "/api/v1/vendas/",
+            f"/api/v1/vendas/cliente/{cliente_id}/historico",
+            f"/api/v1/vendas/vendedor/{vendedor_id}/vendas"
+        ):
+            with contar_consultas() as comandos:
+                response = client.get(url)
+            assert response.status_code == 200
+            assert len(comandos) <= MAX_CONSULTAS_LISTAGEM, url
+
+        venda_id = response.json()[0]["id"]
+        with contar_consultas() as comandos:
+            response = client.get(f"/api/v1/vendas/{venda_id}")
+        assert len(response.json()["itens"]) == 2
+        assert len(comandos) == 1
+
     def test_buscar_venda_por_id(self):
         """Testa busca de venda por ID"""
         # Criar venda
@@ -347,6 +762,721 @@ class TestVendas:
         assert data["valor_total"] == 6000  # 1000 + 2000 + 3000
         assert data["ticket_medio"] == 2000.0
 
+    def test_ranking_vendedores(self):
+        """Testa o ranking de vendedores: totais, ticket médio, série diária e posição"""
+        vendedores = [uuid.uuid4() for _ in range(3)]
+        # (vendedor, quantidade do item a R$ 10,00)
+        vendas = [(vendedores[0], 1), (vendedores[0], 3), (vendedores[1], 5), (vendedores[2], 2), (None, 9)]
+        ids = []
+        for vendedor_id, quantidade in vendas:
+            venda_data = self._venda_produto(uuid.uuid4(), quantidade)
+            venda_data["vendedor_id"] = str(vendedor_id) if vendedor_id else None
+            response = client.post("/api/v1/vendas/", json=venda_data)
+            assert response.status_code == 201
+            ids.append(response.json()["id"])
+
+        # Uma venda cancelada não conta; outra foi registrada no dia anterior
+        client.delete(f"/api/v1/vendas/{ids[3]}")
+        db = TestingSessionLocal()
+        venda = db.get(Venda, uuid.UUID(ids[0]))
+        ontem = venda.data_venda - timedelta(days=1)
+        venda.data_venda = ontem
+        db.commit()
+        hoje = db.get(Venda, uuid.UUID(ids[1])).data_venda
+        db.close()
+
+        with contar_consultas() as comandos:
+            response = client.get("/api/v1/vendas/vendedores/ranking")
+        assert response.status_code == 200
+        assert len(comandos) == 1
+
+        ranking = response.json()["vendedores"]
+        assert [v["vendedor_id"] for v in ranking] == [str(vendedores[1]), str(vendedores[0])]
+        assert [v["posicao"] for v in ranking] == [1, 2]
+        assert ranking[0]["total_vendas"] == 1
+        assert ranking[0]["valor_total"] == 5000
+        assert ranking[1]["total_vendas"] == 2
+        assert ranking[1]["valor_total"] == 4000
+        assert ranking[1]["ticket_medio"] == 2000.0
+        assert ranking[1]["serie_diaria"] == [
+            {"data": ontem.isoformat(), "total_vendas": 1, "valor_total": 1000},
+            {"data": hoje.isoformat(), "total_vendas": 1, "valor_total": 3000},
+        ]
+
+        # Filtro de período e limite de posições
+        response = client.get(f"/api/v1/vendas/vendedores/ranking?data_inicio={hoje}&limite=1")
+        ranking = response.json()["vendedores"]
+        assert len(ranking) == 1
+        assert ranking[0]["vendedor_id"] == str(vendedores[1])
+
+        response = client.get(f"/api/v1/vendas/vendedores/ranking?data_fim={ontem}")
+        ranking = response.json()["vendedores"]
+        assert [(v["vendedor_id"], v["valor_total"]) for v in ranking] == [(str(vendedores[0]), 1000)]
+
+    def test_ranking_vendedores_empatados(self):
+        """Testa que o limite do ranking corta empates pelo vendedor_id"""
+        vendedores = sorted(uuid.uuid4() for _ in range(3))
+        for vendedor_id, quantidade in [(vendedores[2], 5), (vendedores[0], 2), (vendedores[1], 2), (vendedores[2], 1)]:
+            venda_data = self._venda_produto(uuid.uuid4(), quantidade)
+            venda_data["vendedor_id"] = str(vendedor_id)
+            assert client.post("/api/v1/vendas/", json=venda_data).status_code == 201
+
+        ranking = client.get("/api/v1/vendas/vendedores/ranking?limite=2").json()["vendedores"]
+        assert [(v["vendedor_id"], v["posicao"]) for v in ranking] == [(str(vendedores[2]), 1), (str(vendedores[0]), 2)]
+
+        ranking = client.get("/api/v1/vendas/vendedores/ranking").json()["vendedores"]
+        assert [v["posicao"] for v in ranking] == [1, 2, 2]
+
+    def test_ranking_produtos(self):
+        """Testa o ranking de produtos por unidades e por receita, com período e limite"""
+        produtos = [uuid.uuid4() for _ in range(3)]
+        # (produto, quantidade, preço unitário)
+        itens = [(produtos[0], 4, 500), (produtos[1], 1, 5000), (produtos[2], 2, 1000), (produtos[0], 1, 500)]
+        ids = []
+        for produto_id, quantidade, preco in itens:
+            response = client.post("/api/v1/vendas/", json={
+                "itens": [{
+                    "produto_id": str(produto_id), "quantidade": quantidade,
+                    "preco_unitario": preco, "desconto_item": 0
+                }],
+                "pagamentos": [{"forma_pagamento": "pix", "valor_pago": quantidade * preco}],
+                "criado_por": "test_user"
+            })
+            assert response.status_code == 201
+            ids.append(response.json()["id"])
+
+        # A venda de produtos[2] passa para o dia anterior
+        db = TestingSessionLocal()
+        venda = db.get(Venda, uuid.UUID(ids[2]))
+        ontem = venda.data_venda - timedelta(days=1)
+        venda.data_venda = ontem
+        for item in venda.itens:
+            item.data_venda = ontem
+        db.commit()
+        db.close()
+
+        response = client.get("/api/v1/vendas/produtos/ranking")
+        assert response.status_code == 200
+        ranking = response.json()["produtos"]
+        assert [(p["produto_id"], p["quantidade"], p["receita"]) for p in ranking] == [
+            (str(produtos[0]), 5, 2500), (str(produtos[2]), 2, 2000), (str(produtos[1]), 1, 5000)
+        ]
+        assert [p["posicao"] for p in ranking] == [1, 2, 3]
+        assert ranking[0]["nome_produto"] == f"Produto {produtos[0]}"
+
+        response = client.get("/api/v1/vendas/produtos/ranking?criterio=receita&limite=2")
+        ranking = response.json()["produtos"]
+        assert response.json()["criterio"] == "receita"
+        assert [p["produto_id"] for p in ranking] == [str(produtos[1]), str(produtos[0])]
+
+        response = client.get(f"/api/v1/vendas/produtos/ranking?data_fim={ontem}")
+        ranking = response.json()["produtos"]
+        assert [(p["produto_id"], p["quantidade"]) for p in ranking] == [(str(produtos[2]), 2)]
+
+        response = client.get("/api/v1/vendas/produtos/ranking?criterio=invalido")
+        assert response.status_code == 422
+
+    def test_ranking_produtos_dia_em_cache(self):
+        """Testa que o ranking do dia vem do cache, é incrementado a cada venda e descartado no cancelamento"""
+        produtos = [uuid.uuid4() for _ in range(2)]
+        response = client.post("/api/v1/vendas/", json=self._venda_produto(produtos[0], 2))
+        venda_id = response.json()["id"]
+        db = TestingSessionLocal()
+        hoje = db.get(Venda, uuid.UUID(venda_id)).data_venda
+        db.close()
+        url = f"/api/v1/vendas/produtos/ranking?data_inicio={hoje}&data_fim={hoje}"
+
+        with contar_consultas() as comandos:
+            primeira = client.get(url)
+            segunda = client.get(url)
+        assert len(comandos) == 1
+        assert primeira.json()["produtos"] == segunda.json()["produtos"]
+
+        # Novas vendas entram no cache sem consultar o banco
+        client.post("/api/v1/vendas/", json=self._venda_produto(produtos[1], 3))
+        client.post("/api/v1/vendas/", json=self._venda_produto(produtos[0], 2))
+        with contar_consultas() as comandos:
+            response = client.get(url)
+        assert len(comandos) == 0
+        ranking = response.json()["produtos"]
+        assert [(p["produto_id"], p["quantidade"], p["receita"]) for p in ranking] == [
+            (str(produtos[0]), 4, 4000), (str(produtos[1]), 3, 3000)
+        ]
+
+        # O cancelamento descarta o cache, e a próxima consulta relê o banco
+        client.delete(f"/api/v1/vendas/{venda_id}")
+        with contar_consultas() as comandos:
+            response = client.get(url)
+        assert len(comandos) == 1
+        ranking = response.json()["produtos"]
+        assert [(p["produto_id"], p["quantidade"]) for p in ranking] == [
+            (str(produtos[1]), 3), (str(produtos[0]), 2)
+        ]
+
+    def test_resumo_vendas_por_status(self):
+        """Testa que o resumo separa vendas por status e totaliza só as concluídas"""
+        ids = []
+        for valor in (1000, 4000):
+            venda_data = {
+                "itens": [
+                    {
+                        "produto_id": str(uuid.uuid4()),
+                        "quantidade": 1,
+                        "preco_unitario": valor,
+                        "desconto_item": 0
+                    }
+                ],
+                "pagamentos": [
+                    {
+                        "forma_pagamento": "pix",
+                        "valor_pago": valor
+                    }
+                ],
+                "criado_por": "test_user"
+            }
+            ids.append(client.post("/api/v1/vendas/", json=venda_data).json()["id"])
+
+        client.delete(f"/api/v1/vendas/{ids[1]}")
+
+        response = client.get("/api/v1/vendas/resumo/vendas")
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["total_vendas"] == 1
+        assert data["valor_total"] == 1000
+        assert data["vendas_por_status"] == {"concluida": 1, "cancelada": 1}
+
+    def test_resumo_vendas_por_forma_pagamento(self):
+        """Testa a distribuição do resumo por forma de pagamento"""
+        venda_data = {
+            "itens": [
+                {
+                    "produto_id": str(uuid.uuid4()),
+                    "quantidade": 1,
+                    "preco_unitario": 10000,
+                    "desconto_item": 0
+                }
+            ],
+            "pagamentos": [
+                {
+                    "forma_pagamento": "dinheiro",
+                    "valor_pago": 4000,
+                    "valor_recebido": 5000
+                },
+                {
+                    "forma_pagamento": "cartao_debito",
+                    "valor_pago": 6000
+                }
+            ],
+            "criado_por": "test_user"
+        }
+        client.post("/api/v1/vendas/", json=venda_data)
+        client.post("/api/v1/vendas/", json=venda_data)
+
+        data = client.get("/api/v1/vendas/resumo/vendas").json()
+        assert data["vendas_por_forma_pagamento"] == {
+            "dinheiro": {"quantidade": 2, "valor_total": 8000},
+            "cartao_debito": {"quantidade": 2, "valor_total": 12000}
+        }
+
+    def test_resumo_diario_incremental_e_reconstrucao(self):
+        """Testa que o resumo diário mantido na criação/cancelamento confere com a reconstrução"""
+        vendedor_id = str(uuid.uuid4())
+        ids = []
+        for valor in (1500, 2500, 3500):
+            venda_data = {
+                "itens": [
+                    {
+                        "produto_id": str(uuid.uuid4()),
+                        "quantidade": 1,
+                        "preco_unitario": valor,
+                        "desconto_item": 0
+                    }
+                ],
+                "pagamentos": [
+                    {
+                        "forma_pagamento": "dinheiro",
+                        "valor_pago": 500
+                    },
+                    {
+                        "forma_pagamento": "pix",
+                        "valor_pago": valor - 500
+                    }
+                ],
+                "vendedor_id": vendedor_id,
+                "criado_por": "test_user"
+            }
+            ids.append(client.post("/api/v1/vendas/", json=venda_data).json()["id"])
+        client.delete(f"/api/v1/vendas/{ids[0]}")
+
+        response = client.get(f"/api/v1/vendas/vendedor/{vendedor_id}/resumo")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_vendas"] == 2
+        assert data["valor_total"] == 6000
+        assert data["vendas_por_status"] == {"concluida": 2, "cancelada": 1}
+        assert data["vendas_por_forma_pagamento"]["pix"] == {"quantidade": 2, "valor_total": 5000}
+
+        outro = client.get(f"/api/v1/vendas/vendedor/{uuid.uuid4()}/resumo").json()
+        assert outro["total_vendas"] == 0
+
+        db = TestingSessionLocal()
+        try:
+            def linhas():
+                return sorted(
+                    (r.data, r.status.value, r.forma_pagamento, str(r.vendedor_id), r.quantidade, r.valor)
+                    for r in db.query(VendaResumoDiario).all()
+                    if r.quantidade
+                )
+            incremental = linhas()
+            crud_venda.reconstruir_resumo_diario(db)
+            assert linhas() == incremental
+        finally:
+            db.close()
+
+    def test_arquivo_frio(self, tmp_path, monkeypatch):
+        """Testa o arquivamento em Parquet e a leitura por número e no resumo"""
+        monkeypatch.setattr(arquivo_vendas, "diretorio", tmp_path)
+        vendedor_id = str(uuid.uuid4())
+        ids = []
+        for quantidade in (1, 2, 3):
+            venda_data = self._venda_produto(uuid.uuid4(), quantidade)
+            venda_data["vendedor_id"] = vendedor_id
+            ids.append(client.post("/api/v1/vendas/", json=venda_data).json()["id"])
+        client.delete(f"/api/v1/vendas/{ids[2]}")
+
+        # As duas primeiras vendas passam para janeiro de 2024
+        db = TestingSessionLocal()
+        antigas = []
+        for posicao, venda_id in enumerate(ids[:2], start=1):
+            venda = db.get(Venda, uuid.UUID(venda_id))
+            venda.data_venda = date(2024, 1, 15)
+            venda.numero_venda = f"20240115-{posicao:04d}"
+            for filho in venda.itens + venda.pagamentos:
+                filho.data_venda = venda.data_venda
+            antigas.append(venda.numero_venda)
+        db.commit()
+        crud_venda.reconstruir_resumo_diario(db)
+
+        totais = arquivo_vendas.arquivar(db, date(2025, 1, 1))
+        assert totais == {"vendas": 2, "itens_venda": 2, "pagamentos_venda": 2}
+        assert db.query(Venda).count() == 1
+        assert db.query(ItemVenda).count() == 1
+        # Repetir o arquivamento não duplica nada
+        assert arquivo_vendas.arquivar(db, date(2025, 1, 1))["vendas"] == 0
+        db.close()
+
+        response = client.get(f"/api/v1/vendas/numero/{antigas[1]}")
+        assert response.status_code == 200
+        venda = response.json()
+        assert venda["id"] == ids[1]
+        assert venda["total_venda"] == 2000
+        assert venda["status"] == "concluida"
+        assert [item["quantidade"] for item in venda["itens"]] == [2]
+        assert [p["forma_pagamento"] for p in venda["pagamentos"]] == ["pix"]
+        assert client.get("/api/v1/vendas/numero/20240115-0099").status_code == 404
+
+        # O resumo do período arquivado continua disponível, inclusive após reconstruí-lo
+        params = {"data_inicio": "2024-01-01", "data_fim": "2024-01-31"}
+        for _ in range(2):
+            resumo = client.get(f"/api/v1/vendas/vendedor/{vendedor_id}/resumo", params=params).json()
+            assert resumo["total_vendas"] == 2
+            assert resumo["valor_total"] == 3000
+            assert resumo["vendas_por_forma_pagamento"]["pix"] == {"quantidade": 2, "valor_total": 3000}
+            db = TestingSessionLocal()
+            crud_venda.reconstruir_resumo_diario(db)
+            db.close()
+
+        resumo = client.get(f"/api/v1/vendas/vendedor/{vendedor_id}/resumo").json()
+        assert resumo["vendas_por_status"] == {"concluida": 2, "cancelada": 1}
+
+    def test_numeracao_concorrente_sem_duplicidade(self):
+        """Testa que vendas criadas em paralelo recebem números únicos e sequenciais"""
+        venda_data = {
+            "itens": [
+                {
+                    "produto_id": str(uuid.uuid4()),
+                    "quantidade": 1,
+                    "preco_unitario": 1000,
+                    "desconto_item": 0
+                }
+            ],
+            "pagamentos": [
+                {
+                    "forma_pagamento": "pix",
+                    "valor_pago": 1000
+                }
+            ],
+            "criado_por": "test_user"
+        }
+
+        async def finalizar(terminais):
+            async with terminais, TestingAsyncSessionLocal() as db:
+                venda = await criar_venda(venda=VendaCreate(**venda_data), db=db)
+                return venda.numero_venda
+
+        async def finalizar_todas(total):
+            # 20 terminais finalizando vendas ao mesmo tempo
+            terminais = asyncio.Semaphore(20)
+            return await asyncio.gather(*(finalizar(terminais) for _ in range(total)))
+
+        total = 200
+        numeros = asyncio.run(finalizar_todas(total))
+
+        assert len(set(numeros)) == total
+        sequenciais = sorted(int(numero.split("-")[1]) for numero in numeros)
+        assert sequenciais == list(range(sequenciais[0], sequenciais[0] + total))
+
+    def test_criar_vendas_lote(self):
+        """Testa criação de vendas em lote com uma venda inválida"""
+        vendas = []
+        for i in range(5):
+            valor = 1000 * (i + 1)
+            vendas.append({
+                "itens": [
+                    {
+                        "produto_id": str(uuid.uuid4()),
+                        "quantidade": 1,
+                        "preco_unitario": valor,
+                        "desconto_item": 0
+                    }
+                ],
+                "pagamentos": [
+                    {
+                        "forma_pagamento": "dinheiro",
+                        "valor_pago": valor,
+                        "valor_recebido": valor + 500
+                    }
+                ],
+                "criado_por": "terminal_offline"
+            })
+        vendas[2]["pagamentos"][0]["valor_pago"] = 1  # Pagamento não confere
+
+        response = client.post("/api/v1/vendas/lote?tamanho_commit=2", json=vendas)
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["total"] == 5
+        assert data["sucesso"] == 4
+        assert data["falhas"] == 1
+        assert [r["indice"] for r in data["resultados"]] == [0, 1, 2, 3, 4]
+        assert data["resultados"][2]["sucesso"] is False
+        assert "não corresponde ao total da venda" in data["resultados"][2]["erro"]
+
+        numeros = [r["numero_venda"] for r in data["resultados"] if r["sucesso"]]
+        assert len(set(numeros)) == 4
+
+        venda = client.get(f"/api/v1/vendas/{data['resultados'][4]['venda_id']}").json()
+        assert venda["numero_venda"] == data["resultados"][4]["numero_venda"]
+        assert venda["total_venda"] == 5000
+        assert len(venda["itens"]) == 1
+        assert venda["pagamentos"][0]["troco"] == 500
+
+    def _conferir_resumo_diario(self):
+        """Confere o resumo diário mantido incrementalmente com a reconstrução"""
+        db = TestingSessionLocal()
+        try:
+            def linhas():
+                return sorted(
+                    (r.data, r.status.value, r.forma_pagamento, str(r.vendedor_id), r.quantidade, r.valor)
+                    for r in db.query(VendaResumoDiario).all()
+                    if r.quantidade or r.valor
+                )
+            incremental = linhas()
+            crud_venda.reconstruir_resumo_diario(db)
+            assert linhas() == incremental
+        finally:
+            db.close()
+
+    def test_carrinho_totais_incrementais_e_finalizacao(self):
+        """Testa inclusão/remoção de itens, desconto e finalização do carrinho"""
+        produto_id = uuid.uuid4()
+        db = TestingSessionLocal()
+        crud_estoque.registrar_entrada(db, produto_id, 10)
+        db.close()
+
+        response = client.post("/api/v1/carrinhos/", json={"vendedor_id": str(uuid.uuid4())})
+        assert response.status_code == 201
+        carrinho = response.json()
+        assert carrinho["status"] == "pendente"
+        assert carrinho["total_venda"] == 0
+        url = f"/api/v1/carrinhos/{carrinho['id']}"
+
+        response = client.post(f"{url}/itens", json={
+            "produto_id": str(produto_id), "quantidade": 3, "preco_unitario": 1000, "desconto_item": 0
+        })
+        assert response.status_code == 201
+        assert response.json()["subtotal"] == 3000
+        response = client.post(f"{url}/itens", json={
+            "produto_id": str(uuid.uuid4()), "quantidade": 1, "preco_unitario": 700, "desconto_item": 200
+        })
+        item_removido = response.json()["item"]["id"]
+        assert response.json()["total_venda"] == 3500
+
+        response = client.put(f"{url}/desconto", json={"desconto_total": 5000})
+        assert response.status_code == 400
+        response = client.put(f"{url}/desconto", json={"desconto_total": 400})
+        assert response.json()["total_venda"] == 3100
+
+        response = client.delete(f"{url}/itens/{item_removido}")
+        assert response.status_code == 200
+        assert response.json()["subtotal"] == 3000
+        assert response.json()["total_venda"] == 2600
+        assert client.delete(f"{url}/itens/{item_removido}").status_code == 404
+
+        # Pagamento divergente: o carrinho continua aberto e intacto
+        response = client.post(f"{url}/finalizar", json={"pagamentos": [{"forma_pagamento": "pix", "valor_pago": 2000}]})
+        assert response.status_code == 400
+        assert client.get(url).json()["status"] == "pendente"
+
+        response = client.post(f"{url}/finalizar", json={"pagamentos": [
+            {"forma_pagamento": "dinheiro", "valor_pago": 600, "valor_recebido": 1000},
+            {"forma_pagamento": "pix", "valor_pago": 2000}
+        ]})
+        assert response.status_code == 200
+        venda = response.json()
+        assert venda["status"] == "concluida"
+        assert crud_venda.data_do_numero(venda["numero_venda"]) is not None
+        assert venda["total_venda"] == 2600
+        assert len(venda["itens"]) == 1
+        assert sorted(p["troco"] for p in venda["pagamentos"]) == [0, 400]
+
+        db = TestingSessionLocal()
+        assert crud_estoque.get_saldo(db, produto_id) == 7
+        db.close()
+
+        # Carrinho fechado não aceita alterações
+        assert client.post(f"{url}/finalizar", json={"pagamentos": [{"forma_pagamento": "pix", "valor_pago": 2600}]}).status_code == 409
+        assert client.put(f"{url}/desconto", json={"desconto_total": 0}).status_code == 409
+        assert client.get(f"/api/v1/carrinhos/{uuid.uuid4()}").status_code == 404
+
+        self._conferir_resumo_diario()
+
+    def test_carrinho_aberto_em_outro_dia(self, monkeypatch):
+        """Testa a finalização de um carrinho aberto no dia anterior"""
+        ontem = crud_venda.data_negocio(datetime.now(timezone.utc)) - timedelta(days=1)
+        data_negocio = crud_venda.data_negocio
+        monkeypatch.setattr(crud_venda, "data_negocio", lambda momento: ontem)
+        carrinho = client.post("/api/v1/carrinhos/", json={"vendedor_id": str(uuid.uuid4())}).json()
+        url = f"/api/v1/carrinhos/{carrinho['id']}"
+        client.post(f"{url}/itens", json={
+            "produto_id": str(uuid.uuid4()), "quantidade": 2, "preco_unitario": 1000, "desconto_item": 0
+        })
+        monkeypatch.setattr(crud_venda, "data_negocio", data_negocio)
+
+        response = client.post(f"{url}/finalizar", json={"pagamentos": [{"forma_pagamento": "pix", "valor_pago": 2000}]})
+        assert response.status_code == 200
+        venda = response.json()
+        assert venda["status"] == "concluida"
+        assert venda["data_venda"] == ontem.isoformat()
+        assert crud_venda.data_do_numero(venda["numero_venda"]) == ontem
+
+        db = TestingSessionLocal()
+        try:
+            venda_id = uuid.UUID(venda["id"])
+            assert {d for (d,) in db.query(ItemVenda.data_venda).filter(ItemVenda.venda_id == venda_id)} == {ontem}
+            assert {d for (d,) in db.query(PagamentoVenda.data_venda).filter(PagamentoVenda.venda_id == venda_id)} == {ontem}
+        finally:
+            db.close()
+
+        self._conferir_resumo_diario()
+
+    def test_carrinho_grande_sem_recalculo(self):
+        """Testa que incluir itens custa o mesmo número de comandos em um carrinho com 300 itens"""
+        carrinho = client.post("/api/v1/carrinhos/", json={"vendedor_id": str(uuid.uuid4())}).json()
+        url = f"/api/v1/carrinhos/{carrinho['id']}"
+
+        comandos_por_inclusao = []
+        for indice in range(300):
+            item = {"produto_id": str(uuid.uuid4()), "quantidade": 1, "preco_unitario": 100 + indice, "desconto_item": 0}
+            with contar_consultas() as comandos:
+                response = client.post(f"{url}/itens", json=item)
+            assert response.status_code == 201
+            comandos_por_inclusao.append(len(comandos))
+
+        assert comandos_por_inclusao[-1] == comandos_por_inclusao[1]
+        esperado = sum(100 + indice for indice in range(300))
+        assert response.json()["total_venda"] == esperado
+        self._conferir_resumo_diario()
+
+        response = client.delete(url)
+        assert response.status_code == 200
+        assert client.get(url).json()["status"] == "cancelada"
+        assert client.delete(url).status_code == 409
+        self._conferir_resumo_diario()
+
+    def test_sessao_caixa_totais_incrementais(self):
+        """Testa os totais da sessão de caixa mantidos a cada venda e o fechamento"""
+        response = client.post("/api/v1/caixas/", json={"terminal": "PDV-01", "operador": "ana", "valor_abertura": 10000})
+        assert response.status_code == 201
+        sessao_id = response.json()["id"]
+        assert client.post("/api/v1/caixas/", json={"terminal": "PDV-01", "operador": "bia"}).status_code == 409
+        assert client.get("/api/v1/caixas/terminal/PDV-01/aberta").json()["id"] == sessao_id
+
+        def vender(pagamentos):
+            total = sum(pagamento["valor_pago"] for pagamento in pagamentos)
+            response = client.post("/api/v1/vendas/", json={
+                "itens": [{"produto_id": str(uuid.uuid4()), "quantidade": 1, "preco_unitario": total, "desconto_item": 0}],
+                "pagamentos": pagamentos,
+                "sessao_caixa_id": sessao_id
+            })
+            assert response.status_code == 201
+            return response.json()["id"]
+
+        concluida = vender([{"forma_pagamento": "dinheiro", "valor_pago": 3000, "valor_recebido": 5000}])
+        cancelada = vender([{"forma_pagamento": "pix", "valor_pago": 2000}])
+        vender([
+            {"forma_pagamento": "cartao_debito", "valor_pago": 1500},
+            {"forma_pagamento": "dinheiro", "valor_pago": 500, "valor_recebido": 1000}
+        ])
+        client.delete(f"/api/v1/vendas/{cancelada}")
+
+        carrinho = client.post("/api/v1/carrinhos/", json={"sessao_caixa_id": sessao_id}).json()
+        client.post(f"/api/v1/carrinhos/{carrinho['id']}/itens", json={
+            "produto_id": str(uuid.uuid4()), "quantidade": 2, "preco_unitario": 400, "desconto_item": 0
+        })
+        response = client.post(f"/api/v1/carrinhos/{carrinho['id']}/finalizar", json={
+            "pagamentos": [{"forma_pagamento": "pix", "valor_pago": 800}]
+        })
+        assert response.json()["sessao_caixa_id"] == sessao_id
+
+        # O fechamento lê só a linha da sessão
+        with contar_consultas() as comandos:
+            response = client.post(f"/api/v1/caixas/{sessao_id}/fechar", json={"valor_fechamento": 13400})
+        assert response.status_code == 200
+        assert not [comando for comando in comandos if "pagamentos_venda" in comando or "FROM vendas" in comando]
+
+        caixa = response.json()
+        assert caixa["status"] == "fechada"
+        assert caixa["quantidade_vendas"] == 3
+        assert caixa["total_vendas"] == 5800
+        assert caixa["total_troco"] == 2500
+        assert caixa["quantidade_cancelamentos"] == 1
+        assert caixa["total_cancelado"] == 2000
+        assert caixa["totais_por_forma_pagamento"]["dinheiro"] == 3500
+        assert caixa["totais_por_forma_pagamento"]["pix"] == 800
+        assert caixa["totais_por_forma_pagamento"]["cartao_debito"] == 1500
+        assert caixa["dinheiro_esperado"] == 13500
+        assert caixa["diferenca_caixa"] == -100
+
+        # Caixa fechado não recebe vendas nem novo fechamento
+        assert client.post(f"/api/v1/caixas/{sessao_id}/fechar", json={"valor_fechamento": 0}).status_code == 409
+        response = client.post("/api/v1/vendas/", json={
+            "itens": [{"produto_id": str(uuid.uuid4()), "quantidade": 1, "preco_unitario": 100, "desconto_item": 0}],
+            "pagamentos": [{"forma_pagamento": "pix", "valor_pago": 100}],
+            "sessao_caixa_id": sessao_id
+        })
+        assert response.status_code == 400
+
+        # Sem caixa aberto no terminal, alterações de vendas da sessão fechada esperam a abertura
+        assert client.delete(f"/api/v1/vendas/{concluida}").status_code == 409
+        assert client.get(f"/api/v1/vendas/{concluida}").json()["status"] == "concluida"
+
+        # Com o caixa seguinte aberto, cancelamentos e vendas offline atrasadas entram nele
+        response = client.post("/api/v1/caixas/", json={"terminal": "PDV-01", "operador": "bia"})
+        nova_id = response.json()["id"]
+        assert client.put(f"/api/v1/vendas/{concluida}", json={"status": "cancelada"}).status_code == 200
+        assert client.get(f"/api/v1/vendas/{concluida}").json()["sessao_caixa_id"] == nova_id
+        response = client.post("/api/v1/vendas/lote", json=[{
+            "itens": [{"produto_id": str(uuid.uuid4()), "quantidade": 1, "preco_unitario": 100, "desconto_item": 0}],
+            "pagamentos": [{"forma_pagamento": "pix", "valor_pago": 100}],
+            "sessao_caixa_id": sessao_id
+        }])
+        offline = response.json()["resultados"][0]
+        assert offline["sucesso"] is True
+        assert client.get(f"/api/v1/vendas/{offline['venda_id']}").json()["sessao_caixa_id"] == nova_id
+
+        totais = (
+            "quantidade_vendas", "total_vendas", "total_troco",
+            "quantidade_cancelamentos", "total_cancelado", "totais_por_forma_pagamento"
+        )
+        fechada = client.get(f"/api/v1/caixas/{sessao_id}").json()
+        for chave in totais:
+            assert fechada[chave] == caixa[chave]
+        nova = client.get(f"/api/v1/caixas/{nova_id}").json()
+        assert (nova["quantidade_vendas"], nova["total_vendas"]) == (1, 100)
+        assert (nova["quantidade_cancelamentos"], nova["total_cancelado"]) == (1, 3000)
+
+        # Os totais incrementais da sessão aberta conferem com o recálculo; a fechada não muda
+        db = TestingSessionLocal()
+        try:
+            assert crud_caixa.reconstruir_totais(db) == 1
+            db.expire_all()
+            for id_sessao, esperado in ((nova_id, nova), (sessao_id, caixa)):
+                recalculado = crud_caixa.resumo(crud_caixa.get(db, uuid.UUID(id_sessao)))
+                for chave in totais:
+                    assert recalculado[chave] == esperado[chave]
+        finally:
+            db.close()
+
+    def test_conciliacao_pagamentos(self):
+        """Testa a conciliação do extrato da adquirente com os pagamentos"""
+        def venda(forma, valor, numero_transacao):
+            venda_data = {
+                "itens": [{"produto_id": str(uuid.uuid4()), "quantidade": 1, "preco_unitario": valor}],
+                "pagamentos": [
+                    {"forma_pagamento": forma, "valor_pago": valor, "numero_transacao": numero_transacao}
+                ],
+                "criado_por": "test_user"
+            }
+            response = client.post("/api/v1/vendas/", json=venda_data)
+            assert response.status_code == 201
+            return response.json()
+
+        conciliada = venda("pix", 5000, "TX-1")
+        venda("cartao_credito", 3000, "TX-2")
+        cancelada = venda("cartao_debito", 2000, "TX-3")
+        venda("pix", 1000, "TX-4")
+        assert client.delete(f"/api/v1/vendas/{cancelada['id']}").status_code == 200
+        hoje = conciliada["data_venda"][:10]
+
+        extrato = (
+            "numero_transacao;valor;numero_autorizacao\n"
+            "TX-1;50,00;AUT1\n"
+            "TX-2;31,00;\n"
+            "TX-3;20,00;\n"
+            "TX-9;12,50;\n"
+            "TX-1;50,00;\n"
+            "TX-5;abc;\n"
+        )
+        response = client.post(
+            "/api/v1/vendas/pagamentos/conciliacao",
+            params={"data_inicio": hoje, "data_fim": hoje, "incluir_conciliados": True},
+            files={"extrato": ("extrato.csv", extrato.encode("utf-8"), "text/csv")}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["resumo"] == {
+            "total_extrato": 6, "valor_extrato": 5000 + 3100 + 2000 + 1250,
+            "valor_conciliado": 5000, "conciliado": 1, "divergente": 2,
+            "nao_encontrado": 1, "sem_extrato": 1, "invalido": 2
+        }
+        assert data["conciliados"][0]["vendas"] == conciliada["numero_venda"]
+        assert data["conciliados"][0]["numero_autorizacao"] == "AUT1"
+        divergentes = {registro["numero_transacao"]: registro for registro in data["divergentes"]}
+        assert divergentes["TX-2"]["diferenca"] == 100
+        assert divergentes["TX-3"]["motivo"] == "Venda não concluída no PDV"
+        assert [registro["numero_transacao"] for registro in data["nao_encontrados"]] == ["TX-9"]
+        assert [registro["numero_transacao"] for registro in data["sem_extrato"]] == ["TX-4"]
+        assert [registro["linha_extrato"] for registro in data["invalidos"]] == [6, 7]
+
+        # Em lotes pequenos, o resultado é o mesmo
+        db = TestingSessionLocal()
+        try:
+            resultado = ConciliadorPagamentos(tamanho_lote=2).conciliar(
+                db, ler_extrato(io.StringIO(extrato)),
+                data_inicio=date.fromisoformat(hoje), data_fim=date.fromisoformat(hoje)
+            )
+        finally:
+            db.close()
+        assert resultado["resumo"] == data["resumo"]
+
+        response = client.post(
+            "/api/v1/vendas/pagamentos/conciliacao",
+            files={"extrato": ("extrato.csv", b"transacao,total\nTX-1,50.00\n", "text/csv")}
+        )
+        assert response.status_code == 400
+
     def test_health_check(self):
         """Testa endpoints de health check"""
         response = client.get("/")